@@ -0,0 +1,67 @@
+"""
+Сравнение двух прогонов benchmarks.run: по каждому маршруту - p50, p95, пропускная способность,
+запросы к БД и размер ответа до и после, с изменением в процентах.
+
+Запуск из папки backend:
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+COMPARED_FIELDS = ("p50_ms", "p95_ms", "throughput_rps", "queries_per_request", "bytes_per_request")
+
+def change(before, after):
+    """Изменение в процентах или None, если сравнивать нечего."""
+    if before is None or after is None or before == 0:
+        return None
+    return round((after - before) / before * 100, 1)
+
+def compare(before, after):
+    """Сводка по маршрутам, которые есть в обоих прогонах."""
+    warnings = []
+    for key in ("catalogue", "run", "driver", "target"):
+        if before.get(key) != after.get(key):
+            warnings.append(f"Прогоны отличаются по {key}: {before.get(key)} -> {after.get(key)}")
+
+    routes = {}
+    for route, old in before["routes"].items():
+        new = after["routes"].get(route)
+        if new is None:
+            continue
+        routes[route] = {
+            field: {"before": old.get(field), "after": new.get(field), "change_pct": change(old.get(field), new.get(field))}
+            for field in COMPARED_FIELDS
+        }
+    return {
+        "before": before.get("commit"),
+        "after": after.get("commit"),
+        "warnings": warnings,
+        "routes": routes
+    }
+
+def _format(result):
+    lines = [f"{result['before']} -> {result['after']}", *result["warnings"]]
+    header = f"{'route':<40}" + "".join(f"{field:>28}" for field in COMPARED_FIELDS)
+    lines.append(header)
+    for route, fields in result["routes"].items():
+        cells = []
+        for field in COMPARED_FIELDS:
+            value = fields[field]
+            pct = "" if value["change_pct"] is None else f" ({value['change_pct']:+}%)"
+            cells.append(f"{value['before']} -> {value['after']}{pct}".rjust(28))
+        lines.append(f"{route:<40}" + "".join(cells))
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сравнение двух прогонов бенчмарка")
+    parser.add_argument("before", help="JSON прогона до изменения")
+    parser.add_argument("after", help="JSON прогона после изменения")
+    parser.add_argument("--json", action="store_true", help="Вывести сравнение в JSON")
+    arguments = parser.parse_args()
+
+    with open(arguments.before, encoding="utf-8") as file:
+        before = json.load(file)
+    with open(arguments.after, encoding="utf-8") as file:
+        after = json.load(file)
+    result = compare(before, after)
+    print(json.dumps(result, ensure_ascii=False, indent=2) if arguments.json else _format(result))
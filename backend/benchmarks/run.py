@@ -0,0 +1,260 @@
+"""
+Нагрузочный прогон API по синтетическому каталогу (см. benchmarks.seed).
+
+Каждый маршрут из SCENARIOS прогоняется отдельно: --concurrency клиентов параллельно
+отправляют --requests запросов (после --warmup прогревочных). По маршруту считаются
+p50/p95/p99 и среднее время ответа, пропускная способность, число запросов к БД
+и размер ответа на запрос.
+Результат - JSON с коммитом, драйвером БД, размерами каталога и параметрами прогона,
+поэтому прогоны разных коммитов можно сравнить (python -m benchmarks.compare).
+
+По умолчанию приложение поднимается в этом же процессе (ASGI без сети), и запросы к БД
+считаются напрямую. С --url нагрузка идёт на запущенный сервер; тогда число запросов к БД
+берётся из заголовка Server-Timing, если сервер запущен с SQL_PROFILING=1 и SQL_PROFILING_DEBUG=1.
+
+Запуск из папки backend:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --url http://localhost:8000 --routes /components/{component_id}
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from service_collection.database import db, db_config, query_observers
+from service_collection.logging_config import logging_config
+from .seed import BENCH_SOURCE, apply_db_arguments, bench_component_condition, db_arguments
+import argparse
+import asyncio
+import httpx
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+
+# Параметры прогона по умолчанию
+run_config = {
+    "requests": 500,
+    "concurrency": 10,
+    "warmup": 20,
+    # Начальное значение генератора: одинаковая последовательность запросов во всех прогонах
+    "seed": 1
+}
+
+# Маршрут (как в метриках - шаблон пути) и функция, строящая адрес запроса по образцам из каталога
+SCENARIOS = [
+    ("/api/service", lambda samples, rnd: "/api/service"),
+    ("/api/service?limit", lambda samples, rnd: "/api/service?limit=50"),
+    ("/api/service?logo_size", lambda samples, rnd: "/api/service?logo_size=256"),
+    ("/api/services/{service_name}", lambda samples, rnd: "/api/services/" + rnd.choice(samples["services"])),
+    ("/api/categories", lambda samples, rnd: "/api/categories"),
+    ("/api/parameter-types", lambda samples, rnd: "/api/parameter-types"),
+    ("/components", lambda samples, rnd: "/components"),
+    ("/components?limit", lambda samples, rnd: "/components?limit=50"),
+    ("/components/{component_id}", lambda samples, rnd: f"/components/{rnd.choice(samples['components'])}"),
+    ("/components/functions/{component_id}", lambda samples, rnd: f"/components/functions/{rnd.choice(samples['components'])}"),
+    ("/components-types", lambda samples, rnd: "/components-types"),
+    ("/api/logos/{file_name}", lambda samples, rnd: "/api/logos/" + rnd.choice(samples["logos"])),
+    ("/api/logos/{file_name}?size", lambda samples, rnd: "/api/logos/" + rnd.choice(samples["logos"]) + "?size=128"),
+    ("/api/search", lambda samples, rnd: "/api/search?q=" + rnd.choice(["weather", "resource", "function", "arg_2", "bench"])),
+    ("/api/export", lambda samples, rnd: "/api/export")
+]
+
+# Запросы к БД текущего HTTP-запроса (только при прогоне в этом же процессе)
+_request_queries = ContextVar("bench_request_queries", default=None)
+
+_SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+def _observe_query(query, params, seconds):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+def percentile(sorted_values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def git_revision():
+    """Текущий коммит и признак незакоммиченных изменений."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+async def load_samples():
+    """Имена сервисов, id компонентов и логотипы синтетического каталога."""
+    async with db.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            await cursor.execute(
+                "SELECT name, logo FROM services.service WHERE api_source = %s ORDER BY id",
+                (BENCH_SOURCE,)
+            )
+            services = await cursor.fetchall()
+            await cursor.execute(f"SELECT id FROM components.components c WHERE {bench_component_condition('c')} ORDER BY id")
+            components = await cursor.fetchall()
+            await cursor.execute(f'''
+                SELECT
+                    (SELECT count(*) FROM services.service_points p
+                        JOIN services.service s ON s.id = p.service_id WHERE s.api_source = %(source)s) AS service_points,
+                    (SELECT count(*) FROM services.service_parameters sp
+                        JOIN services.service_points p ON p.id = sp.service_point_id
+                        JOIN services.service s ON s.id = p.service_id WHERE s.api_source = %(source)s) AS service_parameters,
+                    (SELECT count(*) FROM components.component_function f
+                        JOIN components.components c ON c.id = f.id_of_component WHERE {bench_component_condition('c')}) AS functions,
+                    (SELECT count(*) FROM components.component_function_parameter fp
+                        JOIN components.component_function f ON f.id = fp.id_of_component_function
+                        JOIN components.components c ON c.id = f.id_of_component WHERE {bench_component_condition('c')}) AS function_parameters
+            ''', {"source": BENCH_SOURCE})
+            counts = await cursor.fetchone()
+        finally:
+            await cursor.close()
+
+    if not services or not components:
+        raise SystemExit("Синтетический каталог пуст: сначала запустите python -m benchmarks.seed")
+    samples = {
+        "services": [row['name'] for row in services],
+        "logos": [row['logo'] for row in services],
+        "components": [row['id'] for row in components]
+    }
+    catalogue = {
+        "services": len(services),
+        "service_points": counts['service_points'],
+        "service_parameters": counts['service_parameters'],
+        "components": len(components),
+        "functions": counts['functions'],
+        "function_parameters": counts['function_parameters']
+    }
+    return samples, catalogue
+
+async def _send(client, path, in_process):
+    counter = [0]
+    token = _request_queries.set(counter)
+    started = time.perf_counter()
+    try:
+        response = await client.get(path)
+        # Тело читается целиком, чтобы потоковые ответы (экспорт) учитывались полностью
+        await response.aread()
+    finally:
+        _request_queries.reset(token)
+    elapsed = time.perf_counter() - started
+
+    if in_process:
+        queries = counter[0]
+    else:
+        match = _SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        queries = int(match.group(1)) if match else None
+    return elapsed, response.status_code, queries, len(response.content)
+
+async def run_scenario(client, paths, concurrency, in_process):
+    """Отправляет запросы по адресам paths не более чем concurrency одновременно."""
+    results = []
+    position = iter(paths)
+
+    async def worker():
+        for path in position:
+            results.append(await _send(client, path, in_process))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started
+
+def summarize(results, elapsed):
+    latencies = sorted(seconds * 1000 for seconds, _, _, _ in results)
+    errors = sum(1 for _, status, _, _ in results if status >= 400)
+    queries = [count for _, _, count, _ in results if count is not None]
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "throughput_rps": round(len(results) / elapsed, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "bytes_per_request": round(sum(size for _, _, _, size in results) / len(results))
+    }
+
+async def benchmark(arguments):
+    samples, catalogue = await load_samples()
+    scenarios = [
+        (route, build) for route, build in SCENARIOS
+        if not arguments.routes or route in arguments.routes
+    ]
+
+    in_process = arguments.url is None
+    if in_process:
+        # Логи приложения в прогоне только мешают: без LOG_LEVEL выводятся лишь предупреждения
+        if "LOG_LEVEL" not in os.environ:
+            logging_config["level"] = "WARNING"
+        from main import app
+        query_observers.append(_observe_query)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://benchmark"
+    else:
+        transport = None
+        base_url = arguments.url
+
+    limits = httpx.Limits(max_connections=arguments.concurrency, max_keepalive_connections=arguments.concurrency)
+    routes = {}
+    # Как браузер: уменьшенные копии логотипов приходят в WebP
+    headers = {"Accept": "image/webp,*/*"}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, headers=headers, timeout=60) as client:
+        for route, build in scenarios:
+            rnd = random.Random(f"{arguments.seed}:{route}")
+            warmup = [build(samples, rnd) for _ in range(arguments.warmup)]
+            paths = [build(samples, rnd) for _ in range(arguments.requests)]
+            await run_scenario(client, warmup, arguments.concurrency, in_process)
+            results, elapsed = await run_scenario(client, paths, arguments.concurrency, in_process)
+            routes[route] = summarize(results, elapsed)
+            print(f"{route:<40} p50 {routes[route]['p50_ms']:>9} ms  p95 {routes[route]['p95_ms']:>9} ms  "
+                  f"{routes[route]['throughput_rps']:>8} rps  queries {routes[route]['queries_per_request']}",
+                  file=sys.stderr)
+
+    if in_process:
+        query_observers.remove(_observe_query)
+        await db.close()
+
+    return {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "in-process" if in_process else arguments.url,
+        "driver": db_config["driver"],
+        "python": sys.version.split()[0],
+        "catalogue": catalogue,
+        "run": {
+            "requests": arguments.requests,
+            "concurrency": arguments.concurrency,
+            "warmup": arguments.warmup,
+            "seed": arguments.seed
+        },
+        "routes": routes
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API по синтетическому каталогу")
+    parser.add_argument("--requests", type=int, default=run_config["requests"], help="Запросов на маршрут")
+    parser.add_argument("--concurrency", type=int, default=run_config["concurrency"], help="Одновременных клиентов")
+    parser.add_argument("--warmup", type=int, default=run_config["warmup"], help="Прогревочных запросов на маршрут")
+    parser.add_argument("--seed", type=int, default=run_config["seed"])
+    parser.add_argument("--routes", nargs="*", help="Прогнать только эти маршруты (шаблоны из SCENARIOS)")
+    parser.add_argument("--url", help="Адрес запущенного сервера; по умолчанию приложение поднимается в процессе")
+    parser.add_argument("--output", help="Файл для JSON с результатом; по умолчанию stdout")
+    db_arguments(parser)
+    arguments = parser.parse_args()
+    apply_db_arguments(arguments)
+
+    result = asyncio.run(benchmark(arguments))
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,252 @@
+"""
+Синтетический каталог для бенчмарков: N сервисов × M точек обслуживания × K параметров,
+C компонентов × F функций × P параметров и логотипы-PNG с уменьшенными копиями.
+Различных картинок несколько на все сервисы, как одинаковые логотипы вендоров
+(хранятся по хэшу, один файл на картинку). Данные вставляются в существующие схемы
+services и components (схема должна быть создана, миграции применены) наборными
+запросами через generate_series, поэтому заполнение быстрое и при одинаковых размерах
+всегда даёт одинаковый каталог.
+
+Все синтетические записи помечены: у сервисов api_source = 'bench' и имя на BENCH_PREFIX,
+у компонентов имя BENCH_PREFIX + шесть цифр и описание с тем же номером
+(bench_component_condition). Повторный запуск сначала удаляет прежний каталог;
+настоящие сервисы и компоненты с именем на BENCH_PREFIX не затрагиваются.
+
+Запуск из папки backend:
+    python -m benchmarks.seed --services 200 --points 5 --service-parameters 4 \\
+        --components 200 --functions 5 --function-parameters 4
+    python -m benchmarks.seed --clear
+"""
+from service_collection.database import db, db_config
+from service_collection.components_routes import delete_components
+from service_collection.logging_config import setup_logging
+from service_collection.logo_storage import release_logos
+from service_collection.logos import LOGOS_DIR
+from service_collection.services_routes import delete_services
+from service_collection.thumbnails import generate_thumbnails
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import zlib
+
+logger = logging.getLogger(__name__)
+
+BENCH_PREFIX = "bench-"
+BENCH_SOURCE = "bench"
+BENCH_CATEGORY = "Benchmark"
+BENCH_COMPONENT_DESCRIPTION = "Synthetic benchmark component number "
+
+# Размеры каталога по умолчанию
+seed_config = {
+    "services": 200,
+    "points": 5,
+    "service_parameters": 4,
+    "components": 200,
+    "functions": 5,
+    "function_parameters": 4,
+    # Сколько различных картинок на все сервисы
+    "logos": 50,
+    # Сторона квадратного логотипа в пикселях
+    "logo_size": 64
+}
+
+def db_arguments(parser):
+    """Параметры подключения к базе бенчмарка; по умолчанию - настройки приложения."""
+    parser.add_argument("--db-host")
+    parser.add_argument("--db-port")
+    parser.add_argument("--db-user")
+    parser.add_argument("--db-password")
+    parser.add_argument("--db-name")
+
+def apply_db_arguments(arguments):
+    for key in ("host", "port", "user", "password", "name"):
+        value = getattr(arguments, f"db_{key}")
+        if value is not None:
+            db_config["db_name" if key == "name" else key] = value
+
+def bench_component_condition(alias):
+    """
+    Условие SQL на синтетические компоненты таблицы с псевдонимом alias: имя и описание
+    ровно в том виде, в каком их создаёт seed_catalogue.
+    """
+    return (
+        f"{alias}.name ~ '^{BENCH_PREFIX}[0-9]{{6}}$' AND "
+        f"{alias}.description = '{BENCH_COMPONENT_DESCRIPTION}' || substr({alias}.name, {len(BENCH_PREFIX) + 1})::int"
+    )
+
+def png_logo(size, index):
+    """Однотонный PNG size×size; цвет зависит от номера, чтобы файлы различались."""
+    color = bytes(((index * 67) % 256, (index * 131) % 256, (index * 197) % 256))
+    raw = b"".join(b"\x00" + color * size for _ in range(size))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+async def clear_catalogue(connection):
+    """Удаляет синтетический каталог и его логотипы. Возвращает число удалённых сервисов и компонентов."""
+    cursor = connection.cursor()
+    try:
+        await cursor.execute(
+            "SELECT name FROM services.service WHERE api_source = %s AND name LIKE %s",
+            (BENCH_SOURCE, BENCH_PREFIX + "%")
+        )
+        service_names = [row['name'] for row in await cursor.fetchall()]
+        deleted_services = await delete_services(cursor, service_names) if service_names else []
+
+        await cursor.execute(f"SELECT id FROM components.components c WHERE {bench_component_condition('c')}")
+        component_ids = [row['id'] for row in await cursor.fetchall()]
+        deleted_components = await delete_components(cursor, component_ids) if component_ids else []
+        await connection.commit()
+        # Логотипы, на которые больше никто не ссылается, удаляются сразу, без отсрочки сборки мусора
+        await release_logos(cursor, [row['logo'] for row in deleted_services], grace_seconds=0)
+    except Exception:
+        await connection.rollback()
+        raise
+    finally:
+        await cursor.close()
+    return {"services": len(deleted_services), "components": len(deleted_components)}
+
+async def seed_catalogue(connection, config):
+    """
+    Заполняет каталог по размерам из config (ключи как в seed_config).
+    Возвращает число созданных записей каждого вида.
+    """
+    await clear_catalogue(connection)
+
+    # Картинки и их имена по хэшу; сервис i получает картинку i по кругу
+    images = [png_logo(config["logo_size"], index) for index in range(max(1, config["logos"]))]
+    logo_names = [hashlib.sha256(image).hexdigest() + ".png" for image in images]
+    service_logos = [logo_names[index % len(logo_names)] for index in range(config["services"])]
+
+    cursor = connection.cursor()
+    try:
+        await cursor.execute("SELECT id FROM services.service_categories WHERE name = %s", (BENCH_CATEGORY,))
+        category = await cursor.fetchone()
+        if category is None:
+            await cursor.execute(
+                "INSERT INTO services.service_categories (name) VALUES (%s) RETURNING id",
+                (BENCH_CATEGORY,)
+            )
+            category = await cursor.fetchone()
+
+        await cursor.execute('''
+            INSERT INTO services.service (uri, token, name, category_id, logo, description, api_source)
+            SELECT 'https://' || %(prefix)s || i || '.example.com', 'no',
+                %(prefix)s || lpad(i::text, 6, '0'), %(category)s,
+                (%(logos)s::text[])[i],
+                'Synthetic benchmark service number ' || i || ' with weather and maps data', %(source)s
+            FROM generate_series(1, %(services)s) AS i
+        ''', {
+            "prefix": BENCH_PREFIX, "category": category['id'], "source": BENCH_SOURCE,
+            "services": config["services"], "logos": service_logos
+        })
+
+        await cursor.execute('''
+            INSERT INTO services.service_points (service_id, uri, description)
+            SELECT s.id, '/v1/resource-' || j, 'Endpoint ' || j || ' of ' || s.name
+            FROM services.service s CROSS JOIN generate_series(1, %(points)s) AS j
+            WHERE s.api_source = %(source)s
+            ORDER BY s.id, j
+        ''', {"points": config["points"], "source": BENCH_SOURCE})
+
+        await cursor.execute('''
+            WITH types AS (SELECT array_agg(id ORDER BY id) AS ids FROM components.type)
+            INSERT INTO services.service_parameters (service_point_id, name, description, required, type_id)
+            SELECT p.id, 'param_' || k, 'Parameter ' || k, k = 1,
+                types.ids[1 + k %% array_length(types.ids, 1)]
+            FROM services.service_points p
+            JOIN services.service s ON s.id = p.service_id
+            CROSS JOIN generate_series(1, %(parameters)s) AS k
+            CROSS JOIN types
+            WHERE s.api_source = %(source)s
+            ORDER BY p.id, k
+        ''', {"parameters": config["service_parameters"], "source": BENCH_SOURCE})
+
+        await cursor.execute('''
+            INSERT INTO components.components (name, description)
+            SELECT %(prefix)s || lpad(i::text, 6, '0'), %(description)s || i
+            FROM generate_series(1, %(components)s) AS i
+        ''', {"prefix": BENCH_PREFIX, "description": BENCH_COMPONENT_DESCRIPTION, "components": config["components"]})
+
+        await cursor.execute(f'''
+            INSERT INTO components.component_function (id_of_component, name)
+            SELECT c.id, 'function_' || j
+            FROM components.components c CROSS JOIN generate_series(1, %(functions)s) AS j
+            WHERE {bench_component_condition('c')}
+            ORDER BY c.id, j
+        ''', {"functions": config["functions"]})
+
+        await cursor.execute(f'''
+            WITH types AS (SELECT array_agg(id ORDER BY id) AS ids FROM components.type)
+            INSERT INTO components.component_function_parameter
+                (id_of_component_function, name, description, id_type, "position in signature",
+                 "is multiple values", "is return value", "default", path)
+            SELECT f.id, 'arg_' || k, 'Argument ' || k, types.ids[1 + k %% array_length(types.ids, 1)], k,
+                false, k = %(parameters)s, NULL, '/' || f.name || '/arg_' || k
+            FROM components.component_function f
+            JOIN components.components c ON c.id = f.id_of_component
+            CROSS JOIN generate_series(1, %(parameters)s) AS k
+            CROSS JOIN types
+            WHERE {bench_component_condition('c')}
+            ORDER BY f.id, k
+        ''', {"parameters": config["function_parameters"]})
+
+        await connection.commit()
+    except Exception:
+        await connection.rollback()
+        raise
+    finally:
+        await cursor.close()
+
+    os.makedirs(LOGOS_DIR, exist_ok=True)
+    for image, file_name in zip(images, logo_names):
+        path = os.path.join(LOGOS_DIR, file_name)
+        with open(path, "wb") as file:
+            file.write(image)
+        # Уменьшенные копии, как при загрузке через API (без Pillow не создаются)
+        generate_thumbnails(path)
+
+    return {
+        "services": config["services"],
+        "service_points": config["services"] * config["points"],
+        "service_parameters": config["services"] * config["points"] * config["service_parameters"],
+        "components": config["components"],
+        "functions": config["components"] * config["functions"],
+        "function_parameters": config["components"] * config["functions"] * config["function_parameters"],
+        "logos": len(set(service_logos))
+    }
+
+async def _main(arguments):
+    try:
+        async with db.connection() as connection:
+            if arguments.clear:
+                deleted = await clear_catalogue(connection)
+                logger.info("Удалён синтетический каталог: сервисов %s, компонентов %s.", deleted["services"], deleted["components"])
+            else:
+                config = {key: getattr(arguments, key) for key in seed_config}
+                created = await seed_catalogue(connection, config)
+                logger.info("Создан синтетический каталог: %s", created)
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Синтетический каталог для бенчмарков")
+    for key, value in seed_config.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=int, default=value)
+    parser.add_argument("--clear", action="store_true", help="Только удалить синтетический каталог")
+    db_arguments(parser)
+    arguments = parser.parse_args()
+    apply_db_arguments(arguments)
+    setup_logging()
+    asyncio.run(_main(arguments))
@@ -1,10 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from service_collection.logging_config import RequestIdMiddleware, setup_logging
+from service_collection.database import db
+from service_collection.type_registry import type_registry
 from service_collection.services_routes import collection_route
 from service_collection.services_auth_routes import collection_auth_route
 from service_collection.components_routes import components_route
-app = FastAPI()
+from service_collection.logos import LogoUploadLimitMiddleware, logos_route
+from service_collection.export_routes import export_route
+from service_collection.openapi_import import openapi_route
+from service_collection.response_cache import cache_route
+from service_collection.search_routes import search_route
+from service_collection.metrics import MetricsMiddleware, metrics_route
+from service_collection import profiling
+import logging
+
+# Логирование настраивается один раз, до создания приложения
+setup_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Справочник типов загружаем заранее; если база недоступна, он загрузится при первом обращении
+    try:
+        await type_registry.load()
+    except Exception as e:
+        logger.warning("Не удалось загрузить справочник типов: %s", e)
+    yield
+    # Закрываем все соединения пула при остановке приложения
+    await db.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Слишком большие загрузки логотипов отклоняются до разбора тела запроса
+app.add_middleware(LogoUploadLimitMiddleware)
+# Метрики Prometheus по каждому запросу; отдаются маршрутом /metrics
+app.add_middleware(MetricsMiddleware)
+# Профилирование SQL по запросам - только при SQL_PROFILING=1
+profiling.install(app)
+# Идентификатор запроса для логов - добавляется последним, чтобы охватить все остальные middleware
+app.add_middleware(RequestIdMiddleware)
 
 # Подключаем маршруты
 app.include_router(collection_route)
 app.include_router(collection_auth_route)
-app.include_router(components_route)
\ No newline at end of file
+app.include_router(components_route)
+app.include_router(logos_route)
+app.include_router(export_route)
+app.include_router(openapi_route)
+app.include_router(cache_route)
+app.include_router(search_route)
+app.include_router(metrics_route)
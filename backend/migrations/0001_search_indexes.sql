@@ -0,0 +1,49 @@
+-- Индексы для /api/search: полнотекстовый поиск (tsvector + GIN) и нечёткий поиск
+-- по подстроке (pg_trgm). Индексы построены по выражениям, поэтому отдельных колонок
+-- и триггеров не нужно: Postgres обновляет их сам при каждой вставке и изменении строки.
+-- Выражения должны совпадать с выражениями в service_collection/search_routes.py.
+--
+-- Применяется вместе с остальными миграциями (из папки backend):
+--     python -m service_collection.migrations up
+-- Нужно расширение pg_trgm из пакета contrib (например, postgresql-contrib); без него
+-- миграция останавливается с сообщением, что поставить, и последующие не применяются.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        RAISE EXCEPTION 'Расширение pg_trgm недоступно на сервере PostgreSQL'
+            USING HINT = 'Установите пакет contrib (например, postgresql-contrib) и повторите python -m service_collection.migrations up';
+    END IF;
+END
+$$;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Название и описание сервисов и компонентов - полнотекстовый поиск
+CREATE INDEX IF NOT EXISTS service_search_tsv_idx ON services.service
+    USING gin (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')));
+
+CREATE INDEX IF NOT EXISTS components_search_tsv_idx ON components.components
+    USING gin (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')));
+
+-- Имена, адреса и пути - триграммы (оператор % и ILIKE '%...%')
+CREATE INDEX IF NOT EXISTS service_name_trgm_idx ON services.service
+    USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS service_points_uri_trgm_idx ON services.service_points
+    USING gin (uri gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS service_parameters_name_trgm_idx ON services.service_parameters
+    USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS components_name_trgm_idx ON components.components
+    USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS component_function_name_trgm_idx ON components.component_function
+    USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS component_function_parameter_name_trgm_idx ON components.component_function_parameter
+    USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS component_function_parameter_path_trgm_idx ON components.component_function_parameter
+    USING gin (path gin_trgm_ops);
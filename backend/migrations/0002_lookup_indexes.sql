@@ -0,0 +1,20 @@
+-- Индексы под выборки маршрутов: точки и параметры сервиса, функции и параметры компонента
+-- (загрузчики fetch_service_points / fetch_component_functions, удаление по родителю) и
+-- фильтр списка сервисов по категории. Второй колонкой идёт id - в этом порядке строки
+-- отдаются в ответ, поэтому сортировка не нужна.
+-- В INCLUDE только короткие колонки: описания и адреса могут не поместиться в строку индекса.
+
+CREATE INDEX IF NOT EXISTS service_points_service_id_idx ON services.service_points
+    (service_id, id);
+
+CREATE INDEX IF NOT EXISTS service_parameters_service_point_id_idx ON services.service_parameters
+    (service_point_id, id) INCLUDE (required, type_id);
+
+CREATE INDEX IF NOT EXISTS service_category_id_idx ON services.service
+    (category_id, id);
+
+CREATE INDEX IF NOT EXISTS component_function_id_of_component_idx ON components.component_function
+    (id_of_component, id) INCLUDE (name);
+
+CREATE INDEX IF NOT EXISTS component_function_parameter_function_idx ON components.component_function_parameter
+    (id_of_component_function, id) INCLUDE (id_type);
@@ -0,0 +1,64 @@
+-- Уникальность названий сервисов и типов и каскадное удаление дочерних строк.
+-- Маршруты ищут сервис по name и тип по type, поэтому дубликаты делают ответы неоднозначными;
+-- если они уже есть, миграция останавливается со списком дубликатов - их нужно разобрать вручную.
+
+DO $$
+DECLARE
+    duplicates text;
+BEGIN
+    SELECT string_agg(quote_literal(name), ', ') INTO duplicates
+    FROM (SELECT name FROM services.service GROUP BY name HAVING count(*) > 1) AS d;
+    IF duplicates IS NOT NULL THEN
+        RAISE EXCEPTION 'Повторяющиеся названия сервисов: %', duplicates;
+    END IF;
+
+    SELECT string_agg(quote_literal("type"), ', ') INTO duplicates
+    FROM (SELECT "type" FROM components."type" GROUP BY "type" HAVING count(*) > 1) AS d;
+    IF duplicates IS NOT NULL THEN
+        RAISE EXCEPTION 'Повторяющиеся названия типов: %', duplicates;
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'service_name_key'
+                   AND conrelid = 'services.service'::regclass) THEN
+        ALTER TABLE services.service ADD CONSTRAINT service_name_key UNIQUE (name);
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'type_type_key'
+                   AND conrelid = 'components."type"'::regclass) THEN
+        ALTER TABLE components."type" ADD CONSTRAINT type_type_key UNIQUE ("type");
+    END IF;
+END $$;
+
+-- Заменяет внешние ключи по колонке (какими бы они ни были в конкретной базе)
+-- одним ключом с ON DELETE CASCADE
+CREATE FUNCTION pg_temp.replace_foreign_key(child regclass, child_column name, parent regclass, constraint_name name)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    existing name;
+BEGIN
+    FOR existing IN
+        SELECT c.conname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+        WHERE c.contype = 'f' AND c.conrelid = child AND a.attname = child_column
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', child, existing);
+    END LOOP;
+    EXECUTE format(
+        'ALTER TABLE %s ADD CONSTRAINT %I FOREIGN KEY (%I) REFERENCES %s (id) ON DELETE CASCADE',
+        child, constraint_name, child_column, parent
+    );
+END $$;
+
+SELECT pg_temp.replace_foreign_key('services.service_points', 'service_id',
+                                   'services.service', 'service_points_service_id_fkey');
+SELECT pg_temp.replace_foreign_key('services.service_parameters', 'service_point_id',
+                                   'services.service_points', 'service_parameters_service_point_id_fkey');
+SELECT pg_temp.replace_foreign_key('components.component_function', 'id_of_component',
+                                   'components.components', 'component_function_id_of_component_fkey');
+SELECT pg_temp.replace_foreign_key('components.component_function_parameter', 'id_of_component_function',
+                                   'components.component_function', 'component_function_parameter_id_of_component_function_fkey');
+
+DROP FUNCTION pg_temp.replace_foreign_key(regclass, name, regclass, name);
@@ -0,0 +1,9 @@
+-- Логотипы хранятся по хэшу содержимого (service_collection.logo_storage). Сервис без своей
+-- картинки хранит NULL вместо 'default.jpg': логотип по умолчанию подставляет приложение.
+-- Индекс по logo - для проверки, ссылается ли ещё кто-то на файл, перед его удалением.
+
+ALTER TABLE services.service ALTER COLUMN logo DROP NOT NULL;
+
+UPDATE services.service SET logo = NULL WHERE logo = 'default.jpg';
+
+CREATE INDEX IF NOT EXISTS service_logo_idx ON services.service (logo);
@@ -1,13 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from .database import db  
+from .database import db, execute_values
+from .etags import etag_headers, not_modified, rows_etag
+from .pagination import MAX_PAGE_SIZE, decode_cursor, like_prefix, page_headers, parse_fields
+from .parameter_diff import plan_parameter_changes
+from .response_cache import component_entity, invalidate_component, response_cache
+from .type_registry import type_registry
+import logging
 
 components_route = APIRouter()
-
-def get_db():
-    return db.get_connection()
+logger = logging.getLogger(__name__)
+
+# Поля списка компонентов, доступные в параметре fields
+COMPONENT_FIELDS = ["id", "name", "description"]
+
+# Версии строк функций и параметров компонента - для ETag без построения ответа
+FUNCTIONS_VERSION_SQL = '''
+    coalesce((
+        SELECT string_agg(f.id || ':' || f.xmin::text, ',' ORDER BY f.id)
+        FROM components.component_function f
+        WHERE f.id_of_component = %s
+    ), '') || '|' || coalesce((
+        SELECT string_agg(p.id || ':' || p.xmin::text, ',' ORDER BY p.id)
+        FROM components.component_function_parameter p
+        JOIN components.component_function f ON f.id = p.id_of_component_function
+        WHERE f.id_of_component = %s
+    ), '')
+'''
+
+# Версия компонента вместе с функциями и параметрами; строки нет, если нет компонента
+COMPONENT_VERSION_QUERY = f'''
+    SELECT c.xmin::text || '|' || {FUNCTIONS_VERSION_SQL}
+    FROM components.components c
+    WHERE c.id = %s
+'''
+
+FUNCTIONS_VERSION_QUERY = f"SELECT {FUNCTIONS_VERSION_SQL}"
+
+async def get_db():
+    # Соединение берётся из пула на время запроса и возвращается после ответа
+    async with db.connection() as connection:
+        yield connection
 
 # Модель для создания компонента
 class ComponentCreate(BaseModel):
@@ -34,33 +70,202 @@ class Function(BaseModel):
     name: str = Field(..., example="my_function")
     parameters: List[Parameter] = Field(...)
 
+class FunctionUpdate(Function):
+    # Параметры, которых нет в parameters, не меняются; удаляются только перечисленные здесь
+    removed_ids: List[int] = Field(default_factory=list, example=[4])
+
+class ComponentIds(BaseModel):
+    ids: List[int] = Field(..., example=[1, 2, 3])
+
 class ComponentDetail(BaseModel):
     componentId: int
     componentName: str
     componentDescription: Optional[str]
     functions: Optional[List[Function]]
 
+# Колонки параметра функции в порядке, в котором их принимают parameter_values и шаблоны VALUES
+PARAMETER_COLUMNS = 'name, description, id_type, "position in signature", "is multiple values", "is return value", "default", path'
+
+def parameter_values(parameter: Parameter, type_id):
+    return (
+        parameter.name,
+        parameter.description,
+        type_id,
+        parameter.position_in_signature,
+        parameter.is_multiple_values,
+        parameter.is_return_value,
+        parameter.default,
+        parameter.path
+    )
+
+def stored_parameter_values(row):
+    return (
+        row['name'],
+        row['description'],
+        row['id_type'],
+        row['position in signature'],
+        row['is multiple values'],
+        row['is return value'],
+        row['default'],
+        row['path']
+    )
+
+def parameter_from_row(row, type_names):
+    return Parameter(
+        id=row['id'],
+        name=row['name'],
+        description=row['description'],
+        param_type=type_names[row['id_type']],
+        position_in_signature=row['position in signature'],
+        is_multiple_values=row['is multiple values'],
+        is_return_value=row['is return value'],
+        default=row['default'],
+        path=row['path']
+    )
+
+async def fetch_component_functions(cursor, component_ids):
+    """
+    Загружает функции компонентов вместе с параметрами одним запросом; названия типов
+    берутся из справочника типов.
+    Возвращает словарь {id компонента: [Function, ...]}; компонентов без функций в нём нет.
+    """
+    functions_query = '''
+        SELECT f.id_of_component, f.id AS function_id, f.name AS function_name,
+            p.id, p.name, p.description, p.id_type, p."position in signature",
+            p."is multiple values", p."is return value", p."default", p.path
+        FROM components.component_function f
+        LEFT JOIN components.component_function_parameter p ON p.id_of_component_function = f.id
+        WHERE f.id_of_component = ANY(%s)
+        ORDER BY f.id, p.id
+    '''
+    await cursor.execute(functions_query, (list(component_ids),))
+    rows = await cursor.fetchall()
+    type_names = await type_registry.type_names((row['id_type'] for row in rows), cursor)
+
+    functions_by_component = {}
+    functions = {}
+    for row in rows:
+        function = functions.get(row['function_id'])
+        if function is None:
+            function = Function(id=row['function_id'], name=row['function_name'], parameters=[])
+            functions[row['function_id']] = function
+            functions_by_component.setdefault(row['id_of_component'], []).append(function)
+
+        # У функции без параметров LEFT JOIN даёт одну строку с пустыми полями параметра
+        if row['id'] is None:
+            continue
+        if row['id_type'] is None:
+            raise HTTPException(status_code=500, detail="id_type is required for parameter")
+        if row['id_type'] not in type_names:
+            raise HTTPException(status_code=500, detail="Type not found for id_type")
+
+        function.parameters.append(parameter_from_row(row, type_names))
+    return functions_by_component
+
 #TODO ACCEPTED
+async def delete_components(cursor, component_ids):
+    """
+    Удаляет компоненты вместе с функциями и параметрами одним запросом, сколько бы их ни было.
+    Возвращает строки id, functions, parameters (число удалённых функций и параметров)
+    только для существовавших компонентов.
+    """
+    await cursor.execute('''
+        WITH functions AS (
+            SELECT id, id_of_component FROM components.component_function
+            WHERE id_of_component = ANY(%s)
+        ), deleted_parameters AS (
+            DELETE FROM components.component_function_parameter
+            WHERE id_of_component_function IN (SELECT id FROM functions)
+            RETURNING id_of_component_function
+        ), deleted_functions AS (
+            DELETE FROM components.component_function
+            WHERE id IN (SELECT id FROM functions)
+            RETURNING id, id_of_component
+        ), deleted_components AS (
+            DELETE FROM components.components
+            WHERE id = ANY(%s)
+            RETURNING id
+        )
+        SELECT c.id,
+            (SELECT count(*) FROM deleted_functions f WHERE f.id_of_component = c.id) AS functions,
+            (SELECT count(*) FROM deleted_parameters p
+                JOIN functions f ON f.id = p.id_of_component_function
+                WHERE f.id_of_component = c.id) AS parameters
+        FROM deleted_components c
+        ORDER BY c.id
+    ''', (list(component_ids), list(component_ids)))
+    return await cursor.fetchall()
+
 @components_route.get("/components", response_model=List[Component], tags=["Коллекция компонентов"])
-async def get_components(db_connection=Depends(get_db)):
+async def get_components(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    name_prefix: Optional[str] = None,
+    fields: Optional[str] = None,
+    db_connection=Depends(get_db)
+):
     """
-    Получение списка всех компонентов из базы данных.
+    Получение списка компонентов из базы данных.
+    Без limit возвращается весь список; при limit токен следующей страницы
+    приходит в заголовке X-Next-Cursor и передаётся обратно в параметре cursor.
+    fields=id,name позволяет не загружать описание.
     """
+    after_id = decode_cursor(page_cursor)
+    requested_fields = parse_fields(fields, COMPONENT_FIELDS)
+    columns = COMPONENT_FIELDS if requested_fields is None else [
+        field for field in COMPONENT_FIELDS if field == "id" or field in requested_fields
+    ]
+
+    conditions = []
+    params = []
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    if name_prefix:
+        conditions.append("name LIKE %s")
+        params.append(like_prefix(name_prefix))
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    limit_clause = ""
+    if limit is not None:
+        # Одна лишняя строка показывает, есть ли следующая страница
+        limit_clause = "LIMIT %s"
+        params.append(limit + 1)
+
     cursor = None
     try:
         cursor = db_connection.cursor() 
-        cursor.execute("SELECT id, name, description FROM components.components")
-        components = cursor.fetchall() 
+        etag = await rows_etag(cursor, f"""
+            SELECT coalesce(string_agg(id || ':' || xmin::text, ',' ORDER BY id), '')
+            FROM (SELECT id, xmin FROM components.components {where} ORDER BY id {limit_clause}) AS page
+        """, params)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+
+        query = f"""
+            SELECT {", ".join(columns)} FROM components.components
+            {where}
+            ORDER BY id
+            {limit_clause}
+        """
+        await cursor.execute(query, params)
+        components = await cursor.fetchall() 
+        headers = {**page_headers(request, components, limit), **etag_headers(etag)}
+        if limit is not None:
+            components = components[:limit]
+
         result = [
-            {"id": component[0], "name": component[1], "description": component[2]}
+            {field: component[field] for field in (requested_fields or COMPONENT_FIELDS)}
             for component in components
         ]
-        return result
+        return JSONResponse(content=result, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 #TODO ACCEPTED
 @components_route.post("/components", response_model=Component, tags=["Коллекция компонентов"])
@@ -71,18 +276,18 @@ async def create_component(component: ComponentCreate, db_connection=Depends(get
     cursor = None
     try:
         cursor = db_connection.cursor()
-        cursor.execute(
+        await cursor.execute(
             "INSERT INTO components.components (name, description) VALUES (%s, %s) RETURNING id",
             (component.name, component.description)
         )
-        new_id = cursor.fetchone()[0]
-        db_connection.commit()
+        new_id = (await cursor.fetchone())[0]
+        await db_connection.commit()
         return Component(id=new_id, name=component.name, description=component.description)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 #TODO ACCEPTED
 @components_route.put("/components/{component_id}", response_model=Component, tags=["Коллекция компонентов"])
@@ -93,104 +298,69 @@ async def update_component(component_id: int, component: ComponentCreate, db_con
     cursor = None
     try:
         cursor = db_connection.cursor()
-        cursor.execute(
+        await cursor.execute(
             "UPDATE components.components SET name = %s, description = %s WHERE id = %s",
             (component.name, component.description, component_id)
         )
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Component not found")
-        db_connection.commit()
+        await db_connection.commit()
+        await invalidate_component(component_id)
         
         return Component(id=component_id, name=component.name, description=component.description)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 #TODO ACCEPTED        
 @components_route.get("/components/{component_id}", response_model=ComponentDetail, tags=["Коллекция компонентов"])
-async def get_component(component_id: int, db_connection=Depends(get_db)):
+async def get_component(component_id: int, request: Request, response: Response, db_connection=Depends(get_db)):
     """
     Получение компонента со всеми связанными данными по id
     """
     cursor = None
     try:
         cursor = db_connection.cursor()
+        await type_registry.refresh_if_stale(cursor)
+        etag = await rows_etag(cursor, COMPONENT_VERSION_QUERY, (component_id, component_id, component_id), type_registry.etag)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        response.headers.update(etag_headers(etag))
+
+        cached, version = await response_cache.get("get_component", component_entity(component_id))
+        if cached is not None:
+            return cached
+
         component_query = '''
             SELECT id, name, description 
             FROM components.components 
             WHERE id = %s
         '''
-        cursor.execute(component_query, (component_id,))
-        component_info = cursor.fetchone()
+        await cursor.execute(component_query, (component_id,))
+        component_info = await cursor.fetchone()
 
         if component_info is None:
             raise HTTPException(status_code=404, detail="Компонент не найден")
 
-        functions_query = '''
-            SELECT id, name 
-            FROM components.component_function 
-            WHERE id_of_component = %s
-        '''
-        cursor.execute(functions_query, (component_id,))
-        functions = cursor.fetchall()
-
-        functions_with_parameters = []
-        for function in functions:
-            parameters_query = '''
-                SELECT id, name, description, id_type, "position in signature", 
-                    "is multiple values", "is return value", "default", path 
-                FROM components.component_function_parameter 
-                WHERE id_of_component_function = %s
-            '''
-            cursor.execute(parameters_query, (function['id'],))
-            parameters = cursor.fetchall()
-            
-            parameters_list = []
-            for param in parameters:
-                if 'id_type' not in param or param['id_type'] is None:
-                    raise HTTPException(status_code=500, detail="id_type is required for parameter")
-                
-                type_query = '''
-                    SELECT "type" FROM components."type" WHERE id = %s
-                '''
-                cursor.execute(type_query, (param['id_type'],))
-                type_info = cursor.fetchone()
-
-                if type_info is None:
-                    raise HTTPException(status_code=500, detail="Type not found for id_type")
-
-                parameters_list.append(Parameter(
-                    id=param['id'],
-                    name=param['name'],
-                    description=param['description'],
-                    param_type=type_info['type'],
-                    position_in_signature=param['position in signature'],
-                    is_multiple_values=param['is multiple values'],
-                    is_return_value=param['is return value'],
-                    default=param['default'],
-                    path=param['path']
-                ))
-            
-            functions_with_parameters.append(Function(
-                id=function['id'],
-                name=function['name'],
-                parameters=parameters_list
-            ))
+        functions_by_component = await fetch_component_functions(cursor, [component_id])
 
-        return ComponentDetail(
+        detail = jsonable_encoder(ComponentDetail(
             componentId=component_info['id'],
             componentName=component_info['name'],
             componentDescription=component_info['description'],
-            functions=functions_with_parameters
-        )
+            functions=functions_by_component.get(component_id, [])
+        ))
+        await response_cache.set("get_component", component_entity(component_id), version, detail)
+        return detail
     except Exception as err:
-        print(f"Error executing query: {err}")
+        logger.error("Error executing query: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
             
 @components_route.post("/components/{component_id}/functions", tags=["Коллекция компонентов"])
 async def add_component_function(component_id: int, function_data: Function, db=Depends(get_db)):
@@ -205,39 +375,36 @@ async def add_component_function(component_id: int, function_data: Function, db=
         function_name = function_data.name
         parameters = function_data.parameters
 
-        print(f"Received request to add function '{function_name}' for component ID '{component_id}'.")
+        logger.debug("Received request to add function '%s' for component ID '%s'.", function_name, component_id)
 
         component_query = 'SELECT id FROM components.components WHERE id = %s'
-        cursor.execute(component_query, (component_id,))
-        component_info = cursor.fetchone()
+        await cursor.execute(component_query, (component_id,))
+        component_info = await cursor.fetchone()
 
         if component_info is None:
             raise HTTPException(status_code=404, detail="Компонент не найден")
 
         insert_function_query = 'INSERT INTO components.component_function (id_of_component, name) VALUES (%s, %s) RETURNING id'
-        cursor.execute(insert_function_query, (component_id, function_name))
-        function_id = cursor.fetchone()['id']
-        print(f"Inserted function with ID: {function_id}.")
+        await cursor.execute(insert_function_query, (component_id, function_name))
+        function_id = (await cursor.fetchone())['id']
+        logger.info("Inserted function %s with ID: %s.", function_name, function_id)
 
+        type_ids = await type_registry.type_ids((parameter.param_type for parameter in parameters), cursor)
         parameter_ids = {}
         for parameter in parameters:
-            type_query = 'SELECT id FROM components.type WHERE type = %s'
-            cursor.execute(type_query, (parameter.param_type,))
-            type_id = cursor.fetchone()
-
-            if type_id is None:
+            if parameter.param_type not in type_ids:
                 raise HTTPException(status_code=404, detail=f"Type '{parameter.param_type}' not found")
 
-            parameter_ids[parameter.name] = type_id['id']
+            parameter_ids[parameter.name] = type_ids[parameter.param_type]
 
         insert_parameter_query = '''
             INSERT INTO components.component_function_parameter (id_of_component_function, id_type, name, description, "position in signature", "is multiple values", "is return value", "default", path) 
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         '''
         for parameter in parameters:
-            print(f"Inserting parameter: {parameter.name} with type id '{parameter_ids[parameter.name]}'.")
+            logger.debug("Inserting parameter: %s with type id '%s'.", parameter.name, parameter_ids[parameter.name])
 
-            cursor.execute(insert_parameter_query, (
+            await cursor.execute(insert_parameter_query, (
                 function_id,
                 parameter_ids[parameter.name], 
                 parameter.name,
@@ -248,95 +415,39 @@ async def add_component_function(component_id: int, function_data: Function, db=
                 parameter.default,
                 parameter.path
             ))
-            print(f"Inserted parameter '{parameter.name}'.")
+            logger.debug("Inserted parameter '%s'.", parameter.name)
 
-        connection.commit()
+        await connection.commit()
+        await invalidate_component(component_id)
 
-        functions_with_parameters = []
-        
-        functions_query = '''
-            SELECT id, name 
-            FROM components.component_function 
-            WHERE id_of_component = %s
-        '''
-        cursor.execute(functions_query, (component_id,))
-        functions = cursor.fetchall()
-
-        for function in functions:
-            parameters_query = '''
-                SELECT id, name, description, id_type, "position in signature", 
-                    "is multiple values", "is return value", "default", path 
-                FROM components.component_function_parameter 
-                WHERE id_of_component_function = %s
-            '''
-            cursor.execute(parameters_query, (function['id'],))
-            parameters = cursor.fetchall()
-            
-            parameters_list = []
-            for param in parameters:
-                if 'id_type' not in param or param['id_type'] is None:
-                    raise HTTPException(status_code=500, detail="id_type is required for parameter")
-                
-                type_query = '''
-                    SELECT "type" FROM components."type" WHERE id = %s
-                '''
-                cursor.execute(type_query, (param['id_type'],))
-                type_info = cursor.fetchone()
-
-                if type_info is None:
-                    raise HTTPException(status_code=500, detail="Type not found for id_type")
-
-                parameters_list.append(Parameter(
-                    id=param['id'],
-                    name=param['name'],
-                    description=param['description'],
-                    param_type=type_info['type'],  # Используем название типа
-                    position_in_signature=param['position in signature'],
-                    is_multiple_values=param['is multiple values'],
-                    is_return_value=param['is return value'],
-                    default=param['default'],
-                    path=param['path']
-                ))
-            
-            functions_with_parameters.append(Function(
-                id=function['id'],
-                name=function['name'],
-                parameters=parameters_list
-            ))
+        functions_by_component = await fetch_component_functions(cursor, [component_id])
 
-        return functions_with_parameters
+        return functions_by_component.get(component_id, [])
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
         if cursor:
-            connection.rollback()
+            await connection.rollback()
         raise HTTPException(status_code=500, detail="Ошибка при добавлении функции")
     finally:
         if cursor:
-            cursor.close()
+            await cursor.close()
             
 @components_route.get("/components-types", response_model=List[str], tags=["Коллекция компонентов"])
-async def get_component_types(db=Depends(get_db)):
+async def get_component_types(request: Request):
     """
-    Возвращает список всех типов компонентов.
+    Возвращает список всех типов компонентов из справочника типов в памяти.
     """
-    cursor = None
     try:
-        connection = db
-        cursor = connection.cursor()
-
-        query = 'SELECT "type" FROM components."type"'
-        cursor.execute(query)
+        types = await type_registry.all()
+        headers = etag_headers(type_registry.etag)
+        unchanged = not_modified(request, type_registry.etag)
+        if unchanged is not None:
+            return unchanged
 
-        types = cursor.fetchall()
-        print("Fetched types:", types)
-
-        return [type_[0] for type_ in types]
+        return JSONResponse(content=[type_name for _, type_name in types], headers=headers)
     except Exception as e:
-        print(f"Error occurred: {e}")
+        logger.error("Error occurred: %s", e)
         raise HTTPException(status_code=500, detail="Ошибка при получении типов компонентов")
-    finally:
-        if cursor:
-            cursor.close()
             
 @components_route.delete("/parameters/{parameter_id}", tags=["Коллекция компонентов"])
 async def delete_parameter(parameter_id: int, db_connection=Depends(get_db)):
@@ -348,21 +459,26 @@ async def delete_parameter(parameter_id: int, db_connection=Depends(get_db)):
         cursor = db_connection.cursor()
         
         delete_query = '''
-            DELETE FROM components.component_function_parameter 
-            WHERE id = %s RETURNING id;
+            DELETE FROM components.component_function_parameter p
+            USING components.component_function f
+            WHERE p.id = %s AND f.id = p.id_of_component_function
+            RETURNING p.id, f.id_of_component;
         '''
-        cursor.execute(delete_query, (parameter_id,))
-        deleted_id = cursor.fetchone()
+        await cursor.execute(delete_query, (parameter_id,))
+        deleted_id = await cursor.fetchone()
 
         if deleted_id is None:
             raise HTTPException(status_code=404, detail="Parameter not found")
 
+        await db_connection.commit()
+        await invalidate_component(deleted_id['id_of_component'])
+
         return {"message": f"Parameter with id {deleted_id[0]} has been deleted."}  # Возвращаем сообщение об успешном удалении
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
             
 @components_route.delete("/functions/{function_id}", tags=["Коллекция компонентов"])
 async def delete_function(function_id: int, db_connection=Depends(get_db)):
@@ -377,193 +493,161 @@ async def delete_function(function_id: int, db_connection=Depends(get_db)):
             DELETE FROM components.component_function_parameter 
             WHERE id_of_component_function = %s;
         '''
-        cursor.execute(delete_function_parameter_query, (function_id,))
+        await cursor.execute(delete_function_parameter_query, (function_id,))
 
         delete_function_query = '''
             DELETE FROM components.component_function 
-            WHERE id = %s RETURNING id;
+            WHERE id = %s RETURNING id, id_of_component;
         '''
-        cursor.execute(delete_function_query, (function_id,))
-        deleted_id = cursor.fetchone()
+        await cursor.execute(delete_function_query, (function_id,))
+        deleted_id = await cursor.fetchone()
 
         if deleted_id is None:
             raise HTTPException(status_code=404, detail="Function not found")
 
+        await db_connection.commit()
+        await invalidate_component(deleted_id['id_of_component'])
+
         return {"message": f"Function with id {deleted_id[0]} has been deleted."}  # Возвращаем сообщение об успешном удалении
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 @components_route.get("/components/functions/{component_id}", response_model=List[Function], tags=["Коллекция компонентов"])
-async def get_functions_by_component_id(component_id: int, db_connection=Depends(get_db)):
+async def get_functions_by_component_id(component_id: int, request: Request, response: Response, db_connection=Depends(get_db)):
     """
     Возвращает список функций компонента c праметрами по его ID.
     """
     cursor = None
     try:
         cursor = db_connection.cursor()
+        await type_registry.refresh_if_stale(cursor)
+        etag = await rows_etag(cursor, FUNCTIONS_VERSION_QUERY, (component_id, component_id), type_registry.etag)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        response.headers.update(etag_headers(etag))
 
-        functions_query = '''
-            SELECT id, name 
-            FROM components.component_function 
-            WHERE id_of_component = %s
-        '''
-        cursor.execute(functions_query, (component_id,))
-        functions = cursor.fetchall()
-
-        functions_with_parameters = []
-        for function in functions:
-            parameters_query = '''
-                SELECT id, name, description, id_type, "position in signature", 
-                    "is multiple values", "is return value", "default", path 
-                FROM components.component_function_parameter 
-                WHERE id_of_component_function = %s
-            '''
-            cursor.execute(parameters_query, (function['id'],))
-            parameters = cursor.fetchall()
-
-            parameters_list = []
-            for param in parameters:
-                type_query = '''
-                    SELECT "type" FROM components."type" WHERE id = %s
-                '''
-                cursor.execute(type_query, (param['id_type'],))
-                type_info = cursor.fetchone()
-
-                if type_info is None:
-                    raise HTTPException(status_code=500, detail="Type not found for id_type")
-
-                parameters_list.append(Parameter(
-                    id=param['id'],
-                    name=param['name'],
-                    description=param['description'],
-                    param_type=type_info['type'],
-                    position_in_signature=param['position in signature'],
-                    is_multiple_values=param['is multiple values'],
-                    is_return_value=param['is return value'],
-                    default=param['default'],
-                    path=param['path']
-                ))
-
-            functions_with_parameters.append(Function(
-                id=function['id'],
-                name=function['name'],
-                parameters=parameters_list
-            ))
+        cached, version = await response_cache.get("get_functions_by_component_id", component_entity(component_id))
+        if cached is not None:
+            return cached
+
+        functions_by_component = await fetch_component_functions(cursor, [component_id])
 
-        return functions_with_parameters
+        functions = jsonable_encoder(functions_by_component.get(component_id, []))
+        await response_cache.set("get_functions_by_component_id", component_entity(component_id), version, functions)
+        return functions
 
     except Exception as err:
-        print(f"Error executing query: {err}")
+        logger.error("Error executing query: %s", err)
         raise HTTPException(status_code=500, detail="Database query execution error")
     
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 @components_route.put("/functions/parameters/{function_id}", response_model=Function, tags=["Коллекция компонентов"])
-async def update_function(function_id: int, function: Function, db_connection=Depends(get_db)):
+async def update_function(function_id: int, function: FunctionUpdate, db_connection=Depends(get_db)):
     """
-    Обновление функции со всеми параметрами по id
+    Обновление функции и её параметров по id. Присланные параметры сравниваются с сохранёнными:
+    изменённые обновляются одним запросом, новые (без id) вставляются одним запросом.
+    Не присланные параметры не меняются; удаляются только перечисленные в removed_ids.
+    Ответ - функция со всеми параметрами, собранная из RETURNING, без повторного чтения.
     """
     cursor = None
     try:
         cursor = db_connection.cursor()
-        print(f"Received function update request: {function}")
+        logger.debug("Received function update request: %s", function)
 
         update_function_query = '''
             UPDATE components.component_function
             SET name = %s
             WHERE id = %s
+            RETURNING id, name, id_of_component
         '''
-        cursor.execute(update_function_query, (function.name, function_id))
-
-        for param in function.parameters:
-            if param.id is None:
-                insert_param_query = '''
-                    INSERT INTO components.component_function_parameter (name, description, id_type, "position in signature", "is multiple values", "is return value", "default", path, id_of_component_function)
-                    VALUES (%s, %s, (SELECT id FROM components."type" WHERE "type" = %s), %s, %s, %s, %s, %s, %s)
-                '''
-                cursor.execute(insert_param_query, (
-                    param.name,
-                    param.description,
-                    param.param_type,
-                    param.position_in_signature,
-                    param.is_multiple_values,
-                    param.is_return_value,
-                    param.default,
-                    param.path,
-                    function_id
-                ))
-            else:
-                update_param_query = '''
-                    UPDATE components.component_function_parameter
-                    SET name = %s,
-                        description = %s,
-                        id_type = (SELECT id FROM components."type" WHERE "type" = %s),
-                        "position in signature" = %s,
-                        "is multiple values" = %s,
-                        "is return value" = %s,
-                        "default" = %s,
-                        path = %s
-                    WHERE id = %s
-                '''
-                cursor.execute(update_param_query, (
-                    param.name,
-                    param.description,
-                    param.param_type,
-                    param.position_in_signature,
-                    param.is_multiple_values,
-                    param.is_return_value,
-                    param.default,
-                    param.path,
-                    param.id
-                ))
-
-        db_connection.commit()
-
-        cursor.execute("SELECT * FROM components.component_function WHERE id = %s", (function_id,))
-        function_data = cursor.fetchone()
-        print(function_data)
-
-        if function_data is None:
+        await cursor.execute(update_function_query, (function.name, function_id))
+        updated_function = await cursor.fetchone()
+
+        if updated_function is None:
             raise HTTPException(status_code=404, detail="Function not found")
 
-        cursor.execute('''
-            SELECT p.*, t.type
-            FROM components.component_function_parameter p
-            JOIN components."type" t ON p.id_type = t.id
-            WHERE p.id_of_component_function = %s
-        ''', (function_id,))
-        parameters_data = cursor.fetchall()
-
-        print(f"Parameters data from DB: {parameters_data}")
-
-        parameters = [
-            Parameter(
-                id=param[0],  # id
-                name=param[2],  # name
-                description=param[3],  # description
-                position_in_signature=param[5],  # position_in_signature
-                is_multiple_values=param[6],  # is_multiple_values
-                is_return_value=param[7],  # is_return_value
-                default=param[8],  # default
-                path=param[9],  # path
-                param_type=param[11],
-            ) for param in parameters_data
-        ]
+        type_ids = await type_registry.type_ids((param.param_type for param in function.parameters), cursor)
+        unknown_types = sorted({param.param_type for param in function.parameters} - type_ids.keys())
+        if unknown_types:
+            raise HTTPException(status_code=400, detail=f"Type '{unknown_types[0]}' not found")
+
+        await cursor.execute(
+            f'SELECT id, {PARAMETER_COLUMNS} FROM components.component_function_parameter WHERE id_of_component_function = %s',
+            (function_id,)
+        )
+        stored = {row['id']: row for row in await cursor.fetchall()}
+
+        plan = plan_parameter_changes(
+            {parameter_id: stored_parameter_values(row) for parameter_id, row in stored.items()},
+            [(param.id, parameter_values(param, type_ids[param.param_type])) for param in function.parameters],
+            function.removed_ids
+        )
+        if plan["foreign"]:
+            raise HTTPException(status_code=400, detail=f"Parameter {plan['foreign'][0]} does not belong to function {function_id}")
+        if plan["conflicting"]:
+            raise HTTPException(status_code=400, detail=f"Parameter {plan['conflicting'][0]} is both updated and removed")
+
+        changed = [(parameter_id, function_id, *values) for parameter_id, values in plan["changed"]]
+        added = [(function_id, *values) for values in plan["added"]]
+        removed = plan["removed"]
+
+        if removed:
+            await cursor.execute(
+                'DELETE FROM components.component_function_parameter WHERE id = ANY(%s) AND id_of_component_function = %s',
+                (removed, function_id)
+            )
+
+        # Явные приведения типов: в VALUES у значений нет колонки, по которой Postgres вывел бы тип
+        updated_rows = await execute_values(cursor, '''
+            UPDATE components.component_function_parameter AS p
+            SET name = v.name, description = v.description, id_type = v.id_type,
+                "position in signature" = v.position, "is multiple values" = v.is_multiple,
+                "is return value" = v.is_return, "default" = v."default", path = v.path
+            FROM (VALUES %s) AS v(id, function_id, name, description, id_type, position, is_multiple, is_return, "default", path)
+            WHERE p.id = v.id AND p.id_of_component_function = v.function_id
+            RETURNING p.*
+        ''', changed, template="(%s::int, %s::int, %s::text, %s::text, %s::int, %s::int, %s::boolean, %s::boolean, %s::text, %s::text)", fetch=True)
+
+        inserted_rows = await execute_values(
+            cursor,
+            f'INSERT INTO components.component_function_parameter (id_of_component_function, {PARAMETER_COLUMNS}) VALUES %s RETURNING *',
+            added,
+            fetch=True
+        )
+
+        await db_connection.commit()
+        await invalidate_component(updated_function['id_of_component'])
+        logger.info("Function %s: updated %s, added %s, removed %s parameters.", function_id, len(changed), len(added), len(removed))
 
-        return Function(id=function_data[0], name=function_data[2], parameters=parameters)
+        # Ответ - все параметры функции после сохранения, включая не присланные
+        rows = {parameter_id: stored[parameter_id] for parameter_id in plan["kept"]}
+        rows.update((row['id'], row) for row in updated_rows)
+        rows.update((row['id'], row) for row in inserted_rows)
+        type_names = await type_registry.type_names((row['id_type'] for row in rows.values()), cursor)
 
+        return Function(
+            id=updated_function['id'],
+            name=updated_function['name'],
+            parameters=[parameter_from_row(rows[parameter_id], type_names) for parameter_id in sorted(rows)]
+        )
+    except HTTPException:
+        await db_connection.rollback()
+        raise
     except Exception as err:
-        print(f"Error updating function parameters: {err}")
+        logger.error("Error updating function parameters: %s", err)
+        await db_connection.rollback()
         raise HTTPException(status_code=500, detail="Error updating function parameters")
     
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
             
 @components_route.delete("/components/{component_id}", tags=["Коллекция компонентов"])
 async def delete_component(component_id: int, db_connection=Depends(get_db)):
@@ -574,38 +658,101 @@ async def delete_component(component_id: int, db_connection=Depends(get_db)):
     try:
         cursor = db_connection.cursor()
 
-        get_functions_query = '''
-            SELECT id FROM components.component_function 
-            WHERE id_of_component = %s;
-        '''
-        cursor.execute(get_functions_query, (component_id,))
-        function_ids = [row[0] for row in cursor.fetchall()]
+        deleted = await delete_components(cursor, [component_id])
 
-        for function_id in function_ids:
-            delete_parameters_query = '''
-                DELETE FROM components.component_function_parameter 
-                WHERE id_of_component_function = %s;
-            '''
-            cursor.execute(delete_parameters_query, (function_id,))
+        await db_connection.commit()
+        await invalidate_component(component_id)
 
-        delete_functions_query = '''
-            DELETE FROM components.component_function 
-            WHERE id_of_component = %s;
-        '''
-        cursor.execute(delete_functions_query, (component_id,))
+        return {
+            "message": f"Component with id {component_id} and all associated functions and parameters have been deleted.",
+            "deleted": {
+                "functions": deleted[0]['functions'] if deleted else 0,
+                "parameters": deleted[0]['parameters'] if deleted else 0
+            }
+        }
+    except Exception as e:
+        await db_connection.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if cursor is not None:
+            await cursor.close()
 
-        delete_component_query = '''
-            DELETE FROM components.components
-            WHERE id = %s;
-        '''
-        cursor.execute(delete_component_query, (component_id,))
+@components_route.post("/components/batch-delete", tags=["Коллекция компонентов"])
+async def delete_components_batch(batch: ComponentIds, db_connection=Depends(get_db)):
+    """
+    Удаление нескольких компонентов со всеми функциями и параметрами одним запросом.
+    Возвращает удалённые компоненты с числом удалённых функций и параметров и id, которых не нашлось.
+    """
+    if not batch.ids:
+        raise HTTPException(status_code=400, detail="Список ids пуст")
 
-        db_connection.commit()
+    cursor = None
+    try:
+        cursor = db_connection.cursor()
+
+        deleted = await delete_components(cursor, set(batch.ids))
+
+        await db_connection.commit()
+        for row in deleted:
+            await invalidate_component(row['id'])
 
-        return {"message": f"Component with id {component_id} and all associated functions and parameters have been deleted."}
+        deleted_ids = {row['id'] for row in deleted}
+        return {
+            "deleted": [
+                {"id": row['id'], "functions": row['functions'], "parameters": row['parameters']}
+                for row in deleted
+            ],
+            "notFound": sorted(set(batch.ids) - deleted_ids)
+        }
     except Exception as e:
-        db_connection.rollback()
+        await db_connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if cursor is not None:
-            cursor.close()
\ No newline at end of file
+            await cursor.close()
+
+@components_route.post("/components/batch", tags=["Коллекция компонентов"])
+async def get_components_batch(batch: ComponentIds, db_connection=Depends(get_db)):
+    """
+    Получение нескольких компонентов со всеми функциями и параметрами за один вызов.
+    Сколько бы ни было id, данные читаются двумя запросами: компоненты и их функции с параметрами.
+    Возвращает компоненты в порядке присланных id и id, которых не нашлось.
+    """
+    if not batch.ids:
+        raise HTTPException(status_code=400, detail="Список ids пуст")
+    component_ids = list(dict.fromkeys(batch.ids))
+    if len(component_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_PAGE_SIZE} id за запрос")
+
+    cursor = None
+    try:
+        cursor = db_connection.cursor()
+        await type_registry.refresh_if_stale(cursor)
+
+        await cursor.execute(
+            "SELECT id, name, description FROM components.components WHERE id = ANY(%s)",
+            (component_ids,)
+        )
+        components = {row['id']: row for row in await cursor.fetchall()}
+        functions_by_component = await fetch_component_functions(cursor, components)
+
+        details = [
+            ComponentDetail(
+                componentId=component_id,
+                componentName=components[component_id]['name'],
+                componentDescription=components[component_id]['description'],
+                functions=functions_by_component.get(component_id, [])
+            )
+            for component_id in component_ids
+            if component_id in components
+        ]
+        return JSONResponse(content=jsonable_encoder({
+            "components": details,
+            "notFound": [component_id for component_id in component_ids if component_id not in components]
+        }))
+    except Exception as err:
+        logger.error("Error executing query: %s", err)
+        raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")
+    finally:
+        if cursor is not None:
+            await cursor.close()
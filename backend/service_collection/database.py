@@ -1,6 +1,20 @@
-from psycopg2 import connect, sql
+from psycopg2 import extensions
 from psycopg2.extras import DictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg import AsyncConnection as AsyncPgConnection
+from psycopg.pq import TransactionStatus
+from psycopg_pool import AsyncConnectionPool, PoolTimeout as AsyncPoolTimeout
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from typing import Dict
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # Данные для подключения к базе данных
 db_config: Dict[str, str] = {
@@ -8,16 +22,187 @@ db_config: Dict[str, str] = {
     "user": "postgres",
     "password": "",
     "db_name": "",
-    "port": ""
+    "port": "",
+    # "async" - psycopg 3 с асинхронным пулом, запросы не блокируют event loop;
+    # "sync" - прежний режим на psycopg2, оставлен для сравнения
+    "driver": os.getenv("DB_DRIVER", "async")
+}
+
+# Настройки пула соединений
+pool_config: Dict[str, float] = {
+    "min_size": 1,      # Сколько соединений держать открытыми постоянно
+    "max_size": 10,     # Максимум одновременно выданных соединений
+    "timeout": 30       # Сколько секунд ждать свободное соединение, прежде чем вернуть 503
 }
 
+# Наблюдатели запросов: функции (query, params, seconds), вызываемые после каждого Cursor.execute.
+# Через них метрики и профилирование считают запросы, не трогая код маршрутов.
+query_observers = []
+
+class PoolTimeout(Exception):
+    """Все соединения пула заняты, и за отведённое время ни одно не освободилось."""
+
+class Row(list):
+    """
+    Строка результата для режима psycopg 3. Ведёт себя как DictRow из psycopg2:
+    доступ по индексу и по имени колонки, распаковка через ** и сериализация в JSON как список.
+    """
+    __slots__ = ("_index",)
+
+    def __init__(self, index, values):
+        super().__init__(values)
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except (KeyError, IndexError):
+            return default
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self._index]
+
+def _row_factory(cursor):
+    if cursor.description is None:
+        return None
+    index = {column.name: position for position, column in enumerate(cursor.description)}
+    return lambda values: Row(index, values)
+
+class Cursor:
+    """
+    Единый асинхронный курсор для обоих драйверов. В режиме "sync" вызовы psycopg2
+    выполняются прямо в event loop - так же, как работали обработчики до перехода на пул.
+    """
+    def __init__(self, cursor, is_async):
+        self._cursor = cursor
+        self._is_async = is_async
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    async def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            if self._is_async:
+                await self._cursor.execute(query, params)
+            else:
+                self._cursor.execute(query, params)
+        finally:
+            if query_observers:
+                elapsed = time.perf_counter() - started
+                for observer in query_observers:
+                    observer(query, params, elapsed)
+
+    async def fetchone(self):
+        if self._is_async:
+            return await self._cursor.fetchone()
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size):
+        if self._is_async:
+            return await self._cursor.fetchmany(size)
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self):
+        if self._is_async:
+            return await self._cursor.fetchall()
+        return self._cursor.fetchall()
+
+    async def close(self):
+        if self._is_async:
+            await self._cursor.close()
+        else:
+            self._cursor.close()
+
+class Connection:
+    """Соединение, выданное обработчику на время запроса."""
+    def __init__(self, connection, is_async):
+        self._connection = connection
+        self._is_async = is_async
+
+    def cursor(self, name=None):
+        """
+        Обычный курсор или, если задано имя, серверный: строки такого курсора
+        остаются в базе и забираются порциями через fetchmany.
+        """
+        if name is None:
+            return Cursor(self._connection.cursor(), self._is_async)
+        return Cursor(self._connection.cursor(name=name), self._is_async)
+
+    async def commit(self):
+        if self._is_async:
+            await self._connection.commit()
+        else:
+            self._connection.commit()
+
+    async def rollback(self):
+        if self._is_async:
+            await self._connection.rollback()
+        else:
+            self._connection.rollback()
+
+async def execute_values(cursor, query, rows, template=None, page_size=1000, fetch=False):
+    """
+    Аналог psycopg2.extras.execute_values для обоих драйверов. Единственный %s в query
+    заменяется многострочным списком VALUES; строки отправляются порциями по page_size,
+    то есть один запрос на порцию вместо одного на строку.
+
+    template - шаблон одной строки, например "(%s, %s::int)"; по умолчанию все значения как %s.
+    При fetch=True возвращает строки RETURNING всех порций в порядке rows.
+    """
+    results = []
+    if not rows:
+        return results
+    row_template = template or "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    head, tail = query.split("%s", 1)
+    for start in range(0, len(rows), page_size):
+        page = rows[start:start + page_size]
+        values = ", ".join([row_template] * len(page))
+        params = [value for row in page for value in row]
+        await cursor.execute(head + values + tail, params)
+        if fetch:
+            results.extend(await cursor.fetchall())
+    return results
+
 class Database:
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        self.async_pool = None
+        self._slots = None
+        # Сколько соединений выдано запросам и сколько запросов ждут соединение
+        self.in_use = 0
+        self.waiting = 0
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+
+    @property
+    def is_async(self):
+        return db_config["driver"] == "async"
 
     def connect(self):
         try:
-            self.connection = connect(
+            self.pool = ThreadedConnectionPool(
+                int(pool_config["min_size"]),
+                int(pool_config["max_size"]),
                 host=db_config["host"],
                 user=db_config["user"],
                 password=db_config["password"],
@@ -25,18 +210,157 @@ class Database:
                 port=db_config["port"],
                 cursor_factory=DictCursor
             )
-            print("Подключение к базе данных успешно!")
+            # ThreadedConnectionPool при исчерпании сразу бросает ошибку,
+            # поэтому ожидание свободного соединения делаем семафором
+            self._slots = threading.BoundedSemaphore(int(pool_config["max_size"]))
+            logger.info("Подключение к базе данных успешно!")
         except Exception as e:
-            print(f"Ошибка подключения к базе данных: {e}")
+            logger.error("Ошибка подключения к базе данных: %s", e)
+            raise
+
+    async def connect_async(self):
+        try:
+            pool = AsyncConnectionPool(
+                kwargs={
+                    "host": db_config["host"],
+                    "user": db_config["user"],
+                    "password": db_config["password"],
+                    "dbname": db_config["db_name"],
+                    "port": db_config["port"],
+                    "row_factory": _row_factory
+                },
+                connection_class=AsyncPgConnection,
+                min_size=int(pool_config["min_size"]),
+                max_size=int(pool_config["max_size"]),
+                timeout=pool_config["timeout"],
+                # Проверка соединения перед выдачей: оборванные соединения пул пересоздаёт сам
+                check=AsyncConnectionPool.check_connection,
+                open=False
+            )
+            await pool.open()
+            self.async_pool = pool
+            logger.info("Подключение к базе данных успешно!")
+        except Exception as e:
+            logger.error("Ошибка подключения к базе данных: %s", e)
+            raise
 
     def get_connection(self):
-        if not self.connection:
-            self.connect()
-        return self.connection
+        """
+        Выдаёт соединение psycopg2 из пула. Если все соединения заняты, ждёт не дольше
+        pool_config["timeout"] секунд и бросает PoolTimeout.
+        """
+        if self.pool is None:
+            with self._lock:
+                if self.pool is None:
+                    self.connect()
+
+        if not self._slots.acquire(timeout=pool_config["timeout"]):
+            raise PoolTimeout("Нет свободных соединений с базой данных")
+        try:
+            connection = self.pool.getconn()
+            if not self._is_alive(connection):
+                # Соединение оборвалось (рестарт БД, сетевой сбой) - выбрасываем его и открываем новое
+                logger.warning("Соединение с базой данных потеряно, переподключаемся")
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+            return connection
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release_connection(self, connection):
+        """
+        Возвращает соединение psycopg2 в пул. Незавершённая транзакция откатывается,
+        чтобы следующий запрос не получил чужие изменения.
+        """
+        try:
+            close = bool(connection.closed)
+            if not close and connection.status != extensions.STATUS_READY:
+                try:
+                    connection.rollback()
+                except Exception:
+                    close = True
+            self.pool.putconn(connection, close=close)
+        finally:
+            self._slots.release()
+
+    async def _ensure_async_pool(self):
+        if self.async_pool is None:
+            async with self._async_lock:
+                if self.async_pool is None:
+                    await self.connect_async()
+
+    async def get_async_connection(self):
+        await self._ensure_async_pool()
+        try:
+            return await self.async_pool.getconn()
+        except AsyncPoolTimeout:
+            raise PoolTimeout("Нет свободных соединений с базой данных")
+
+    async def release_async_connection(self, connection):
+        try:
+            if not connection.closed and connection.info.transaction_status != TransactionStatus.IDLE:
+                await connection.rollback()
+        except Exception:
+            await connection.close()
+        finally:
+            await self.async_pool.putconn(connection)
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Соединение на время одного запроса: берётся из пула выбранного драйвера
+        и гарантированно возвращается.
+        """
+        is_async = self.is_async
+        self.waiting += 1
+        try:
+            if is_async:
+                raw_connection = await self.get_async_connection()
+            else:
+                # Ожидание свободного слота не должно блокировать event loop
+                raw_connection = await run_in_threadpool(self.get_connection)
+        except PoolTimeout:
+            raise HTTPException(status_code=503, detail="База данных перегружена, повторите запрос позже")
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        try:
+            yield Connection(raw_connection, is_async)
+        finally:
+            self.in_use -= 1
+            if is_async:
+                await self.release_async_connection(raw_connection)
+            else:
+                self.release_connection(raw_connection)
+
+    @staticmethod
+    def _is_alive(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    async def open(self):
+        """Заранее открывает пул выбранного драйвера при старте приложения."""
+        if self.is_async:
+            await self._ensure_async_pool()
+        elif self.pool is None:
+            await run_in_threadpool(self.connect)
 
-    def close(self):
-        if self.connection:
-            self.connection.close()
-            print("Подключение к базе данных закрыто!")
+    async def close(self):
+        if self.async_pool:
+            await self.async_pool.close()
+            self.async_pool = None
+            logger.info("Подключение к базе данных закрыто!")
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+            logger.info("Подключение к базе данных закрыто!")
 
-db = Database()
\ No newline at end of file
+db = Database()
@@ -0,0 +1,45 @@
+from fastapi import Request
+from fastapi.responses import Response
+import hashlib
+
+# Ответ можно хранить, но перед использованием клиент должен сверить ETag с сервером
+REVALIDATE = "no-cache"
+
+def etag_matches(request: Request, etag):
+    """
+    Совпадает ли ETag с заголовком If-None-Match запроса (сравнение слабое, как требует RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None or etag is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def make_etag(*parts):
+    """ETag из версии данных и прочих составляющих представления (справочник типов, режим логотипов)."""
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+async def rows_etag(cursor, version_query, params=(), *extra):
+    """
+    ETag ответа по версиям строк, из которых он строится, без построения самого ответа.
+    version_query возвращает одну текстовую колонку - обычно string_agg пар id:xmin
+    (xmin меняется при каждом UPDATE строки, удалённые и новые строки меняют набор id).
+    Если запрос не вернул строк или вернул NULL, сущности нет и ETag - None.
+    """
+    await cursor.execute(version_query, params)
+    row = await cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    return make_etag(row[0], *extra)
+
+def etag_headers(etag):
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": REVALIDATE}
+
+def not_modified(request: Request, etag):
+    """Ответ 304, если у клиента актуальная версия, иначе None."""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from .database import db
+from .services_routes import fetch_service_points
+from .components_routes import fetch_component_functions
+import json
+
+export_route = APIRouter()
+
+# Сколько сервисов/компонентов забирать из серверного курсора за один раз
+EXPORT_CHUNK_SIZE = 500
+
+def _ndjson_line(item):
+    return json.dumps(jsonable_encoder(item), ensure_ascii=False) + "\n"
+
+async def _export_services(connection):
+    services_cursor = connection.cursor(name="export_services")
+    cursor = connection.cursor()
+    try:
+        await services_cursor.execute('''
+            SELECT service.*, service_categories.name AS category_name
+            FROM services.service
+            LEFT JOIN services.service_categories AS service_categories ON service.category_id = service_categories.id
+            ORDER BY service.id
+        ''')
+        while True:
+            services = await services_cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not services:
+                break
+            # Точки и параметры - одним запросом на всю порцию сервисов
+            points_by_service = await fetch_service_points(cursor, [service['id'] for service in services])
+            yield "".join(
+                _ndjson_line({
+                    "kind": "service",
+                    **service,
+                    "servicePoints": points_by_service.get(service['id'], [])
+                })
+                for service in services
+            )
+    finally:
+        await cursor.close()
+        await services_cursor.close()
+
+async def _export_components(connection):
+    components_cursor = connection.cursor(name="export_components")
+    cursor = connection.cursor()
+    try:
+        await components_cursor.execute(
+            "SELECT id, name, description FROM components.components ORDER BY id"
+        )
+        while True:
+            components = await components_cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not components:
+                break
+            # Функции, параметры и типы - одним запросом на всю порцию компонентов
+            functions_by_component = await fetch_component_functions(cursor, [component['id'] for component in components])
+            yield "".join(
+                _ndjson_line({
+                    "kind": "component",
+                    "id": component['id'],
+                    "name": component['name'],
+                    "description": component['description'],
+                    "functions": functions_by_component.get(component['id'], [])
+                })
+                for component in components
+            )
+    finally:
+        await cursor.close()
+        await components_cursor.close()
+
+async def _export_catalogue(kind):
+    # Соединение берётся внутри генератора: зависимость get_db освобождается
+    # раньше, чем закончится потоковая отдача ответа
+    async with db.connection() as connection:
+        if kind in (None, "services"):
+            async for chunk in _export_services(connection):
+                yield chunk
+        if kind in (None, "components"):
+            async for chunk in _export_components(connection):
+                yield chunk
+
+@export_route.get("/api/export", tags=["Экспорт"])
+async def export_catalogue(kind: Optional[str] = Query(None, pattern="^(services|components)$")):
+    """
+    Выгрузка всей коллекции в формате NDJSON: по строке на сервис (с точками, параметрами
+    и категорией) и на компонент (с функциями, параметрами и типами).
+    Данные читаются серверным курсором порциями, поэтому память не растёт с размером коллекции.
+
+    Параметры:
+    - kind: services или components, чтобы выгрузить только одну часть.
+    """
+    return StreamingResponse(_export_catalogue(kind), media_type="application/x-ndjson")
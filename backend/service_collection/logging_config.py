@@ -0,0 +1,144 @@
+"""
+Логирование приложения: JSON-строка на запись, уровень из переменной окружения LOG_LEVEL
+(по умолчанию INFO). Обработчики запросов только кладут запись в очередь (QueueHandler),
+а форматирование и запись в stdout выполняет отдельный поток QueueListener, поэтому
+вывод лога не блокирует event loop.
+
+У каждой записи есть request_id - идентификатор HTTP-запроса, в котором она сделана:
+берётся из заголовка X-Request-ID или генерируется, и возвращается в том же заголовке ответа.
+"""
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import uuid
+
+logging_config = {
+    "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+    # Очередь не ограничена: запись в неё не ждёт потока вывода
+    "queue_size": -1
+}
+
+request_id_var = ContextVar("request_id", default=None)
+
+# Принимаем только короткие идентификаторы без управляющих символов
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# Атрибуты LogRecord, которые не считаются дополнительными полями (extra)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной JSON-строкой; поля из extra добавляются как есть."""
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler, который до постановки записи в очередь фиксирует request_id (поток вывода
+    не видит контекст запроса) и подставляет аргументы в сообщение. Записи ниже уровня
+    логгера сюда не доходят, поэтому их аргументы не форматируются вовсе.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(level=None):
+    """
+    Настраивает корневой логгер один раз на процесс. Повторный вызов ничего не делает.
+    Поток вывода останавливается при выходе из процесса, дописав очередь до конца.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = level or logging_config["level"]
+    log_queue = queue.Queue(logging_config["queue_size"])
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(log_queue))
+    root.setLevel(level)
+
+    # Логи доступа uvicorn идут через тот же обработчик, чтобы у них был request_id
+    for name in ("uvicorn", "uvicorn.access", "uvicorn.error"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+def shutdown_logging():
+    """Дописывает оставшиеся в очереди записи и останавливает поток вывода."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class RequestIdMiddleware:
+    """
+    ASGI-middleware: выставляет request_id на время запроса и возвращает его
+    в заголовке X-Request-ID.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                value = value.decode("latin-1")
+                if _REQUEST_ID.match(value):
+                    request_id = value
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), header]}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
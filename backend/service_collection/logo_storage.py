@@ -0,0 +1,213 @@
+"""
+Хранение логотипов по хэшу содержимого. Загруженный логотип сохраняется как
+<sha256><расширение> (logos.save_logo_upload), поэтому одинаковые картинки разных сервисов
+лежат одним файлом, а в services.service.logo хранится это имя.
+
+Файл, на который больше не ссылается ни один сервис, удаляется вместе с уменьшенными копиями:
+сразу после удаления сервиса (release_logos) и полным проходом по папке (collect_garbage).
+Файлы моложе storage_config["gc_grace_seconds"] не удаляются: такой логотип мог только что
+загрузиться и ещё не попасть в базу.
+
+Запуск из командной строки (из папки backend):
+    python -m service_collection.logo_storage migrate   # перевести старые файлы на имена по хэшу
+    python -m service_collection.logo_storage gc [--dry-run]
+
+После migrate закэшированные ответы могут ещё RESPONSE_CACHE_TTL секунд ссылаться на старые
+имена, поэтому gc запускать не раньше этого срока.
+"""
+from fastapi.concurrency import run_in_threadpool
+from .database import db
+from .logging_config import setup_logging
+from .logos import LOGOS_DIR, LOGO_TYPES, is_content_addressed, logo_cache, logo_config, logo_path, sniff_logo_type
+from .response_cache import invalidate_service
+from .thumbnails import generate_thumbnails, is_thumbnail, thumbnail_names
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+storage_config = {
+    "gc_grace_seconds": int(os.getenv("LOGO_GC_GRACE_SECONDS", 3600))
+}
+
+def _is_recent(path, grace_seconds):
+    try:
+        return time.time() - os.stat(path).st_mtime < grace_seconds
+    except FileNotFoundError:
+        return False
+
+def _remove_logo_files(file_name):
+    """Удаляет файл логотипа и его копии. Возвращает число удалённых файлов."""
+    removed = 0
+    for name in (file_name, *thumbnail_names(file_name)):
+        try:
+            os.remove(os.path.join(LOGOS_DIR, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+        logo_cache.invalidate(name)
+    return removed
+
+async def _referenced(cursor, file_names):
+    await cursor.execute(
+        "SELECT DISTINCT logo FROM services.service WHERE logo = ANY(%s)",
+        (list(file_names),)
+    )
+    return {row['logo'] for row in await cursor.fetchall()}
+
+async def release_logos(cursor, file_names, grace_seconds=None, dry_run=False):
+    """
+    Удаляет логотипы из file_names, на которые не ссылается ни один сервис.
+    Вызывается после коммита удаления сервисов. Возвращает имена удалённых логотипов.
+    """
+    if grace_seconds is None:
+        grace_seconds = storage_config["gc_grace_seconds"]
+    candidates = {
+        name for name in file_names
+        if name and name != logo_config["default"] and logo_path(name) is not None
+    }
+    if not candidates:
+        return []
+
+    unreferenced = candidates - await _referenced(cursor, candidates)
+    released = []
+    for file_name in sorted(unreferenced):
+        if await run_in_threadpool(_is_recent, os.path.join(LOGOS_DIR, file_name), grace_seconds):
+            continue
+        if not dry_run:
+            await run_in_threadpool(_remove_logo_files, file_name)
+        released.append(file_name)
+    if released:
+        logger.info("Удалены логотипы без ссылок: %s", released)
+    return released
+
+def _scan_logos_dir(grace_seconds):
+    """Оригиналы логотипов, а также копии без оригинала и брошенные временные файлы."""
+    originals = []
+    orphans = []
+    if not os.path.isdir(LOGOS_DIR):
+        return originals, orphans
+    names = set(os.listdir(LOGOS_DIR))
+    for file_name in sorted(names):
+        path = os.path.join(LOGOS_DIR, file_name)
+        if file_name.startswith("."):
+            # Временные файлы прерванных загрузок и создания копий
+            if file_name.endswith(".tmp") and not _is_recent(path, grace_seconds):
+                orphans.append(file_name)
+        elif is_thumbnail(file_name):
+            if file_name.rpartition("@")[0] not in names:
+                orphans.append(file_name)
+        elif os.path.isfile(path):
+            originals.append(file_name)
+    return originals, orphans
+
+async def collect_garbage(cursor, grace_seconds=None, dry_run=False):
+    """
+    Полный проход по папке логотипов: удаляет логотипы без ссылок из базы, копии без оригинала
+    и брошенные временные файлы. Возвращает словарь со списками удалённых имён.
+    """
+    if grace_seconds is None:
+        grace_seconds = storage_config["gc_grace_seconds"]
+    originals, orphans = await run_in_threadpool(_scan_logos_dir, grace_seconds)
+    released = await release_logos(cursor, originals, grace_seconds, dry_run)
+    if not dry_run:
+        for file_name in orphans:
+            await run_in_threadpool(os.remove, os.path.join(LOGOS_DIR, file_name))
+    return {"logos": released, "orphans": orphans}
+
+def _store_existing(path):
+    """
+    Копирует логотип со старым именем под имя по хэшу (если такого файла ещё нет) и создаёт копии.
+    Возвращает новое имя или None, если файл не картинка из LOGO_TYPES.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        head = file.read(64)
+        digest.update(head)
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    media_type = sniff_logo_type(head)
+    if media_type is None:
+        return None
+
+    file_name = f"{digest.hexdigest()}{LOGO_TYPES[media_type]}"
+    target = os.path.join(LOGOS_DIR, file_name)
+    if not os.path.isfile(target):
+        descriptor, temp_path = tempfile.mkstemp(dir=LOGOS_DIR, prefix=".upload-", suffix=".tmp")
+        os.close(descriptor)
+        try:
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        try:
+            generate_thumbnails(target)
+        except Exception as error:
+            logger.warning("Не удалось создать копии логотипа %s: %s", file_name, error)
+    return file_name
+
+async def migrate_logos(connection):
+    """
+    Переводит логотипы со старыми именами (по имени сервиса) на имена по хэшу и обновляет ссылки
+    в базе. Старые файлы остаются до сборки мусора. Возвращает число переведённых файлов.
+    """
+    cursor = connection.cursor()
+    migrated = 0
+    try:
+        await cursor.execute("SELECT DISTINCT logo FROM services.service WHERE logo IS NOT NULL")
+        logos = [row['logo'] for row in await cursor.fetchall()]
+        for logo in logos:
+            if is_content_addressed(logo):
+                continue
+            if logo == logo_config["default"]:
+                await cursor.execute("UPDATE services.service SET logo = NULL WHERE logo = %s RETURNING name", (logo,))
+            else:
+                path = logo_path(logo)
+                file_name = await run_in_threadpool(_store_existing, path) if path is not None else None
+                if file_name is None:
+                    logger.warning("Логотип %s не найден или не является картинкой, оставлен как есть", logo)
+                    continue
+                await cursor.execute("UPDATE services.service SET logo = %s WHERE logo = %s RETURNING name", (file_name, logo))
+                migrated += 1
+            names = [row['name'] for row in await cursor.fetchall()]
+            await connection.commit()
+            await invalidate_service(*names)
+    except Exception:
+        await connection.rollback()
+        raise
+    finally:
+        await cursor.close()
+    return migrated
+
+async def _main(arguments):
+    try:
+        async with db.connection() as connection:
+            if arguments.command == "migrate":
+                migrated = await migrate_logos(connection)
+                print(f"Переведено логотипов на имена по хэшу: {migrated}")
+            else:
+                cursor = connection.cursor()
+                try:
+                    removed = await collect_garbage(cursor, dry_run=arguments.dry_run)
+                finally:
+                    await cursor.close()
+                prefix = "Будут удалены" if arguments.dry_run else "Удалены"
+                print(f"{prefix} логотипы: {len(removed['logos'])}, лишние файлы: {len(removed['orphans'])}")
+                for file_name in removed["logos"] + removed["orphans"]:
+                    print(f"  {file_name}")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Хранение логотипов по хэшу содержимого")
+    parser.add_argument("command", choices=["migrate", "gc"], help="migrate - перевести старые файлы на имена по хэшу, gc - удалить файлы без ссылок")
+    parser.add_argument("--dry-run", action="store_true", help="Для gc: только показать, что будет удалено")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,392 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from .etags import etag_matches
+from .metrics import record_logo_read
+from .thumbnails import generate_thumbnails, pick_size, thumbnail_name, thumbnail_names
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+
+logos_route = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Папка для хранения изображений сервисов
+LOGOS_DIR = "collections_logos"
+
+logo_config = {
+    # Старый режим: логотип приходит в JSON как data URI. Нужен клиентам, которые ещё
+    # не перешли на загрузку логотипа по ссылке; на один запрос включается ?inline_logos=true
+    "inline": os.getenv("INLINE_LOGOS", "0") == "1",
+    # Сколько секунд браузер может не перепроверять логотип со старым именем (не по хэшу)
+    "max_age": 86400,
+    # Логотип сервиса без своей картинки
+    "default": "default.jpg",
+    # Бюджет памяти под закодированные логотипы для режима inline, в байтах
+    "cache_max_bytes": int(os.getenv("LOGO_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    # Максимальный размер загружаемого логотипа, в байтах
+    "max_upload_bytes": int(os.getenv("LOGO_MAX_UPLOAD_BYTES", 2 * 1024 * 1024)),
+    # Запас на остальные поля формы и разметку multipart сверх размера логотипа, в байтах
+    "upload_form_overhead_bytes": 64 * 1024,
+    # Размер порции при записи загрузки на диск
+    "upload_chunk_bytes": 64 * 1024
+}
+
+# Имя логотипа по содержимому: sha256 файла и расширение. Такой файл никогда не меняется
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z]+$")
+
+# Маршруты, которые принимают логотип в теле запроса: (метод, путь)
+LOGO_UPLOAD_ROUTES = {("POST", "/api/services")}
+
+# Форматы, которые принимаются как логотип: MIME-тип -> расширение файла
+LOGO_TYPES = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp"
+}
+
+class LogoCache:
+    """
+    LRU-кэш логотипов в виде data URI с ограничением по суммарному размеру.
+    Запись привязана к mtime файла: если файл изменился, она считается промахом и перезаписывается.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # имя файла -> (mtime_ns, data URI)
+        self._lock = threading.Lock()
+
+    def get(self, file_name, mtime_ns):
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is None or entry[0] != mtime_ns:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_name)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, file_name, mtime_ns, data):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(file_name)
+            self._entries[file_name] = (mtime_ns, data)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, file_name):
+        with self._lock:
+            self._discard(file_name)
+
+    def _discard(self, file_name):
+        entry = self._entries.pop(file_name, None)
+        if entry is not None:
+            self.current_bytes -= len(entry[1])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+logo_cache = LogoCache(logo_config["cache_max_bytes"])
+
+def logo_path(file_name):
+    """
+    Путь к файлу логотипа или None, если файла нет. Имена с путём внутри отбрасываются,
+    чтобы через маршрут нельзя было прочитать что-то вне папки логотипов.
+    """
+    if not file_name or os.path.basename(file_name) != file_name:
+        return None
+    path = os.path.join(LOGOS_DIR, file_name)
+    return path if os.path.isfile(path) else None
+
+def sniff_logo_type(head):
+    """MIME-тип картинки по первым байтам файла или None, если формат не из LOGO_TYPES."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def _write_chunk(file, digest, chunk):
+    file.write(chunk)
+    digest.update(chunk)
+
+def is_content_addressed(file_name):
+    """True для логотипа (или его копии), названного по хэшу содержимого."""
+    return CONTENT_ADDRESSED_NAME.match(file_name.partition("@")[0]) is not None
+
+def _store_file(temp_path, file_name):
+    """
+    Переносит временный файл под имя по хэшу. Если такой файл уже есть, временный удаляется,
+    а у существующего (и его копий) обновляется время изменения - по нему сборка мусора
+    не трогает только что использованные логотипы. Возвращает True, если файл новый.
+    """
+    path = os.path.join(LOGOS_DIR, file_name)
+    if os.path.isfile(path):
+        os.remove(temp_path)
+        for name in (file_name, *thumbnail_names(file_name)):
+            try:
+                os.utime(os.path.join(LOGOS_DIR, name))
+            except FileNotFoundError:
+                pass
+        return False
+    os.replace(temp_path, path)
+    return True
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def save_logo_upload(upload):
+    """
+    Сохраняет загруженный логотип в LOGOS_DIR под именем <sha256 содержимого><расширение по формату>.
+    Одинаковые картинки хранятся одним файлом. Загрузка читается и пишется во временный файл
+    порциями (запись и хэширование - в пуле потоков, не в event loop), а на место переносится
+    атомарным os.replace, поэтому недописанных файлов под именем по хэшу не бывает.
+    Возвращает имя файла. Ошибки: 400 - пустой файл, 413 - больше logo_config["max_upload_bytes"],
+    415 - не картинка из LOGO_TYPES.
+
+    К этому моменту Starlette уже принял тело запроса целиком, поэтому слишком большие
+    запросы отсекает раньше, до разбора тела, LogoUploadLimitMiddleware.
+    """
+    max_bytes = logo_config["max_upload_bytes"]
+    if upload.size == 0:
+        raise HTTPException(status_code=400, detail="Пустое содержимое файла")
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Логотип больше {max_bytes} байт")
+
+    chunk = await upload.read(logo_config["upload_chunk_bytes"])
+    if not chunk:
+        raise HTTPException(status_code=400, detail="Пустое содержимое файла")
+    # Заявленному типу (application/octet-stream, image/jpg и т.п.) не доверяем: формат определяется по содержимому
+    media_type = sniff_logo_type(chunk)
+    if media_type is None:
+        raise HTTPException(status_code=415, detail="Логотип должен быть картинкой PNG, JPEG, GIF или WebP")
+
+    await run_in_threadpool(os.makedirs, LOGOS_DIR, exist_ok=True)
+    # Временный файл в той же папке, чтобы os.replace не переносил данные между файловыми системами
+    descriptor, temp_path = await run_in_threadpool(tempfile.mkstemp, dir=LOGOS_DIR, prefix=".upload-", suffix=".tmp")
+    digest = hashlib.sha256()
+    try:
+        size = 0
+        with os.fdopen(descriptor, "wb") as temp_file:
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Логотип больше {max_bytes} байт")
+                await run_in_threadpool(_write_chunk, temp_file, digest, chunk)
+                chunk = await upload.read(logo_config["upload_chunk_bytes"])
+        file_name = f"{digest.hexdigest()}{LOGO_TYPES[media_type]}"
+        created = await run_in_threadpool(_store_file, temp_path, file_name)
+    except BaseException:
+        await run_in_threadpool(_remove_file, temp_path)
+        raise
+
+    if created:
+        # Уменьшенные копии; если картинку не удалось разобрать, клиенты получат оригинал
+        try:
+            await run_in_threadpool(generate_thumbnails, os.path.join(LOGOS_DIR, file_name))
+        except Exception as error:
+            logger.warning("Не удалось создать копии логотипа %s: %s", file_name, error)
+    return file_name
+
+class LogoUploadLimitMiddleware:
+    """
+    ASGI-middleware: ограничивает размер тела запросов к LOGO_UPLOAD_ROUTES до разбора формы.
+    Запрос с Content-Length больше предела получает 413 сразу, без чтения тела; тело без
+    Content-Length (chunked) считается по мере чтения, и чтение прерывается с 413, как только
+    предел превышен. Предел - размер логотипа плюс запас на остальные поля формы.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in LOGO_UPLOAD_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = logo_config["max_upload_bytes"] + logo_config["upload_form_overhead_bytes"]
+        too_large = HTTPException(status_code=413, detail=f"Логотип больше {logo_config['max_upload_bytes']} байт")
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > max_bytes:
+                response = JSONResponse({"detail": too_large.detail}, status_code=413, headers={"Connection": "close"})
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI пробрасывает HTTPException из разбора тела как есть
+                    raise too_large
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def logo_variant(file_name, size=None, media_type="image/jpeg"):
+    """
+    Имя файла, который отдаётся вместо логотипа file_name: копия размера не меньше size
+    в формате media_type, если она есть, иначе сам оригинал.
+    """
+    if size is not None:
+        variant = thumbnail_name(file_name, pick_size(size), media_type)
+        if logo_path(variant) is not None:
+            return variant
+    return file_name
+
+def logo_media_type(file_name, content=None):
+    """MIME-тип логотипа: по содержимому, если оно есть, иначе по расширению."""
+    media_type = sniff_logo_type(content) if content else None
+    return media_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+def logo_data_uri(file_name, size=None):
+    """Логотип в виде data URI. Блокирующая (stat и чтение файла): вызывается в пуле потоков."""
+    if logo_path(file_name) is None:
+        return None
+    # Для data URI берётся JPEG-копия: старые клиенты, которым нужен этот режим, могут не знать WebP
+    file_name = logo_variant(file_name, size, "image/jpeg")
+    path = logo_path(file_name)
+    mtime_ns = os.stat(path).st_mtime_ns
+    data = logo_cache.get(file_name, mtime_ns)
+    if data is None:
+        with open(path, "rb") as image_file:
+            content = image_file.read()
+        record_logo_read("data_uri", len(content))
+        image = base64.b64encode(content).decode("utf-8")
+        data = f"data:{logo_media_type(file_name, content)};base64,{image}"
+        logo_cache.put(file_name, mtime_ns, data)
+    return data
+
+def _resolve_logo(file_name, inline, size):
+    """data URI логотипа (inline) или имя существующего файла; None, если файла нет. Блокирующая."""
+    if inline:
+        return logo_data_uri(file_name, size)
+    return file_name if logo_path(file_name) is not None else None
+
+async def logo_references(request: Request, file_names, inline=None, size=None):
+    """
+    Значения поля с логотипом в ответах API для списка логотипов, в том же порядке:
+    ссылка на /api/logos/... или, в режиме совместимости, сама картинка в виде data URI.
+    С size - ссылка на уменьшенную копию (или сама копия в data URI). Без своего логотипа
+    (имя пустое) у сервиса логотип по умолчанию, logo_config["default"].
+
+    Файлы проверяются и читаются в пуле потоков одним вызовом на весь список, по разу
+    на различное имя, чтобы не блокировать event loop на каждом сервисе.
+    """
+    if inline is None:
+        inline = logo_config["inline"]
+    file_names = [file_name or logo_config["default"] for file_name in file_names]
+    resolved = await run_in_threadpool(
+        lambda: {file_name: _resolve_logo(file_name, inline, size) for file_name in set(file_names)}
+    )
+
+    references = []
+    for file_name in file_names:
+        value = resolved[file_name]
+        if value is not None and not inline:
+            url = request.url_for("get_logo", file_name=value)
+            if size is not None:
+                url = url.include_query_params(size=size)
+            value = str(url)
+        references.append(value)
+    return references
+
+async def logo_reference(request: Request, file_name, inline=None, size=None):
+    """Значение поля с логотипом для одного сервиса (см. logo_references)."""
+    return (await logo_references(request, [file_name], inline, size))[0]
+
+def _is_not_modified(request: Request, etag, stat_result):
+    if request.headers.get("if-none-match") is not None:
+        # If-None-Match приоритетнее If-Modified-Since (RFC 9110, 13.1.3)
+        return etag_matches(request, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= since
+    return False
+
+@logos_route.get("/api/logos/{file_name}", name="get_logo", tags=["Коллекция сервисов"])
+async def get_logo(file_name: str, request: Request, size: Optional[int] = Query(None, ge=1)):
+    """
+    Отдаёт логотип сервиса файлом с заголовками для кэширования.
+    На условный запрос с актуальным ETag/датой отвечает 304 без тела.
+
+    Параметры:
+    - size: Нужный размер в пикселях. Отдаётся заготовленная копия не меньше этого размера:
+      WebP, если клиент принимает его (заголовок Accept), иначе JPEG. Если копий нет - оригинал.
+    """
+    if logo_path(file_name) is None:
+        raise HTTPException(status_code=404, detail="Логотип не найден")
+    if size is not None:
+        media_type = "image/webp" if "image/webp" in request.headers.get("accept", "") else "image/jpeg"
+        file_name = logo_variant(file_name, size, media_type)
+    path = logo_path(file_name)
+
+    stat_result = os.stat(path)
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    if is_content_addressed(file_name):
+        # Содержимое файла с именем по хэшу не меняется: браузер может не перепроверять его никогда
+        etag = f'"{file_name}"'
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = f"public, max-age={logo_config['max_age']}"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": cache_control
+    }
+    if size is not None:
+        # Формат копии зависит от Accept, поэтому кэши должны различать ответы по нему
+        headers["Vary"] = "Accept"
+
+    if _is_not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse читает файл с диска частями, а не целиком в память
+    record_logo_read("file", stat_result.st_size)
+    return FileResponse(path, media_type=logo_media_type(file_name), headers=headers, stat_result=stat_result)
+
+@logos_route.get("/api/logos-cache/stats", tags=["Коллекция сервисов"])
+async def get_logo_cache_stats():
+    """
+    Счётчики кэша логотипов: попадания, промахи, вытеснения и занятый объём.
+    """
+    return logo_cache.stats()
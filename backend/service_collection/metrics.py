@@ -0,0 +1,115 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from contextvars import ContextVar
+from .database import db, pool_config, query_observers
+import time
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:
+    generate_latest = None
+
+metrics_route = APIRouter()
+
+# Запросы к БД текущего HTTP-запроса: [число, суммарное время в секундах]
+_request_queries = ContextVar("request_queries", default=None)
+
+if generate_latest is not None:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса до последнего байта ответа",
+        ["method", "route", "status"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    )
+    REQUESTS_IN_PROGRESS = Gauge(
+        "http_requests_in_progress",
+        "HTTP-запросы, которые обрабатываются прямо сейчас",
+        ["method"]
+    )
+    DB_QUERIES_PER_REQUEST = Histogram(
+        "db_queries_per_request",
+        "Число запросов к БД на один HTTP-запрос",
+        ["route"],
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250)
+    )
+    DB_TIME_PER_REQUEST = Histogram(
+        "db_query_seconds_per_request",
+        "Суммарное время запросов к БД на один HTTP-запрос",
+        ["route"],
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+    )
+    DB_QUERIES = Counter("db_queries_total", "Все запросы к БД")
+    DB_QUERY_SECONDS = Counter("db_query_seconds_total", "Суммарное время всех запросов к БД")
+    POOL_MAX_SIZE = Gauge("db_pool_max_size", "Максимальный размер пула соединений")
+    POOL_IN_USE = Gauge("db_pool_connections_in_use", "Соединения, выданные запросам")
+    POOL_WAITING = Gauge("db_pool_requests_waiting", "Запросы, ожидающие свободное соединение")
+    LOGO_READ_BYTES = Counter(
+        "logo_read_bytes_total",
+        "Прочитано байт файлов логотипов",
+        ["source"]
+    )
+
+    POOL_MAX_SIZE.set_function(lambda: pool_config["max_size"])
+    POOL_IN_USE.set_function(lambda: db.in_use)
+    POOL_WAITING.set_function(lambda: db.waiting)
+
+def _observe_query(query, params, seconds):
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(seconds)
+    counters = _request_queries.get()
+    if counters is not None:
+        counters[0] += 1
+        counters[1] += seconds
+
+if generate_latest is not None:
+    query_observers.append(_observe_query)
+
+def record_logo_read(source, size):
+    """Учитывает чтение файла логотипа: source - file (отдача файлом) или data_uri (кодирование в JSON)."""
+    if generate_latest is not None:
+        LOGO_READ_BYTES.labels(source=source).inc(size)
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время запроса до конца отправки тела (включая потоковые ответы),
+    запросы в работе и запросы к БД на каждый HTTP-запрос. Маршрут в метках - шаблон пути
+    (/components/{component_id}), а не сам путь, чтобы число рядов метрик не росло.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or generate_latest is None:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+        counters = [0, 0.0]
+        token = _request_queries.set(counters)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(method=method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method=method).dec()
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(method=method, route=route, status=str(status[0])).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(route=route).observe(counters[0])
+            DB_TIME_PER_REQUEST.labels(route=route).observe(counters[1])
+
+@metrics_route.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Метрики в формате Prometheus.
+    """
+    if generate_latest is None:
+        raise HTTPException(status_code=503, detail="Не установлен пакет prometheus_client")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
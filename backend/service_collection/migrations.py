@@ -0,0 +1,137 @@
+"""
+Версионные миграции схем services и components. Миграция - SQL-файл в папке
+backend/migrations с именем <версия>_<описание>.sql; применённые версии записываются
+в таблицу public.schema_migrations, каждый файл применяется в своей транзакции.
+
+Запуск из командной строки (из папки backend):
+    python -m service_collection.migrations status
+    python -m service_collection.migrations up [--target 0002]
+"""
+from .database import db
+from .logging_config import setup_logging
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+# Ключ advisory-блокировки: два процесса не применяют миграции одновременно
+MIGRATIONS_LOCK_ID = 7_310_015
+
+CREATE_MIGRATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS public.schema_migrations (
+        version text PRIMARY KEY,
+        name text NOT NULL,
+        checksum text NOT NULL,
+        applied_at timestamptz NOT NULL DEFAULT now()
+    )
+'''
+
+def list_migrations():
+    """Файлы миграций по возрастанию версии: список словарей version, name, path, checksum."""
+    migrations = []
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not file_name.endswith(".sql"):
+            continue
+        version, _, name = file_name[:-len(".sql")].partition("_")
+        path = os.path.join(MIGRATIONS_DIR, file_name)
+        with open(path, "rb") as file:
+            checksum = hashlib.sha256(file.read()).hexdigest()
+        migrations.append({"version": version, "name": name, "path": path, "checksum": checksum})
+    return migrations
+
+async def _applied(cursor):
+    await cursor.execute("SELECT version, checksum, applied_at FROM public.schema_migrations ORDER BY version")
+    return {row['version']: row for row in await cursor.fetchall()}
+
+async def migration_status(connection):
+    """
+    Состояние каждой миграции: applied, pending или changed (файл изменён после применения).
+    """
+    cursor = connection.cursor()
+    try:
+        await cursor.execute(CREATE_MIGRATIONS_TABLE)
+        await connection.commit()
+        applied = await _applied(cursor)
+    finally:
+        await cursor.close()
+
+    result = []
+    for migration in list_migrations():
+        row = applied.get(migration["version"])
+        if row is None:
+            state = "pending"
+        elif row['checksum'] != migration["checksum"]:
+            state = "changed"
+        else:
+            state = "applied"
+        result.append({
+            "version": migration["version"],
+            "name": migration["name"],
+            "state": state,
+            "applied_at": row['applied_at'].isoformat() if row is not None else None
+        })
+    return result
+
+async def migrate(connection, target=None):
+    """
+    Применяет по порядку ещё не применённые миграции (до версии target включительно).
+    Возвращает список применённых версий.
+    """
+    cursor = connection.cursor()
+    applied_now = []
+    try:
+        await cursor.execute(CREATE_MIGRATIONS_TABLE)
+        await connection.commit()
+        await cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
+        try:
+            applied = await _applied(cursor)
+            for migration in list_migrations():
+                if target is not None and migration["version"] > target:
+                    break
+                if migration["version"] in applied:
+                    continue
+                logger.info("Применение миграции %s_%s...", migration['version'], migration['name'])
+                with open(migration["path"], encoding="utf-8") as file:
+                    sql = file.read()
+                try:
+                    await cursor.execute(sql)
+                    await cursor.execute(
+                        "INSERT INTO public.schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (migration["version"], migration["name"], migration["checksum"])
+                    )
+                    await connection.commit()
+                except Exception as error:
+                    await connection.rollback()
+                    logger.error("Миграция %s_%s не применена: %s", migration['version'], migration['name'], error)
+                    raise
+                applied_now.append(migration["version"])
+        finally:
+            await cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_ID,))
+            await connection.commit()
+    finally:
+        await cursor.close()
+    return applied_now
+
+async def _main(arguments):
+    try:
+        async with db.connection() as connection:
+            if arguments.command == "up":
+                applied = await migrate(connection, arguments.target)
+                print(f"Применено миграций: {len(applied)}")
+            else:
+                for migration in await migration_status(connection):
+                    print(f"{migration['version']}  {migration['state']:<8} {migration['name']}  {migration['applied_at'] or ''}")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Миграции схем services и components")
+    parser.add_argument("command", choices=["up", "status"], help="up - применить новые миграции, status - показать состояние")
+    parser.add_argument("--target", help="Применить миграции только до этой версии включительно")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,299 @@
+"""
+Импорт описания API в формате OpenAPI 3 / Swagger 2 (JSON или YAML) в коллекцию сервисов:
+пути и методы становятся точками обслуживания, их параметры - параметрами точек.
+
+Запуск из командной строки (из папки backend):
+    python -m service_collection.openapi_import spec.json --name "Weather API" --category-id 1
+"""
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from typing import Optional
+from .database import db
+from .logging_config import setup_logging
+from .services_routes import BulkParameter, BulkServicePoint, get_db, insert_service_points
+from .type_registry import type_registry
+import argparse
+import asyncio
+import json
+import logging
+import yaml
+
+try:
+    import ijson  # Потоковый разбор JSON: в памяти держится один путь, а не весь документ
+except ImportError:
+    ijson = None
+
+openapi_route = APIRouter()
+logger = logging.getLogger(__name__)
+
+openapi_config = {
+    # Сколько точек обслуживания накапливать перед пакетной вставкой
+    "batch_size": 500,
+    # Тип из components.type для параметров, чей тип не удалось сопоставить
+    "fallback_type": "string"
+}
+
+# Типы OpenAPI -> названия типов в components.type
+OPENAPI_TYPE_MAP = {
+    "string": "string",
+    "integer": "number",
+    "number": "number",
+    "boolean": "boolean",
+    "array": "array",
+    "object": "object",
+    "file": "string"
+}
+
+# Ошибки разбора файла спецификации - ответ 400, а не 500
+SPEC_ERRORS = (ValueError, yaml.YAMLError) + ((ijson.JSONError,) if ijson is not None else ())
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Верхнеуровневые разделы, которые нужны помимо paths
+HEADER_PREFIXES = ("info", "servers", "host", "basePath", "schemes", "parameters", "components.parameters")
+
+def _read_json_header(file):
+    """
+    Один потоковый проход по JSON: собирает только разделы HEADER_PREFIXES,
+    не материализуя paths.
+    """
+    header = {}
+    builder = None
+    builder_prefix = None
+    depth = 0
+    for prefix, event, value in ijson.parse(file):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    header[builder_prefix] = builder.value
+                    builder = None
+            continue
+        if prefix in HEADER_PREFIXES:
+            if event in ("start_map", "start_array"):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                builder_prefix = prefix
+                depth = 1
+            elif event not in ("map_key", "end_map", "end_array"):
+                header[prefix] = value
+    return header
+
+def load_spec(file, file_name=""):
+    """
+    Возвращает (разделы спецификации кроме paths, итератор пар (путь, описание пути)).
+    JSON при установленном ijson читается потоково в два прохода, YAML загружается целиком.
+    """
+    head = file.read(64).lstrip()
+    file.seek(0)
+    is_json = file_name.lower().endswith(".json") or head[:1] in (b"{", "{")
+
+    if is_json and ijson is not None:
+        header = _read_json_header(file)
+        file.seek(0)
+        return header, ijson.kvitems(file, "paths")
+
+    if is_json:
+        spec = json.load(file)
+    else:
+        spec = yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    components = spec.get("components") or {}
+    header = {prefix: spec[prefix] for prefix in HEADER_PREFIXES if prefix in spec}
+    if "parameters" in components:
+        header["components.parameters"] = components["parameters"]
+    return header, iter((spec.get("paths") or {}).items())
+
+def service_defaults(header):
+    """Адрес и описание сервиса из спецификации - на случай, если их не передали явно."""
+    info = header.get("info") or {}
+    servers = header.get("servers") or []
+    if servers:
+        uri = servers[0].get("url", "")
+    elif "host" in header:
+        scheme = (header.get("schemes") or ["https"])[0]
+        uri = f"{scheme}://{header['host']}{header.get('basePath', '')}"
+    else:
+        uri = ""
+    return uri, info.get("description") or info.get("title") or ""
+
+def _resolve_parameter(parameter, header):
+    reference = parameter.get("$ref")
+    if reference is None:
+        return parameter
+    # #/components/parameters/X (OpenAPI 3) или #/parameters/X (Swagger 2)
+    section, _, name = reference[2:].rpartition("/")
+    definitions = header.get(section.replace("/", ".")) or {}
+    return definitions.get(name)
+
+def _schema_type(schema):
+    if not schema or "$ref" in schema:
+        return "object"
+    return schema.get("type") or ("object" if "properties" in schema else "string")
+
+def _body_parameters(schema, description=""):
+    """Поля тела запроса верхнего уровня как параметры; тело без описания полей - один параметр body."""
+    if schema and schema.get("properties"):
+        required = set(schema.get("required") or [])
+        return [
+            (name, prop.get("description", ""), name in required, _schema_type(prop))
+            for name, prop in schema["properties"].items()
+        ]
+    return [("body", description, True, _schema_type(schema))]
+
+def _operation_parameters(operation, path_parameters, header):
+    """
+    Параметры операции в виде (имя, описание, обязательность, тип OpenAPI).
+    Параметры уровня операции переопределяют одноимённые параметры пути.
+    """
+    merged = {}
+    for parameter in list(path_parameters) + list(operation.get("parameters") or []):
+        parameter = _resolve_parameter(parameter, header)
+        if parameter:
+            merged[(parameter.get("name"), parameter.get("in"))] = parameter
+
+    result = []
+    for (name, location), parameter in merged.items():
+        if location == "body":
+            # Swagger 2: тело запроса описано параметром in: body
+            result.extend(_body_parameters(parameter.get("schema"), parameter.get("description", "")))
+            continue
+        param_type = parameter.get("type") or _schema_type(parameter.get("schema"))
+        result.append((name, parameter.get("description", ""), bool(parameter.get("required")), param_type))
+
+    request_body = operation.get("requestBody")
+    if request_body:
+        content = request_body.get("content") or {}
+        media = content.get("application/json") or next(iter(content.values()), {})
+        result.extend(_body_parameters(media.get("schema"), request_body.get("description", "")))
+    return result
+
+def iter_service_points(paths, header, type_names):
+    """Превращает пути спецификации в точки обслуживания, по одной на пару путь + метод."""
+    for path, path_item in paths:
+        path_parameters = path_item.get("parameters") or []
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if operation is None:
+                continue
+            summary = operation.get("summary") or operation.get("operationId") or ""
+            parameters = []
+            for name, description, required, openapi_type in _operation_parameters(operation, path_parameters, header):
+                type_name = OPENAPI_TYPE_MAP.get(openapi_type, openapi_type)
+                if type_name not in type_names:
+                    type_name = openapi_config["fallback_type"]
+                parameters.append(BulkParameter(
+                    name=name,
+                    description=description or '',
+                    required=required,
+                    type=type_name
+                ))
+            yield BulkServicePoint(
+                uri=path,
+                description=f"{method.upper()} {summary}".strip(),
+                parameters=parameters
+            )
+
+def _next_batch(points, size):
+    batch = []
+    for point in points:
+        batch.append(point)
+        if len(batch) >= size:
+            break
+    return batch
+
+async def import_openapi(connection, file, file_name, name, category_id, uri=None, description=None):
+    """
+    Создаёт сервис с api_source='openapi' и заполняет его точками и параметрами из спецификации.
+    Разбор файла идёт в пуле потоков порциями, вставка - пакетами в одной транзакции.
+    Возвращает id сервиса и число созданных точек и параметров.
+    """
+    cursor = connection.cursor()
+    try:
+        await cursor.execute('SELECT id FROM services.service WHERE name = %s', (name,))
+        if await cursor.fetchone() is not None:
+            raise HTTPException(status_code=409, detail='Сервис с таким названием уже существует')
+
+        type_ids = {type_name: type_id for type_id, type_name in await type_registry.all(cursor)}
+        if openapi_config["fallback_type"] not in type_ids:
+            raise HTTPException(status_code=500, detail=f"Тип '{openapi_config['fallback_type']}' не найден")
+
+        header, paths = await run_in_threadpool(load_spec, file, file_name)
+        default_uri, default_description = service_defaults(header)
+
+        await cursor.execute(
+            '''
+            INSERT INTO services.service (uri, token, name, category_id, logo, description, api_source)
+            VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+            ''',
+            (uri or default_uri, 'no', name, category_id, None, description or default_description, 'openapi')
+        )
+        service_id = (await cursor.fetchone())['id']
+
+        points = iter_service_points(paths, header, type_ids)
+        point_count = 0
+        parameter_count = 0
+        while True:
+            batch = await run_in_threadpool(_next_batch, points, openapi_config["batch_size"])
+            if not batch:
+                break
+            created = await insert_service_points(cursor, [(service_id, point) for point in batch], type_ids)
+            point_count += len(created)
+            parameter_count += sum(len(point["parameterIds"]) for point in created)
+
+        await connection.commit()
+        logger.info("Импорт OpenAPI для '%s': точек обслуживания %s, параметров %s.", name, point_count, parameter_count)
+        return {"id": service_id, "name": name, "servicePoints": point_count, "parameters": parameter_count}
+    except Exception:
+        await connection.rollback()
+        raise
+    finally:
+        await cursor.close()
+
+@openapi_route.post('/api/services/import-openapi', tags=["Коллекция сервисов"])
+async def import_openapi_service(
+    name: str = Form(...),
+    categoryId: int = Form(...),
+    spec: UploadFile = File(...),
+    uri: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    db=Depends(get_db)
+):
+    """
+    Создаёт сервис из загруженной спецификации OpenAPI 3 / Swagger 2 (JSON или YAML).
+    Адрес и описание сервиса по умолчанию берутся из самой спецификации.
+    """
+    try:
+        result = await import_openapi(db, spec.file, spec.filename or "", name, categoryId, uri, description)
+        return JSONResponse(content=result, status_code=201)
+    except HTTPException:
+        raise
+    except SPEC_ERRORS as error:
+        logger.error("Error parsing OpenAPI spec: %s", error)
+        raise HTTPException(status_code=400, detail='Не удалось разобрать спецификацию')
+    except Exception as error:
+        logger.error("Error importing OpenAPI spec: %s", error)
+        raise HTTPException(status_code=500, detail='Error importing OpenAPI spec')
+
+async def _main(arguments):
+    with open(arguments.spec, "rb") as file:
+        async with db.connection() as connection:
+            result = await import_openapi(
+                connection, file, arguments.spec, arguments.name, arguments.category_id,
+                arguments.uri, arguments.description
+            )
+    await db.close()
+    print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == "__main__":
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Импорт спецификации OpenAPI/Swagger в коллекцию сервисов")
+    parser.add_argument("spec", help="Путь к файлу спецификации (.json, .yaml, .yml)")
+    parser.add_argument("--name", required=True, help="Имя создаваемого сервиса")
+    parser.add_argument("--category-id", type=int, required=True, help="id категории сервиса")
+    parser.add_argument("--uri", help="Адрес сервиса (по умолчанию из servers/host спецификации)")
+    parser.add_argument("--description", help="Описание сервиса (по умолчанию из info)")
+    asyncio.run(_main(parser.parse_args()))
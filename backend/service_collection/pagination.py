@@ -0,0 +1,62 @@
+from fastapi import HTTPException, Request
+import base64
+import json
+
+# Максимальный размер страницы для списочных маршрутов
+MAX_PAGE_SIZE = 500
+
+# id записей - bigint; больший id в курсоре база не примет
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+def encode_cursor(last_id):
+    """Непрозрачный токен следующей страницы: id последней отданной записи."""
+    payload = json.dumps({"after": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(token):
+    """Возвращает id, после которого начинается страница, или None для первой страницы."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"]
+        # bool - подкласс int, но id им не бывает
+        if not isinstance(after, int) or isinstance(after, bool) or not 0 <= after <= MAX_CURSOR_ID:
+            raise ValueError(after)
+        return after
+    except (ValueError, KeyError, TypeError, RecursionError):
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
+
+def parse_fields(fields, allowed):
+    """
+    Разбирает параметр fields=a,b,c. Без параметра возвращает None - отдаются все поля.
+    """
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные поля: {', '.join(unknown) or fields}. Доступны: {', '.join(allowed)}"
+        )
+    return requested
+
+def like_prefix(prefix):
+    """Шаблон LIKE для поиска по началу строки; спецсимволы LIKE экранируются."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+def page_headers(request: Request, rows, limit):
+    """
+    Заголовки со ссылкой на следующую страницу. rows - выборка с limit + 1 строками:
+    лишняя строка означает, что следующая страница есть.
+    """
+    if limit is None or len(rows) <= limit:
+        return {}
+    next_cursor = encode_cursor(rows[limit - 1]["id"])
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    return {
+        "X-Next-Cursor": next_cursor,
+        "Link": f'<{next_url}>; rel="next"'
+    }
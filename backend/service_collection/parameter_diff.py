@@ -0,0 +1,37 @@
+"""
+Сравнение присланных параметров (функции или точки обслуживания) с сохранёнными.
+Сохранение - слияние: присланные параметры обновляются или добавляются, а не присланные
+остаются как есть. Удаляются только параметры, явно перечисленные в removed_ids.
+"""
+
+def plan_parameter_changes(stored, submitted, removed_ids=()):
+    """
+    stored - словарь {id: значения колонок} сохранённых параметров;
+    submitted - список пар (id или None для нового параметра, значения колонок);
+    removed_ids - id параметров, которые нужно удалить.
+
+    Возвращает словарь:
+    - changed: пары (id, значения) для параметров, значения которых изменились;
+    - added: значения новых параметров;
+    - removed: id удаляемых параметров;
+    - kept: id сохранённых параметров, которые остаются после сохранения;
+    - foreign: присланные или удаляемые id, которых нет среди сохранённых;
+    - conflicting: id, которые одновременно присланы и перечислены в removed_ids.
+    """
+    submitted_ids = {parameter_id for parameter_id, _ in submitted if parameter_id is not None}
+    removed = list(dict.fromkeys(removed_ids))
+    removed_set = set(removed)
+    return {
+        "changed": [
+            (parameter_id, values)
+            for parameter_id, values in submitted
+            if parameter_id in stored and values != stored[parameter_id]
+        ],
+        "added": [values for parameter_id, values in submitted if parameter_id is None],
+        "removed": [parameter_id for parameter_id in removed if parameter_id in stored],
+        "kept": [parameter_id for parameter_id in stored if parameter_id not in removed_set],
+        "foreign": sorted(
+            parameter_id for parameter_id in submitted_ids | removed_set if parameter_id not in stored
+        ),
+        "conflicting": sorted(submitted_ids & removed_set)
+    }
@@ -0,0 +1,165 @@
+"""
+Профилирование SQL по запросам (включается переменной окружения SQL_PROFILING=1).
+Для каждого HTTP-запроса записываются все выполненные запросы к БД с параметрами и временем
+(по умолчанию у параметров только число и типы, без значений - см. describe_params);
+одинаковые по форме запросы, повторённые не меньше n_plus_one_threshold раз, помечаются как N+1,
+запросы дольше slow_query_ms - как медленные. Итог пишется в лог записью sql_profile на запрос,
+а при SQL_PROFILING_DEBUG=1 ещё и отдаётся в заголовке Server-Timing.
+
+Выключенное профилирование не регистрирует ни наблюдателя запросов, ни middleware.
+"""
+from contextvars import ContextVar
+from .database import query_observers
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+profiling_config = {
+    "enabled": os.getenv("SQL_PROFILING", "0") == "1",
+    # Сводка в заголовке Server-Timing (видна во вкладке Network браузера)
+    "debug": os.getenv("SQL_PROFILING_DEBUG", "0") == "1",
+    # С какого числа одинаковых запросов за HTTP-запрос считать это N+1
+    "n_plus_one_threshold": int(os.getenv("SQL_PROFILING_N_PLUS_ONE", 5)),
+    "slow_query_ms": float(os.getenv("SQL_PROFILING_SLOW_MS", 100)),
+    # Значения параметров в логе (иначе только число и типы). Там бывают токены и пароли,
+    # поэтому только для отладки; запросы к таблицам авторизации не раскрываются никогда
+    "log_param_values": os.getenv("SQL_PROFILING_PARAMS", "0") == "1",
+    # Длина текста параметров в логе
+    "max_params_length": 200
+}
+
+# Таблицы с секретами (токены, client_secret): значения параметров их запросов не пишутся в лог
+SECRET_TABLES = re.compile(r"\bservices\.(default_auth|oauth_auth)\b", re.IGNORECASE)
+
+# Запросы к БД текущего HTTP-запроса: список (текст, параметры, секунды)
+_request_statements = ContextVar("request_statements", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+# Повторяющиеся группы VALUES (%s, %s), (%s, %s), ... схлопываются в одну
+_REPEATED_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+def statement_shape(query):
+    """Форма запроса: текст без лишних пробелов и с одной группой VALUES вместо пачки."""
+    if not isinstance(query, str):
+        query = str(query)
+    return _REPEATED_GROUPS.sub(r"\1", _WHITESPACE.sub(" ", query).strip())
+
+def _type_name(value):
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def describe_params(query, params):
+    """
+    Параметры запроса для лога. По умолчанию - только типы (у последовательностей и длина),
+    например ['str', 'int', 'list[3]']; значения - только при log_param_values и не для SECRET_TABLES.
+    """
+    if params is None:
+        return None
+    if profiling_config["log_param_values"] and not SECRET_TABLES.search(str(query)):
+        text = repr(params)
+    elif isinstance(params, dict):
+        text = repr({key: _type_name(value) for key, value in params.items()})
+    elif isinstance(params, (list, tuple)):
+        text = repr([_type_name(value) for value in params])
+    else:
+        text = _type_name(params)
+    return text[:profiling_config["max_params_length"]]
+
+def _observe_statement(query, params, seconds):
+    statements = _request_statements.get()
+    if statements is not None:
+        statements.append((query, params, seconds))
+
+def summarize(statements):
+    """Сводка по запросам одного HTTP-запроса: общее время, N+1 и медленные запросы."""
+    shapes = {}
+    for query, params, seconds in statements:
+        shape = statement_shape(query)
+        entry = shapes.setdefault(shape, {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+
+    slow_seconds = profiling_config["slow_query_ms"] / 1000
+    return {
+        "queries": len(statements),
+        "db_ms": round(sum(seconds for _, _, seconds in statements) * 1000, 3),
+        "n_plus_one": [
+            {"sql": shape, "count": entry["count"], "ms": round(entry["seconds"] * 1000, 3)}
+            for shape, entry in shapes.items()
+            if entry["count"] >= profiling_config["n_plus_one_threshold"]
+        ],
+        "slow": [
+            {"sql": statement_shape(query), "params": describe_params(query, params), "ms": round(seconds * 1000, 3)}
+            for query, params, seconds in statements
+            if seconds >= slow_seconds
+        ],
+        "statements": [
+            {"sql": statement_shape(query), "params": describe_params(query, params), "ms": round(seconds * 1000, 3)}
+            for query, params, seconds in statements
+        ]
+    }
+
+def server_timing(summary, total_seconds):
+    """Значение заголовка Server-Timing по сводке."""
+    parts = [
+        f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"',
+        f"app;dur={round(total_seconds * 1000, 3)}"
+    ]
+    if summary["n_plus_one"]:
+        worst = max(entry["count"] for entry in summary["n_plus_one"])
+        parts.append(f'n-plus-one;desc="{len(summary["n_plus_one"])} shapes, up to {worst} repeats"')
+    if summary["slow"]:
+        parts.append(f'slow-sql;desc="{len(summary["slow"])} queries"')
+    return ", ".join(parts)
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware профилирования. Server-Timing отражает запросы, выполненные до отправки
+    заголовков ответа; в лог попадают все, включая выполненные во время потоковой отдачи тела.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements = []
+        token = _request_statements.set(statements)
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profiling_config["debug"]:
+                    value = server_timing(summarize(statements), time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_statements.reset(token)
+            summary = summarize(statements)
+            logger.info("sql_profile", extra={
+                "event": "sql_profile",
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status[0],
+                "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                **summary
+            })
+
+def install(app):
+    """Подключает профилирование к приложению, если оно включено в profiling_config."""
+    if not profiling_config["enabled"]:
+        return
+    query_observers.append(_observe_statement)
+    app.add_middleware(ProfilingMiddleware)
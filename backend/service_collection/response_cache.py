@@ -0,0 +1,143 @@
+from fastapi import APIRouter
+from collections import OrderedDict
+import json
+import os
+import time
+
+cache_route = APIRouter()
+
+response_cache_config = {
+    # "memory" - LRU в памяти процесса (достаточно для одного воркера uvicorn);
+    # "redis" - общий кэш для нескольких воркеров, нужен пакет redis
+    "backend": os.getenv("RESPONSE_CACHE_BACKEND", "memory"),
+    "redis_url": os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+    "max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000)),
+    # Страховочный срок жизни записи в секундах
+    "ttl": int(os.getenv("RESPONSE_CACHE_TTL", 300))
+}
+
+# Меняется при изменении формата закэшированных ответов, чтобы не читать записи старого формата
+CACHE_FORMAT = "v1"
+
+class MemoryBackend:
+    """LRU-кэш в памяти процесса с ограничением числа записей и сроком жизни."""
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ключ -> (момент устаревания, значение)
+        self._versions = {}
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_version(self, entity):
+        return self._versions.get(entity, 0)
+
+    async def bump_version(self, entity):
+        self._versions[entity] = self._versions.get(entity, 0) + 1
+
+class RedisBackend:
+    """Кэш в Redis (или совместимом сервере): общий для всех воркеров приложения."""
+    def __init__(self, url, ttl):
+        import redis.asyncio as redis
+        self.ttl = ttl
+        self._client = redis.from_url(url)
+
+    async def get(self, key):
+        value = await self._client.get(f"response-cache:{key}")
+        return None if value is None else json.loads(value)
+
+    async def set(self, key, value):
+        await self._client.set(f"response-cache:{key}", json.dumps(value), ex=self.ttl)
+
+    async def get_version(self, entity):
+        version = await self._client.get(f"response-cache-version:{entity}")
+        return int(version or 0)
+
+    async def bump_version(self, entity):
+        await self._client.incr(f"response-cache-version:{entity}")
+
+class ResponseCache:
+    """
+    Кэш ответов детальных маршрутов. Ключ записи - сущность и её версия; изменяющие маршруты
+    увеличивают версию сущности, и все прежние записи перестают читаться.
+
+    Версия запоминается до чтения из базы: если запись изменится, пока ответ строится,
+    он сохранится под уже устаревшей версией и никому не будет отдан.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = {}
+        self.misses = {}
+
+    async def get(self, endpoint, entity):
+        """
+        Возвращает (закэшированный ответ маршрута endpoint по сущности или None,
+        версия сущности для последующего set).
+        """
+        version = await self.backend.get_version(entity)
+        value = await self.backend.get(f"{CACHE_FORMAT}:{endpoint}:{entity}@{version}")
+        counters = self.misses if value is None else self.hits
+        counters[endpoint] = counters.get(endpoint, 0) + 1
+        return value, version
+
+    async def set(self, endpoint, entity, version, value):
+        await self.backend.set(f"{CACHE_FORMAT}:{endpoint}:{entity}@{version}", value)
+
+    async def invalidate(self, *entities):
+        for entity in entities:
+            await self.backend.bump_version(entity)
+
+    def stats(self):
+        endpoints = sorted(self.hits.keys() | self.misses.keys())
+        result = {}
+        for endpoint in endpoints:
+            hits = self.hits.get(endpoint, 0)
+            misses = self.misses.get(endpoint, 0)
+            result[endpoint] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+        return {"backend": response_cache_config["backend"], "endpoints": result}
+
+def _create_backend():
+    if response_cache_config["backend"] == "redis":
+        return RedisBackend(response_cache_config["redis_url"], response_cache_config["ttl"])
+    return MemoryBackend(response_cache_config["max_entries"], response_cache_config["ttl"])
+
+response_cache = ResponseCache(_create_backend())
+
+def component_entity(component_id):
+    return f"component:{component_id}"
+
+def service_entity(service_name):
+    return f"service:{service_name}"
+
+async def invalidate_component(component_id):
+    """Сбрасывает все закэшированные ответы по компоненту: детальный и список функций."""
+    if component_id is not None:
+        await response_cache.invalidate(component_entity(component_id))
+
+async def invalidate_service(*service_names):
+    await response_cache.invalidate(*(service_entity(name) for name in service_names if name is not None))
+
+@cache_route.get("/api/cache/stats", tags=["Кэш"])
+async def get_response_cache_stats():
+    """
+    Попадания и промахи кэша ответов по каждому маршруту.
+    """
+    return response_cache.stats()
@@ -0,0 +1,212 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from typing import Optional
+from .database import db
+from .pagination import MAX_PAGE_SIZE, like_prefix
+import html
+import logging
+import re
+
+search_route = APIRouter()
+logger = logging.getLogger(__name__)
+
+search_config = {
+    # Разметка совпадений в title и snippet
+    "start_sel": "<mark>",
+    "stop_sel": "</mark>"
+}
+
+# Временные метки совпадений от ts_headline (символы из области частного использования Unicode;
+# из текста каталога они вырезаются): разметка search_config подставляется после экранирования текста
+_HEADLINE_START = "\ue000"
+_HEADLINE_STOP = "\ue001"
+
+async def get_db():
+    # Соединение берётся из пула на время запроса и возвращается после ответа
+    async with db.connection() as connection:
+        yield connection
+
+# Документ полнотекстового поиска; выражение совпадает с индексами из migrations/0001_search_indexes.sql
+SEARCH_DOCUMENT = "to_tsvector('simple', coalesce({alias}.name, '') || ' ' || coalesce({alias}.description, ''))"
+SEARCH_QUERY = "websearch_to_tsquery('simple', %(q)s)"
+
+# Виды результатов: каждый - отдельный запрос, который находит совпадения по своим индексам
+# и сразу оставляет только лучшие window строк. Колонки у всех одинаковые.
+SEARCH_SOURCES = {
+    "service": f'''
+        SELECT 'service' AS kind, s.id, s.name AS title, s.description AS context,
+               s.name AS service_name, NULL::int AS component_id, NULL::int AS parent_id,
+               ts_rank({SEARCH_DOCUMENT.format(alias="s")}, {SEARCH_QUERY}) + similarity(s.name, %(q)s) AS rank
+        FROM services.service s
+        WHERE {SEARCH_DOCUMENT.format(alias="s")} @@ {SEARCH_QUERY}
+           OR s.name %% %(q)s OR s.name ILIKE %(pattern)s
+    ''',
+    "service_point": '''
+        SELECT 'service_point' AS kind, sp.id, sp.uri AS title, sp.description AS context,
+               s.name AS service_name, NULL::int AS component_id, s.id AS parent_id,
+               similarity(sp.uri, %(q)s) AS rank
+        FROM services.service_points sp
+        JOIN services.service s ON s.id = sp.service_id
+        WHERE sp.uri %% %(q)s OR sp.uri ILIKE %(pattern)s
+    ''',
+    "service_parameter": '''
+        SELECT 'service_parameter' AS kind, p.id, p.name AS title, p.description AS context,
+               s.name AS service_name, NULL::int AS component_id, sp.id AS parent_id,
+               similarity(p.name, %(q)s) AS rank
+        FROM services.service_parameters p
+        JOIN services.service_points sp ON sp.id = p.service_point_id
+        JOIN services.service s ON s.id = sp.service_id
+        WHERE p.name %% %(q)s OR p.name ILIKE %(pattern)s
+    ''',
+    "component": f'''
+        SELECT 'component' AS kind, c.id, c.name AS title, c.description AS context,
+               NULL AS service_name, c.id AS component_id, NULL::int AS parent_id,
+               ts_rank({SEARCH_DOCUMENT.format(alias="c")}, {SEARCH_QUERY}) + similarity(c.name, %(q)s) AS rank
+        FROM components.components c
+        WHERE {SEARCH_DOCUMENT.format(alias="c")} @@ {SEARCH_QUERY}
+           OR c.name %% %(q)s OR c.name ILIKE %(pattern)s
+    ''',
+    "function": '''
+        SELECT 'function' AS kind, f.id, f.name AS title, NULL AS context,
+               NULL AS service_name, f.id_of_component AS component_id, f.id_of_component AS parent_id,
+               similarity(f.name, %(q)s) AS rank
+        FROM components.component_function f
+        WHERE f.name %% %(q)s OR f.name ILIKE %(pattern)s
+    ''',
+    "component_parameter": '''
+        SELECT 'component_parameter' AS kind, p.id, p.name AS title,
+               concat_ws(' ', p.path, p.description) AS context,
+               NULL AS service_name, f.id_of_component AS component_id, f.id AS parent_id,
+               greatest(similarity(p.name, %(q)s), similarity(p.path, %(q)s)) AS rank
+        FROM components.component_function_parameter p
+        JOIN components.component_function f ON f.id = p.id_of_component_function
+        WHERE p.name %% %(q)s OR p.name ILIKE %(pattern)s
+           OR p.path %% %(q)s OR p.path ILIKE %(pattern)s
+    '''
+}
+
+def _highlight(text, q):
+    """
+    Размечает в коротком тексте (имя, адрес) все вхождения слов запроса без учёта регистра.
+    Текст из базы экранируется как HTML: в ответе разметкой может быть только выделение.
+    """
+    if not text:
+        return text
+    words = sorted({word for word in re.split(r"\s+", q) if word}, key=len, reverse=True)
+    if not words:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"{search_config['start_sel']}{html.escape(match.group(0))}{search_config['stop_sel']}")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
+
+def _snippet(headline):
+    """Экранирует фрагмент от ts_headline как HTML и заменяет временные метки разметкой."""
+    if headline is None:
+        return None
+    return (
+        html.escape(headline)
+        .replace(_HEADLINE_START, search_config["start_sel"])
+        .replace(_HEADLINE_STOP, search_config["stop_sel"])
+    )
+
+@search_route.get("/api/search", tags=["Поиск"])
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=2),
+    kind: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db=Depends(get_db)
+):
+    """
+    Поиск по сервисам (название, описание), точкам обслуживания (адрес), параметрам сервисов,
+    компонентам, функциям и параметрам функций (имя, путь). Ищутся слова запроса
+    (полнотекстовый поиск), подстрока и похожие написания (триграммы).
+
+    Параметры:
+    - q: Строка поиска.
+    - kind: Виды результатов через запятую: service, service_point, service_parameter,
+      component, function, component_parameter. По умолчанию - все.
+    - limit, offset: Страница результатов; ссылка на следующую приходит в заголовке Link.
+
+    Результаты упорядочены по релевантности; в title и snippet совпадения размечены.
+    """
+    kinds = list(SEARCH_SOURCES) if kind is None else [item.strip() for item in kind.split(",") if item.strip()]
+    unknown = [item for item in kinds if item not in SEARCH_SOURCES]
+    if unknown or not kinds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные виды: {', '.join(unknown) or kind}. Доступны: {', '.join(SEARCH_SOURCES)}"
+        )
+
+    # Каждому виду достаточно своих лучших offset + limit + 1 строк: остальные в страницу не попадут
+    branches = " UNION ALL ".join(
+        f"({SEARCH_SOURCES[item]} ORDER BY rank DESC, id LIMIT %(window)s)" for item in kinds
+    )
+    # ts_headline дорогой, поэтому считается только для строк страницы (и одной лишней)
+    query = f'''
+        WITH page AS (
+            SELECT * FROM ({branches}) AS found
+            ORDER BY rank DESC, kind, id
+            LIMIT %(page_size)s OFFSET %(offset)s
+        )
+        SELECT kind, id, title, service_name, component_id, parent_id, rank,
+               CASE WHEN context IS NULL OR context = '' THEN NULL
+                    ELSE ts_headline('simple', translate(context, %(markers)s, ''), {SEARCH_QUERY}, %(headline_options)s)
+               END AS snippet
+        FROM page
+        ORDER BY rank DESC, kind, id
+    '''
+    params = {
+        "q": q,
+        "pattern": "%" + like_prefix(q),
+        # Лучшие строки каждого вида, из которых собирается страница
+        "window": offset + limit + 1,
+        # Строки страницы и одна лишняя - признак следующей страницы
+        "page_size": limit + 1,
+        "offset": offset,
+        "markers": _HEADLINE_START + _HEADLINE_STOP,
+        "headline_options": (
+            f"StartSel={_HEADLINE_START}, StopSel={_HEADLINE_STOP}, "
+            "MaxWords=20, MinWords=5, MaxFragments=2"
+        )
+    }
+
+    cursor = None
+    try:
+        cursor = db.cursor()
+        await cursor.execute(query, params)
+        rows = await cursor.fetchall()
+
+        headers = {}
+        if len(rows) > limit:
+            next_url = request.url.include_query_params(offset=offset + limit)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+            rows = rows[:limit]
+
+        results = [
+            {
+                "kind": row['kind'],
+                "id": row['id'],
+                "title": _highlight(row['title'], q),
+                "snippet": _snippet(row['snippet']),
+                "serviceName": row['service_name'],
+                "componentId": row['component_id'],
+                "parentId": row['parent_id'],
+                "rank": round(float(row['rank']), 4)
+            }
+            for row in rows
+        ]
+        return JSONResponse(content=results, headers=headers)
+    except Exception as err:
+        logger.error("Error executing search: %s", err)
+        raise HTTPException(status_code=500, detail="Ошибка выполнения поиска")
+    finally:
+        if cursor is not None:
+            await cursor.close()
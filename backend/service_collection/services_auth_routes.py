@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from .database import db
 from pydantic import BaseModel
+import logging
 
 collection_auth_route = APIRouter()
+logger = logging.getLogger(__name__)
 
 class AuthService(BaseModel):
     serviceName: str
@@ -12,8 +14,10 @@ class AuthService(BaseModel):
     auth_id: int
     userID: int
 
-def get_db():
-    return db.get_connection()  # Возвращаем соединение
+async def get_db():
+    # Соединение берётся из пула на время запроса и возвращается после ответа
+    async with db.connection() as connection:
+        yield connection
     
 @collection_auth_route.post('/api/create-auth-service')
 async def create_auth_service(
@@ -28,8 +32,8 @@ async def create_auth_service(
     try:
         cursor = db.cursor()        # Проверяем, существует ли сервис с таким именем
         check_query = 'SELECT * FROM services.service WHERE name = %s'
-        cursor.execute(check_query, (serviceName,))
-        check_result = cursor.fetchone()
+        await cursor.execute(check_query, (serviceName,))
+        check_result = await cursor.fetchone()
 
         if not check_result:
             return JSONResponse(content={'detail': 'Сервиса с таким именем не существует'}, status_code=404)
@@ -41,25 +45,25 @@ async def create_auth_service(
             INSERT INTO services.default_auth ("token", service_id, type_id, user_id, "param_name")
             VALUES (%s, %s, %s, %s, %s)
         '''
-        cursor.execute(insert_query, (token, service_id, auth_id, userID, paramName))
+        await cursor.execute(insert_query, (token, service_id, auth_id, userID, paramName))
         
         # Подтверждение транзакции
-        db.commit()  
-        print("Авторизация добавлена в базу данных.")
+        await db.commit()  
+        logger.info("Авторизация для сервиса %s добавлена в базу данных.", serviceName)
         
         return JSONResponse(content={'message': f'Authorisation of {serviceName} added successfully.'}, status_code=201)
 
     except Exception as error:
-        print('Error inserting service:', error)
+        logger.error("Error inserting service: %s", error)
         
         raise HTTPException(status_code=500, detail='Error adding authorisation')
     
     finally:
         if cursor is not None:
             try:
-                cursor.close()
+                await cursor.close()
             except Exception as cursor_close_error:
-                print(f"Ошибка при закрытии курсора: {cursor_close_error}")
+                logger.warning("Ошибка при закрытии курсора: %s", cursor_close_error)
 
 
 
@@ -81,8 +85,8 @@ async def create_oauth_service(
 
         # Проверяем, существует ли сервис с таким именем
         check_query = 'SELECT * FROM services.service WHERE name = %s'
-        cursor.execute(check_query, (serviceName,))
-        check_result = cursor.fetchone()
+        await cursor.execute(check_query, (serviceName,))
+        check_result = await cursor.fetchone()
 
         if not check_result:
             return JSONResponse(content={'detail': 'Сервиса с таким именем не существует'}, status_code=404)
@@ -95,21 +99,21 @@ async def create_oauth_service(
             INSERT INTO services.oauth_auth (client_id,service_id , client_secret, client_url, authorization_url, authorization_content_type, scope, user_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         '''
-        cursor.execute(insert_query, (clientId,service_id , clientSecret, clientUrl, authorizationUrl, authorizationContentType, scope, userID))
+        await cursor.execute(insert_query, (clientId,service_id , clientSecret, clientUrl, authorizationUrl, authorizationContentType, scope, userID))
 
-        db.commit()  
-        print("Авторизация добавлена в базу данных.")
+        await db.commit()  
+        logger.info("Авторизация для сервиса %s добавлена в базу данных.", serviceName)
 
         return JSONResponse(content={'message': f'Authorisation of {serviceName} added successfully.'}, status_code=201)
 
     except Exception as error:
-        print('Error inserting service:', error)
+        logger.error("Error inserting service: %s", error)
         raise HTTPException(status_code=500, detail='Error adding authorisation')
     
     finally:
         if cursor is not None:
             try:
-                cursor.close()
+                await cursor.close()
             except Exception as cursor_close_error:
-                print(f"Ошибка при закрытии курсора: {cursor_close_error}")
+                logger.warning("Ошибка при закрытии курсора: %s", cursor_close_error)
 
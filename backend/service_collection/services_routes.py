@@ -1,140 +1,414 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from .database import db  
-import base64
-import os
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
+from .database import db, execute_values
+from .etags import etag_headers, not_modified, rows_etag
+from .logo_storage import release_logos
+from .logos import logo_config, logo_reference, logo_references, save_logo_upload
+from .pagination import MAX_PAGE_SIZE, decode_cursor, like_prefix, page_headers, parse_fields
+from .parameter_diff import plan_parameter_changes
+from .response_cache import invalidate_service, response_cache, service_entity
+from .type_registry import type_registry
+import logging
 
 collection_route = APIRouter()
-
-def get_db():
-    return db.get_connection()  # Возвращаем соединение
+logger = logging.getLogger(__name__)
+
+# Версия сервиса вместе с точками обслуживания и параметрами - для ETag без построения ответа;
+# строки нет, если нет сервиса
+SERVICE_VERSION_QUERY = '''
+    SELECT s.xmin::text || '|' || coalesce((
+        SELECT string_agg(sp.id || ':' || sp.xmin::text, ',' ORDER BY sp.id)
+        FROM services.service_points sp
+        WHERE sp.service_id = s.id
+    ), '') || '|' || coalesce((
+        SELECT string_agg(p.id || ':' || p.xmin::text, ',' ORDER BY p.id)
+        FROM services.service_parameters p
+        JOIN services.service_points sp ON sp.id = p.service_point_id
+        WHERE sp.service_id = s.id
+    ), '')
+    FROM services.service s
+    WHERE s.name = %s
+'''
+
+# Поля списка сервисов, доступные в параметре fields, и их источник в запросе
+SERVICE_FIELDS = {
+    "id": "service.id",
+    "uri": "service.uri",
+    "token": "service.token",
+    "name": "service.name",
+    "category_id": "service.category_id",
+    "logo": "service.logo",
+    "description": "service.description",
+    "api_source": "service.api_source",
+    "category_name": "service_categories.name AS category_name",
+    "image": None
+}
+
+# Модели для массового импорта сервисов
+class BulkParameter(BaseModel):
+    name: str = Field(..., example="city")
+    description: Optional[str] = Field('', example="Название города")
+    required: bool = Field(False, example=True)
+    type: str = Field(..., example="string")
+
+class BulkServicePoint(BaseModel):
+    uri: str = Field(..., example="/weather")
+    description: str = Field(..., example="Погода на сегодня")
+    parameters: List[BulkParameter] = Field(default_factory=list)
+
+class BulkService(BaseModel):
+    name: str = Field(..., example="Weather API")
+    uri: str = Field(..., example="https://api.weather.example")
+    categoryId: int = Field(..., example=1)
+    description: str = Field(..., example="Прогноз погоды")
+    token: str = 'no'
+    # Имя файла в папке логотипов; без него у сервиса логотип по умолчанию
+    logo: Optional[str] = None
+    api_source: str = 'manual'
+    servicePoints: List[BulkServicePoint] = Field(default_factory=list)
+
+class ServiceNames(BaseModel):
+    names: List[str] = Field(..., example=["Weather API", "Maps API"])
+
+async def get_db():
+    # Соединение берётся из пула на время запроса и возвращается после ответа
+    async with db.connection() as connection:
+        yield connection
+
+async def fetch_service_points(cursor, service_ids):
+    """
+    Загружает точки обслуживания сервисов вместе с их параметрами одним запросом;
+    названия типов берутся из справочника типов.
+    Возвращает словарь {id сервиса: [точка, ...]}; сервисов без точек в нём нет.
+    """
+    service_points_query = '''
+        SELECT p.service_id, p.uri, p.description, p.id AS point_id,
+            sp.id, sp.name, sp.description AS parameter_description, sp.required, sp.type_id
+        FROM services.service_points p
+        LEFT JOIN services.service_parameters sp ON sp.service_point_id = p.id
+        WHERE p.service_id = ANY(%s)
+        ORDER BY p.id, sp.id
+    '''
+    await cursor.execute(service_points_query, (list(service_ids),))
+    rows = await cursor.fetchall()
+    type_names = await type_registry.type_names((row['type_id'] for row in rows), cursor)
+
+    points_by_service = {}
+    points = {}
+    for row in rows:
+        point = points.get(row['point_id'])
+        if point is None:
+            point = {
+                'uri': row['uri'],
+                'description': row['description'],
+                'id': row['point_id'],
+                'parameters': []
+            }
+            points[row['point_id']] = point
+            points_by_service.setdefault(row['service_id'], []).append(point)
+
+        # У точки без параметров LEFT JOIN даёт одну строку с пустыми полями параметра
+        if row['id'] is not None:
+            point['parameters'].append({
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['parameter_description'],
+                'required': row['required'],
+                'type': type_names.get(row['type_id'])
+            })
+    return points_by_service
 
 #TODO ACCEPTED
 @collection_route.get("/api/service", tags=["Коллекция сервисов"])
-async def get_services(db=Depends(get_db)):
+async def get_services(
+    request: Request,
+    inline_logos: Optional[bool] = None,
+    logo_size: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    category_id: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    api_source: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    Получает список сервисов. В поле image - ссылка на логотип
+    (или data URI при inline_logos=true для старых клиентов).
+
+    Параметры:
+    - logo_size: Размер логотипа в пикселях; ссылка в image ведёт на уменьшенную копию.
+    - limit: Размер страницы. Без него возвращается весь список.
+    - cursor: Токен следующей страницы из заголовка X-Next-Cursor предыдущего ответа.
+    - category_id, name_prefix, api_source: Фильтры по категории, началу имени и источнику.
+    - fields: Список полей через запятую, например fields=id,name,image.
+    """
+    after_id = decode_cursor(page_cursor)
+    requested_fields = parse_fields(fields, SERVICE_FIELDS)
+
+    if requested_fields is None:
+        columns = "service.*, service_categories.name AS category_name"
+    else:
+        # id нужен для курсора, logo - для поля image
+        needed = {"id", *requested_fields}
+        if "image" in needed:
+            needed.add("logo")
+        columns = ", ".join(SERVICE_FIELDS[field] for field in SERVICE_FIELDS if field in needed and SERVICE_FIELDS[field])
+
+    conditions = []
+    params = []
+    if after_id is not None:
+        conditions.append("service.id > %s")
+        params.append(after_id)
+    if category_id is not None:
+        conditions.append("service.category_id = %s")
+        params.append(category_id)
+    if name_prefix:
+        conditions.append("service.name LIKE %s")
+        params.append(like_prefix(name_prefix))
+    if api_source is not None:
+        conditions.append("service.api_source = %s")
+        params.append(api_source)
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    limit_clause = ""
+    if limit is not None:
+        # Одна лишняя строка показывает, есть ли следующая страница
+        limit_clause = "LIMIT %s"
+        params.append(limit + 1)
+    if inline_logos is None:
+        inline_logos = logo_config["inline"]
+
     cursor = None
     try:
         connection = db
         cursor = connection.cursor()
-        services_query = """
-            SELECT service.*, service_categories.name AS category_name
+        # Название категории тоже попадает в ответ, поэтому учитывается и версия категории
+        etag = await rows_etag(cursor, f"""
+            SELECT coalesce(string_agg(id || ':' || service_xmin || ':' || coalesce(category_xmin, ''), ',' ORDER BY id), '')
+            FROM (
+                SELECT service.id, service.xmin::text AS service_xmin, service_categories.xmin::text AS category_xmin
+                FROM services.service
+                LEFT JOIN services.service_categories AS service_categories ON service.category_id = service_categories.id
+                {where}
+                ORDER BY service.id
+                {limit_clause}
+            ) AS page
+        """, params, inline_logos, logo_size)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+
+        services_query = f"""
+            SELECT {columns}
             FROM services.service
             LEFT JOIN services.service_categories AS service_categories ON service.category_id = service_categories.id
+            {where}
+            ORDER BY service.id
+            {limit_clause}
         """
-        cursor.execute(services_query)
-        services_result = cursor.fetchall()
+        await cursor.execute(services_query, params)
+        services_result = await cursor.fetchall()
+        headers = {**page_headers(request, services_result, limit), **etag_headers(etag)}
+        if limit is not None:
+            services_result = services_result[:limit]
+
+        with_images = requested_fields is None or "image" in requested_fields
+        if with_images:
+            images = await logo_references(request, [service['logo'] for service in services_result], inline_logos, logo_size)
 
         services_with_images = []
-        for service in services_result:
-            # Предполагаем, что service возвращает словарь с данными
-            image_path = f"./collections_logos/{service['logo']}"
-            if os.path.exists(image_path):
-                with open(image_path, "rb") as image_file:
-                    image = base64.b64encode(image_file.read()).decode("utf-8")
-                    services_with_images.append({
-                        **service,
-                        "image": f"data:image/jpeg;base64,{image}"
-                    })
-            else:
-                # Если изображение не найдено, добавляем объект без поля image
-                services_with_images.append({
-                    **service,
-                    "image": None  # Или можно указать путь к изображению по умолчанию
-                })
-
-        return JSONResponse(content=services_with_images, media_type="application/json")
+        for position, service in enumerate(services_result):
+            item = {**service}
+            if with_images:
+                item["image"] = images[position]
+            if requested_fields is not None:
+                item = {field: item[field] for field in requested_fields}
+            services_with_images.append(item)
+
+        return JSONResponse(content=services_with_images, media_type="application/json", headers=headers)
     except Exception as err:
-        print(f"Error executing query: {err}")
+        logger.error("Error executing query: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")
     finally:
         if cursor is not None:
-            cursor.close() 
+            await cursor.close() 
+
+async def resolve_type_ids(cursor, type_names):
+    """
+    Переводит названия типов в id по справочнику типов. Неизвестные типы - ошибка 400.
+    """
+    type_names = set(type_names)
+    type_ids = await type_registry.type_ids(type_names, cursor)
+    unknown = type_names - type_ids.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Типы не найдены: {', '.join(sorted(unknown))}")
+    return type_ids
+
+async def insert_service_points(cursor, points, type_ids):
+    """
+    Пакетная вставка точек обслуживания и их параметров.
+    points - список пар (id сервиса, BulkServicePoint); type_ids - словарь название типа -> id.
+    Возвращает по каждой точке её id и id вставленных параметров, в порядке points.
+    """
+    point_rows = await execute_values(
+        cursor,
+        'INSERT INTO services.service_points (service_id, uri, description) VALUES %s RETURNING id',
+        [(service_id, point.uri, point.description) for service_id, point in points],
+        fetch=True
+    )
+    point_ids = [row['id'] for row in point_rows]
+
+    parameter_rows = [
+        (point_id, parameter.name, parameter.description or '', parameter.required, type_ids[parameter.type])
+        for point_id, (_, point) in zip(point_ids, points)
+        for parameter in point.parameters
+    ]
+    parameter_ids = [row['id'] for row in await execute_values(
+        cursor,
+        'INSERT INTO services.service_parameters (service_point_id, name, description, required, type_id) VALUES %s RETURNING id',
+        parameter_rows,
+        fetch=True
+    )]
+
+    created = []
+    position = 0
+    for point_id, (_, point) in zip(point_ids, points):
+        count = len(point.parameters)
+        created.append({
+            "id": point_id,
+            "uri": point.uri,
+            "parameterIds": parameter_ids[position:position + count]
+        })
+        position += count
+    return created
+
+async def release_deleted_logos(cursor, deleted):
+    """
+    Удаляет файлы логотипов удалённых сервисов, если на них больше никто не ссылается.
+    Вызывается после коммита; ошибка здесь не отменяет удаление, файлы подберёт сборка мусора.
+    """
+    try:
+        await release_logos(cursor, [row['logo'] for row in deleted])
+    except Exception as error:
+        logger.warning("Не удалось удалить логотипы удалённых сервисов: %s", error)
+
+async def delete_services(cursor, service_names):
+    """
+    Удаляет сервисы по именам вместе с точками обслуживания, параметрами и настройками
+    авторизации одним запросом. Возвращает строки name, logo, service_points, parameters
+    только для существовавших сервисов.
+    """
+    await cursor.execute('''
+        WITH targets AS (
+            SELECT id, name, logo FROM services.service WHERE name = ANY(%s)
+        ), points AS (
+            SELECT id, service_id FROM services.service_points
+            WHERE service_id IN (SELECT id FROM targets)
+        ), deleted_parameters AS (
+            DELETE FROM services.service_parameters
+            WHERE service_point_id IN (SELECT id FROM points)
+            RETURNING service_point_id
+        ), deleted_points AS (
+            DELETE FROM services.service_points
+            WHERE id IN (SELECT id FROM points)
+            RETURNING id, service_id
+        ), deleted_default_auth AS (
+            DELETE FROM services.default_auth
+            WHERE service_id IN (SELECT id FROM targets)
+        ), deleted_oauth AS (
+            DELETE FROM services.oauth_auth
+            WHERE service_id IN (SELECT id FROM targets)
+        ), deleted_services AS (
+            DELETE FROM services.service
+            WHERE id IN (SELECT id FROM targets)
+            RETURNING id, name, logo
+        )
+        SELECT s.name, s.logo,
+            (SELECT count(*) FROM deleted_points p WHERE p.service_id = s.id) AS service_points,
+            (SELECT count(*) FROM deleted_parameters dp
+                JOIN points p ON p.id = dp.service_point_id
+                WHERE p.service_id = s.id) AS parameters
+        FROM deleted_services s
+        ORDER BY s.id
+    ''', (list(service_names),))
+    return await cursor.fetchall()
 
 #TODO ACCEPTED
 @collection_route.get('/api/services/{service_name}', tags=["Коллекция сервисов"])
-async def get_service(service_name: str, db=Depends(get_db)):
+async def get_service(
+    service_name: str,
+    request: Request,
+    inline_logos: Optional[bool] = None,
+    logo_size: Optional[int] = Query(None, ge=1),
+    db=Depends(get_db)
+):
     """
     Получает информацию о сервисе по его имени.
     
     Параметры:
     - service_name: Имя сервиса, для которого нужно получить информацию.
+    - inline_logos: Вернуть логотип как data URI вместо ссылки (режим совместимости).
+    - logo_size: Размер логотипа в пикселях; ссылка ведёт на уменьшенную копию.
 
     Возвращает:
-    - JSON-ответ с информацией о сервисе, включая его описание, точки обслуживания и логотип.
+    - JSON-ответ с информацией о сервисе, включая его описание, точки обслуживания и ссылку на логотип.
     """
+    if inline_logos is None:
+        inline_logos = logo_config["inline"]
+
     cursor = None
     try:
         # Получаем соединение и создаем курсор
         connection = db
         cursor = connection.cursor()
 
-        # Запрос для получения информации о сервисе
-        service_info_query = 'SELECT id, description, logo FROM services.service WHERE name = %s'
-        cursor.execute(service_info_query, (service_name,))
-        service_info = cursor.fetchone()
-
-        # Проверяем, существует ли сервис
-        if service_info is None:
-            raise HTTPException(status_code=404, detail="Сервис не найден")
-
-        service_id = service_info['id']
-        service_description = service_info['description']
-        service_logo = service_info['logo']
-
-        # Запрос для получения точек обслуживания сервиса
-        service_points_query = 'SELECT uri, description, id FROM services.service_points WHERE service_id = %s'
-        cursor.execute(service_points_query, (service_id,))
-        service_points = cursor.fetchall()
-
-        # Получаем параметры для каждой точки обслуживания
-        service_parameters = []
-        for point in service_points:
-            parameters_query = '''
-                SELECT sp.id, sp.name, sp.description, sp.required, ct.type 
-                FROM services.service_parameters sp 
-                LEFT JOIN components.type ct ON sp.type_id = ct.id 
-                WHERE sp.service_point_id = %s
-            '''
-            cursor.execute(parameters_query, (point['id'],))
-            parameters = cursor.fetchall()
-            
-            # Формируем параметры с именами полей
-            formatted_parameters = []
-            for param in parameters:
-                formatted_parameters.append({
-                    'id': param['id'],
-                    'name': param['name'],
-                    'description': param['description'],
-                    'required': param['required'],
-                    'type': param['type']
-                })
-            
-            service_parameters.append({
-                **point,
-                'parameters': formatted_parameters
-            })
-
-        # Читаем логотип сервиса из файловой системы
-        image_path = f"./collections_logos/{service_logo}"
-        if os.path.exists(image_path):
-            with open(image_path, "rb") as image_file:
-                image = base64.b64encode(image_file.read()).decode("utf-8")
-        else:
-            image = None  # Если изображение не найдено, устанавливаем значение None
+        await type_registry.refresh_if_stale(cursor)
+        etag = await rows_etag(cursor, SERVICE_VERSION_QUERY, (service_name,), type_registry.etag, inline_logos, logo_size)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+
+        # В кэше лежат только данные из базы: ссылка на логотип зависит от запроса
+        # и строится заново при каждом ответе
+        cached, version = await response_cache.get("get_service", service_entity(service_name))
+        if cached is None:
+            # Запрос для получения информации о сервисе
+            service_info_query = 'SELECT id, description, logo FROM services.service WHERE name = %s'
+            await cursor.execute(service_info_query, (service_name,))
+            service_info = await cursor.fetchone()
+
+            # Проверяем, существует ли сервис
+            if service_info is None:
+                raise HTTPException(status_code=404, detail="Сервис не найден")
+
+            service_id = service_info['id']
+
+            # Точки обслуживания вместе с параметрами
+            service_points = await fetch_service_points(cursor, [service_id])
+
+            cached = {
+                'description': service_info['description'],
+                'servicePoints': service_points.get(service_id, []),
+                'logo': service_info['logo']
+            }
+            await response_cache.set("get_service", service_entity(service_name), version, cached)
 
         # Формируем ответ
         return JSONResponse(content={
             'serviceName': service_name,
-            'serviceDescription': service_description,
-            'servicePoints': service_parameters,
-            'serviceLogo': f"data:image/jpeg;base64,{image}" if image else None
-        })
+            'serviceDescription': cached['description'],
+            'servicePoints': cached['servicePoints'],
+            'serviceLogo': await logo_reference(request, cached['logo'], inline_logos, logo_size)
+        }, headers=etag_headers(etag))
     except Exception as err:
-        print(f"Error executing query: {err}")
+        logger.error("Error executing query: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 #TODO ACCEPTED
 @collection_route.post('/api/services/{service_name}/endpoints', tags=["Коллекция сервисов"])
@@ -157,25 +431,25 @@ async def add_service_endpoint(service_name: str, endpoint_data: dict, db=Depend
         if not uri or not description or not isinstance(parameters, list):
             raise HTTPException(status_code=400, detail="Неверные данные запроса")
 
-        print(f"Received request to add endpoint for service '{service_name}' with URI '{uri}' and description '{description}'.")
+        logger.debug("Received request to add endpoint for service '%s' with URI '%s' and description '%s'.", service_name, uri, description)
 
         # Запрос для получения ID сервиса по его имени
         service_info_query = 'SELECT id FROM services.service WHERE name = %s'
-        cursor.execute(service_info_query, (service_name,))
-        service_info = cursor.fetchone()
+        await cursor.execute(service_info_query, (service_name,))
+        service_info = await cursor.fetchone()
 
         # Проверяем, существует ли сервис
         if service_info is None:
             raise HTTPException(status_code=404, detail="Сервис не найден")
 
         service_id = service_info['id']
-        print(f"Service ID for '{service_name}' is {service_id}.")
+        logger.debug("Service ID for '%s' is %s.", service_name, service_id)
 
         # Вставляем новую точку обслуживания
         insert_endpoint_query = 'INSERT INTO services.service_points (service_id, uri, description) VALUES (%s, %s, %s) RETURNING id'
-        cursor.execute(insert_endpoint_query, (service_id, uri, description))
-        service_point_id = cursor.fetchone()['id']
-        print(f"Inserted service point with ID: {service_point_id}.")
+        await cursor.execute(insert_endpoint_query, (service_id, uri, description))
+        service_point_id = (await cursor.fetchone())['id']
+        logger.debug("Inserted service point with ID: %s.", service_point_id)
 
         # Вставляем параметры для новой точки обслуживания
         insert_parameter_query = 'INSERT INTO services.service_parameters (service_point_id, name, description, required, type_id) VALUES (%s, %s, %s, %s, %s)'
@@ -184,94 +458,58 @@ async def add_service_endpoint(service_name: str, endpoint_data: dict, db=Depend
             if 'name' not in parameter or 'type' not in parameter:
                 raise HTTPException(status_code=400, detail="Неверные данные параметра")
 
-            print(f"Inserting parameter: {parameter['name']} of type '{parameter['type']}'.")
+            logger.debug("Inserting parameter: %s of type '%s'.", parameter['name'], parameter['type'])
 
-            # Получаем ID типа параметра
-            type_id_query = 'SELECT id FROM components.type WHERE type = %s'
-            cursor.execute(type_id_query, (parameter['type'],))
-            type_result = cursor.fetchone()
+            # Получаем ID типа параметра из справочника типов
+            type_id = await type_registry.type_id(parameter['type'], cursor)
 
-            if type_result is None:
+            if type_id is None:
                 raise HTTPException(status_code=400, detail=f"Тип '{parameter['type']}' не найден")
 
-            type_id = type_result['id']
-            print(f"Type ID for '{parameter['type']}' is {type_id}.")
+            logger.debug("Type ID for '%s' is %s.", parameter['type'], type_id)
 
             # Вставляем параметр
-            cursor.execute(insert_parameter_query, (service_point_id, parameter['name'], parameter.get('description', ''), parameter.get('required', False), type_id))
-            print(f"Inserted parameter '{parameter['name']}'.")
+            await cursor.execute(insert_parameter_query, (service_point_id, parameter['name'], parameter.get('description', ''), parameter.get('required', False), type_id))
+            logger.debug("Inserted parameter '%s'.", parameter['name'])
 
         # Фиксируем изменения
-        connection.commit()
-
-        # Получаем обновленные точки обслуживания
-        updated_service_points_query = 'SELECT uri, description, id FROM services.service_points WHERE service_id = %s'
-        cursor.execute(updated_service_points_query, (service_id,))
-        updated_service_points = cursor.fetchall()
-
-        # Получаем параметры для каждой обновленной точки обслуживания
-        updated_service_parameters = []
-        for point in updated_service_points:
-            parameters_query = '''
-                SELECT sp.name, sp.description, sp.required, ct.type 
-                FROM services.service_parameters sp 
-                JOIN components.type ct ON sp.type_id = ct.id 
-                WHERE sp.service_point_id = %s
-            '''
-            cursor.execute(parameters_query, (point['id'],))
-            parameters = cursor.fetchall()
-            # Формируем список параметров с нужными полями
-            formatted_parameters = [
-                {
-                    'name': param['name'],
-                    'description': param['description'],
-                    'required': param['required'],
-                    'type': param['type']
-                }
-                for param in parameters
-            ]
-            updated_service_parameters.append({
-                **point,
-                'parameters': formatted_parameters
-            })
+        await connection.commit()
+        await invalidate_service(service_name)
+
+        # Получаем обновленные точки обслуживания вместе с параметрами
+        updated_service_points = await fetch_service_points(cursor, [service_id])
 
-        print("Successfully added endpoint and parameters.")
-        return JSONResponse(content=updated_service_parameters, status_code=201)
+        logger.info("Added endpoint %s for service %s.", uri, service_name)
+        return JSONResponse(content=updated_service_points.get(service_id, []), status_code=201)
 
     except Exception as err:
-        print(f"Error adding endpoint: {err}")
+        logger.error("Error adding endpoint: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка добавления нового endpoint")
     
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
 
 #TODO ACCEPTED            
 @collection_route.get('/api/parameter-types', tags=["Коллекция сервисов"])
-async def get_parameter_types(db=Depends(get_db)):
+async def get_parameter_types(request: Request):
     """
-    Получает список типов параметров из базы данных.
+    Получает список типов параметров из справочника типов в памяти.
     """
-    cursor = None
     try:
-        connection = db  # Используем экземпляр db, который является объектом Database
-        cursor = connection.cursor()  # Создаем курсор из соединения
-
-        # Запрос для получения типов параметров
-        parameter_types_query = 'SELECT id, type FROM components.type'
-        cursor.execute(parameter_types_query)  # Выполнение запроса
-        parameter_types_result = cursor.fetchall()  # Получение всех результатов
+        types = await type_registry.all()
+        headers = etag_headers(type_registry.etag)
+        unchanged = not_modified(request, type_registry.etag)
+        if unchanged is not None:
+            return unchanged
 
         # Преобразование результата в список словарей
-        parameter_types = [{"id": row['id'], "type": row['type']} for row in parameter_types_result]
+        parameter_types = [{"id": type_id, "type": type_name} for type_id, type_name in types]
 
-        return JSONResponse(content=parameter_types, media_type="application/json")  # Отправка списка типов параметров клиенту
+        return JSONResponse(content=parameter_types, media_type="application/json", headers=headers)  # Отправка списка типов параметров клиенту
     except Exception as err:
-        print(f"Error fetching parameter types: {err}")  # Вывод сообщения об ошибке
+        logger.error("Error fetching parameter types: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка получения типов параметров")  # Отправка сообщения об ошибке клиенту
-    finally:
-        if cursor is not None:
-            cursor.close()
    
 #TODO ACCEPTED         
 @collection_route.put('/api/service-points/{service_point_id}/parameters', tags=["Коллекция сервисов"])
@@ -280,11 +518,18 @@ async def update_service_point_parameters(
     request: Request,
     db=Depends(get_db)
 ):
+    """
+    Обновляет адрес и описание точки обслуживания и её параметры. Присланные параметры
+    обновляются (с id) или добавляются (без id); не присланные не меняются.
+    Удаляются только параметры, id которых перечислены в removed_ids.
+    В ответе - точка и все её параметры после сохранения.
+    """
     # Получаем параметры из тела запроса
     data = await request.json()
     uri = data.get('uri')
     description = data.get('description')
     parameters = data.get('parameters')
+    removed_ids = data.get('removed_ids') or []
 
     # Проверяем, что все обязательные поля присутствуют
     if uri is None or description is None:
@@ -297,79 +542,108 @@ async def update_service_point_parameters(
     try:
         # Обновляем название и описание точки обслуживания
         update_service_point_query = '''
-            UPDATE services.service_points
+            UPDATE services.service_points AS sp
             SET uri = %s, description = %s
-            WHERE id = %s
+            FROM services.service AS s
+            WHERE sp.id = %s AND s.id = sp.service_id
+            RETURNING sp.id, sp.uri, sp.description, s.name
         '''
-        cursor.execute(update_service_point_query, (uri, description, service_point_id))
+        await cursor.execute(update_service_point_query, (uri, description, service_point_id))
+        updated_point = await cursor.fetchone()
+
+        if updated_point is None:
+            raise HTTPException(status_code=404, detail="Service point not found")
 
-        # Обновляем существующие параметры и добавляем новые параметры
+        # id типов по именам из справочника типов
+        type_ids = await type_registry.type_ids((param.get('type') for param in parameters), cursor)
         for param in parameters:
-            param_id = param.get('id')
-            name = param.get('name')
-            description = param.get('description')
-            required = param.get('required')
-            type_name = param.get('type')
-
-            # Получаем id типа на основе его имени
-            cursor.execute('SELECT id FROM components.type WHERE type = %s', (type_name,))
-            type_result = cursor.fetchone()
-
-            if type_result is None:
-                raise HTTPException(status_code=400, detail=f"Type '{type_name}' not found")
-
-            type_id = type_result[0]
-
-            if param_id is not None:  # Обновляем существующий параметр
-                update_query = '''
-                    UPDATE services.service_parameters
-                    SET name = %s, description = %s, required = %s, type_id = %s
-                    WHERE id = %s
-                '''
-                cursor.execute(update_query, (name, description, required, type_id, param_id))
-            else:  # Добавляем новый параметр
-                insert_query = '''
-                    INSERT INTO services.service_parameters (service_point_id, name, description, required, type_id)
-                    VALUES (%s, %s, %s, %s, %s)
-                '''
-                cursor.execute(insert_query, (service_point_id, name, description, required, type_id))
+            if param.get('type') not in type_ids:
+                raise HTTPException(status_code=400, detail=f"Type '{param.get('type')}' not found")
 
-        # Фиксируем изменения
-        db.commit()
+        # Сохранённые параметры точки - для сравнения с присланными
+        await cursor.execute(
+            'SELECT id, name, description, required, type_id FROM services.service_parameters WHERE service_point_id = %s',
+            (service_point_id,)
+        )
+        stored = {row['id']: row for row in await cursor.fetchall()}
+
+        def values(param):
+            return (param.get('name'), param.get('description'), param.get('required'), type_ids[param.get('type')])
+
+        plan = plan_parameter_changes(
+            {param_id: (row['name'], row['description'], row['required'], row['type_id']) for param_id, row in stored.items()},
+            [(param.get('id'), values(param)) for param in parameters],
+            removed_ids
+        )
+        if plan["foreign"]:
+            raise HTTPException(status_code=400, detail=f"Parameter {plan['foreign'][0]} does not belong to service point {service_point_id}")
+        if plan["conflicting"]:
+            raise HTTPException(status_code=400, detail=f"Parameter {plan['conflicting'][0]} is both updated and removed")
+
+        changed = [(param_id, service_point_id, *param_values) for param_id, param_values in plan["changed"]]
+        added = [(service_point_id, *param_values) for param_values in plan["added"]]
+        removed = plan["removed"]
+
+        # Удаляем только явно перечисленные в removed_ids параметры
+        if removed:
+            await cursor.execute(
+                'DELETE FROM services.service_parameters WHERE id = ANY(%s) AND service_point_id = %s',
+                (removed, service_point_id)
+            )
+
+        # Изменённые параметры - одним UPDATE, новые - одним INSERT
+        updated_rows = await execute_values(cursor, '''
+            UPDATE services.service_parameters AS p
+            SET name = v.name, description = v.description, required = v.required, type_id = v.type_id
+            FROM (VALUES %s) AS v(id, service_point_id, name, description, required, type_id)
+            WHERE p.id = v.id AND p.service_point_id = v.service_point_id
+            RETURNING p.id, p.name, p.description, p.required, p.type_id
+        ''', changed, template="(%s::int, %s::int, %s::text, %s::text, %s::boolean, %s::int)", fetch=True)
+
+        inserted_rows = await execute_values(
+            cursor,
+            'INSERT INTO services.service_parameters (service_point_id, name, description, required, type_id) VALUES %s RETURNING id, name, description, required, type_id',
+            added,
+            fetch=True
+        )
 
-        # Извлекаем обновленные данные о сервисной точке и ее параметрах
-        cursor.execute('SELECT uri, description FROM services.service_points WHERE id = %s', (service_point_id,))
-        service_point = cursor.fetchone()
+        # Фиксируем изменения
+        await db.commit()
+        await invalidate_service(updated_point['name'])
 
-        cursor.execute('SELECT id, name, description, required, type_id FROM services.service_parameters WHERE service_point_id = %s', (service_point_id,))
-        parameters = cursor.fetchall()
+        # Ответ - из сохранённых неизменённых строк и строк RETURNING, без повторного чтения
+        rows = {param_id: stored[param_id] for param_id in plan["kept"]}
+        rows.update((row['id'], row) for row in updated_rows)
+        rows.update((row['id'], row) for row in inserted_rows)
 
-        # Формируем ответ
         response_data = {
             "service_point": {
-                "id": service_point_id,
-                "uri": service_point[0],
-                "description": service_point[1],
+                "id": updated_point['id'],
+                "uri": updated_point['uri'],
+                "description": updated_point['description'],
             },
             "parameters": [
                 {
-                    "id": param[0],
-                    "name": param[1],
-                    "description": param[2],
-                    "required": param[3],
-                    "type_id": param[4],
-                } for param in parameters
+                    "id": rows[param_id]['id'],
+                    "name": rows[param_id]['name'],
+                    "description": rows[param_id]['description'],
+                    "required": rows[param_id]['required'],
+                    "type_id": rows[param_id]['type_id'],
+                } for param_id in sorted(rows)
             ]
         }
 
         return JSONResponse(content=response_data, status_code=200)
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as error:
-        print(f"Error updating service point and parameters: {error}")
-        db.rollback()  # Откатываем изменения в случае ошибки
+        logger.error("Error updating service point and parameters: %s", error)
+        await db.rollback()  # Откатываем изменения в случае ошибки
         raise HTTPException(status_code=500, detail="Error updating service point and parameters")
     finally:
-        cursor.close()
+        await cursor.close()
    
 #TODO ACCEPTED           
 # Обработчик маршрута для удаления параметра точки обслуживания
@@ -389,23 +663,29 @@ async def delete_parameter(point_id: int, param_id: int, db=Depends(get_db)):
 
         # Запрос для удаления параметра
         delete_query = '''
-            DELETE FROM services.service_parameters
-            WHERE service_point_id = %s AND id = %s
+            DELETE FROM services.service_parameters AS p
+            USING services.service_points AS sp, services.service AS s
+            WHERE p.service_point_id = %s AND p.id = %s
+              AND sp.id = p.service_point_id AND s.id = sp.service_id
+            RETURNING s.name
         '''
-        cursor.execute(delete_query, (point_id, param_id))
+        await cursor.execute(delete_query, (point_id, param_id))
+        deleted_from = await cursor.fetchone()
 
         # Подтверждение транзакции
-        connection.commit()
+        await connection.commit()
+        if deleted_from is not None:
+            await invalidate_service(deleted_from['name'])
 
         return JSONResponse(content={"message": "Parameter deleted successfully"}, status_code=200)
     except Exception as error:
-        print(f"Error deleting parameter: {error}")
+        logger.error("Error deleting parameter: %s", error)
         if connection:
-            connection.rollback()  # Откат изменений в случае ошибки
+            await connection.rollback()  # Откат изменений в случае ошибки
         raise HTTPException(status_code=500, detail="Error deleting parameter")
     finally:
         if cursor is not None:
-            cursor.close() 
+            await cursor.close() 
 
 #TODO ACCEPTED  
 # Обработчик маршрута для удаления точки обслуживания
@@ -418,42 +698,47 @@ async def delete_service_point(point_id: int, db=Depends(get_db)):
     - point_id: ID точки обслуживания для удаления.
     """
     cursor = None
-    print(f"Attempting to delete service point with ID: {point_id}")
+    logger.debug("Attempting to delete service point with ID: %s", point_id)
     try:
         connection = db  # Используем экземпляр db, который является объектом Database
         cursor = connection.cursor()  # Создаем курсор из соединения
 
         # Запрос для удаления точки обслуживания
         delete_endpoint_query = '''
-            DELETE FROM services.service_points
-            WHERE id = %s
+            DELETE FROM services.service_points AS sp
+            USING services.service AS s
+            WHERE sp.id = %s AND s.id = sp.service_id
+            RETURNING s.name
         '''
-        cursor.execute(delete_endpoint_query, (point_id,))
+        await cursor.execute(delete_endpoint_query, (point_id,))
+        deleted_from = await cursor.fetchone()
 
         # Подтверждение транзакции
-        connection.commit()
+        await connection.commit()
+        if deleted_from is not None:
+            await invalidate_service(deleted_from['name'])
 
         # Получаем обновленный список точек обслуживания после удаления
         updated_endpoints_query = '''
             SELECT uri, description, id FROM services.service_points
         '''
-        cursor.execute(updated_endpoints_query)
-        updated_endpoints = cursor.fetchall()  # Получаем все обновленные результаты
+        await cursor.execute(updated_endpoints_query)
+        updated_endpoints = await cursor.fetchall()  # Получаем все обновленные результаты
 
         return JSONResponse(content=updated_endpoints, status_code=200)  # Отправляем обновленный список точек обслуживания клиенту
     except Exception as error:
-        print(f"Error deleting service point: {error}")
+        logger.error("Error deleting service point: %s", error)
         if connection:
-            connection.rollback()  # Откат изменений в случае ошибки
+            await connection.rollback()  # Откат изменений в случае ошибки
         raise HTTPException(status_code=500, detail="Error deleting service point")
     finally:
         if cursor is not None:
-            cursor.close()  # Закрытие курсора, если он был создан
+            await cursor.close()  # Закрытие курсора, если он был создан
 
 #TODO ACCEPTED 
 # Обработчик маршрута для получения категорий
 @collection_route.get('/api/categories', tags=["Коллекция сервисов"])
-async def get_categories(db=Depends(get_db)):
+async def get_categories(request: Request, db=Depends(get_db)):
     """
     Получает список категорий из базы данных.
     """
@@ -462,18 +747,26 @@ async def get_categories(db=Depends(get_db)):
         connection = db  # Используем экземпляр db, который является объектом Database
         cursor = connection.cursor()  # Создаем курсор из соединения
 
+        etag = await rows_etag(cursor, '''
+            SELECT coalesce(string_agg(id || ':' || xmin::text, ',' ORDER BY id), '')
+            FROM services.service_categories
+        ''')
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+
         # Запрос для получения категорий
         categories_query = 'SELECT * FROM services.service_categories'
-        cursor.execute(categories_query)  # Выполнение запроса
-        categories_result = cursor.fetchall()  # Получение всех результатов
+        await cursor.execute(categories_query)  # Выполнение запроса
+        categories_result = await cursor.fetchall()  # Получение всех результатов
 
-        return JSONResponse(content=categories_result, media_type="application/json")  # Отправка списка категорий клиенту
+        return JSONResponse(content=categories_result, media_type="application/json", headers=etag_headers(etag))  # Отправка списка категорий клиенту
     except Exception as err:
-        print(f"Error executing query: {err}")  # Вывод сообщения об ошибке
+        logger.error("Error executing query: %s", err)
         raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")  # Отправка сообщения об ошибке клиенту
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
      
 #TODO ACCEPTED        
 # Обработчик маршрута для обновления сервиса
@@ -483,7 +776,6 @@ async def update_service(
     request: Request,
     db=Depends(get_db)
 ):
-    print(service_name)
     """
     Обновляет сервис по его имени.
     
@@ -522,9 +814,9 @@ async def update_service(
             service_name
         )
 
-        cursor.execute(update_query, values)
-        updated_service = cursor.fetchone()
-        print(updated_service)
+        await cursor.execute(update_query, values)
+        updated_service = await cursor.fetchone()
+        logger.debug("Updated service %s: %s", service_name, updated_service)
 
         if updated_service is None:
             raise HTTPException(status_code=404, detail='No service found to update.')
@@ -532,17 +824,18 @@ async def update_service(
             "name": updated_service[3],
         }
 
-        connection.commit()
+        await connection.commit()
+        await invalidate_service(service_name, updated_service[3])
 
         return JSONResponse(content=response, status_code=200)
     except Exception as error:
-        print(f"Error updating service: {error}")
+        logger.error("Error updating service: %s", error)
         if connection:
-            connection.rollback()  # Откат изменений в случае ошибки
+            await connection.rollback()  # Откат изменений в случае ошибки
         raise HTTPException(status_code=500, detail='Failed to update service')
     finally:
         if cursor is not None:
-            cursor.close()  # Закрытие курсора, если он был создан
+            await cursor.close()  # Закрытие курсора, если он был создан
 
 #TODO ACCEPTED 
 # Обработчик маршрута для удаления сервиса
@@ -556,31 +849,33 @@ async def delete_service(service_name: str, db=Depends(get_db)):
     """
     cursor = None
     try:
-        delete_query = '''
-            DELETE FROM services.service
-            WHERE name = %s
-            RETURNING *
-        '''
         connection = db
         cursor = connection.cursor()
-        cursor.execute(delete_query, (service_name,))
-        deleted_service = cursor.fetchone()
+        deleted = await delete_services(cursor, [service_name])
 
-        if deleted_service is None:
+        if not deleted:
             raise HTTPException(status_code=404, detail='No service found to delete.')
 
         # Подтверждение транзакции
-        connection.commit()
+        await connection.commit()
+        await invalidate_service(service_name)
+        await release_deleted_logos(cursor, deleted)
 
-        return JSONResponse(content={"message": "Service deleted successfully"}, status_code=200)
+        return JSONResponse(content={
+            "message": "Service deleted successfully",
+            "deleted": {
+                "servicePoints": sum(row['service_points'] for row in deleted),
+                "parameters": sum(row['parameters'] for row in deleted)
+            }
+        }, status_code=200)
     except Exception as error:
-        print(f"Error deleting service: {error}")
+        logger.error("Error deleting service: %s", error)
         if connection:
-            connection.rollback()  # Откат изменений в случае ошибки
+            await connection.rollback()  # Откат изменений в случае ошибки
         raise HTTPException(status_code=500, detail='Failed to delete service')
     finally:
         if cursor is not None:
-            cursor.close()
+            await cursor.close()
             
 #TODO ACCEPTED 
 @collection_route.post('/api/services', tags=["Коллекция сервисов"])
@@ -592,15 +887,15 @@ async def add_service(
     image: UploadFile = File(None),
     db=Depends(get_db)
 ):
-    print(f"Received data: uri={uri}, name={name}, categoryId={categoryId}, description={description}, image={image.filename if image else None}")
+    logger.debug("Received data: uri=%s, name=%s, categoryId=%s, description=%s, image=%s", uri, name, categoryId, description, image.filename if image else None)
     cursor = None
     try:
         cursor = db.cursor()
 
         # Проверяем, существует ли сервис с таким именем
         check_query = 'SELECT * FROM services.service WHERE name = %s'
-        cursor.execute(check_query, (name,))
-        check_result = cursor.fetchone()
+        await cursor.execute(check_query, (name,))
+        check_result = await cursor.fetchone()
 
         if check_result:
             return JSONResponse(content={'detail': 'Сервис с таким названием уже существует'}, status_code=409)
@@ -608,58 +903,202 @@ async def add_service(
         api_source = 'manual'
         token = 'no'
         
-        # Создаем папку images, если она не существует
-        if not os.path.exists("collections_logos"):
-            os.makedirs("collections_logos")
-            print("Папка 'collections_logos' была создана.")
-
-        # Обработка логотипа
+        # Обработка логотипа: файл пишется потоково, с ограничением размера и под именем по хэшу
         if image:
-            print(f"Получено изображение: {image.filename}, размер: {image.size} байт")
-            
-            # Извлекаем расширение файла
-            file_extension = os.path.splitext(image.filename)[1]  # Получаем расширение, например, .jpg
-            logo_file_name = f"{name}{file_extension}"  # Создаем новое имя файла
-            image_path = os.path.join("collections_logos", logo_file_name)
-
-            # Читаем содержимое файла
-            content = await image.read()
-            if not content:
-                return JSONResponse(status_code=400, content={'detail': 'Пустое содержимое файла'})
-
-            print(f"Чтение содержимого файла: {len(content)} байт.")
-
-            try:
-                with open(image_path, "wb") as image_file:
-                    image_file.write(content)
-                    print(f"Изображение сохранено по пути: {image_path}")
-            except Exception as e:
-                return JSONResponse(status_code=500, content={'detail': 'Ошибка при сохранении изображения'})
-
+            logger.debug("Получено изображение: %s, тип %s, размер: %s байт", image.filename, image.content_type, image.size)
+            logo_file_name = await save_logo_upload(image)
+            logger.debug("Логотип сохранён: %s", logo_file_name)
         else:
-            logo_file_name = "default.jpg"
-            print("Изображение не передано, используется 'default.jpg'.")
-        
+            # Без своей картинки у сервиса логотип по умолчанию
+            logo_file_name = None
+            logger.debug("Изображение не передано, используется логотип по умолчанию.")
+
         # Вставляем новый сервис
         insert_query = '''
             INSERT INTO services.service (uri, token, name, category_id, logo, description, api_source)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         '''
-        cursor.execute(insert_query, (uri, token, name, categoryId, logo_file_name, description, api_source))
+        await cursor.execute(insert_query, (uri, token, name, categoryId, logo_file_name, description, api_source))
         
         # Подтверждение транзакции
-        db.commit()  
-        print("Сервис добавлен в базу данных.")
+        await db.commit()  
+        logger.info("Сервис %s добавлен в базу данных.", name)
 
         return JSONResponse(content={'message': f'Service {name} added successfully.'}, status_code=201)
 
+    except HTTPException:
+        raise
     except Exception as error:
-        print('Error inserting service:', error)
+        logger.error("Error inserting service: %s", error)
         raise HTTPException(status_code=500, detail='Error adding service')
     
     finally:
         if cursor is not None:
             try:
-                cursor.close()
+                await cursor.close()
             except Exception as cursor_close_error:
-                print(f"Ошибка при закрытии курсора: {cursor_close_error}")
\ No newline at end of file
+                logger.warning("Ошибка при закрытии курсора: %s", cursor_close_error)
+
+@collection_route.post('/api/services/bulk', status_code=201, tags=["Коллекция сервисов"])
+async def import_services(payload: Union[List[BulkService], BulkService], db=Depends(get_db)):
+    """
+    Массовый импорт: один сервис или список сервисов вместе с точками обслуживания и параметрами.
+    Всё записывается в одной транзакции пакетными INSERT, типы параметров разрешаются одним запросом.
+
+    Возвращает id созданных сервисов, точек и параметров.
+    """
+    services = payload if isinstance(payload, list) else [payload]
+    names = [service.name for service in services]
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Имена сервисов в запросе повторяются")
+
+    cursor = None
+    try:
+        cursor = db.cursor()
+
+        await cursor.execute('SELECT name FROM services.service WHERE name = ANY(%s)', (names,))
+        existing = [row['name'] for row in await cursor.fetchall()]
+        if existing:
+            raise HTTPException(status_code=409, detail=f"Сервисы уже существуют: {', '.join(existing)}")
+
+        type_ids = await resolve_type_ids(cursor, (
+            parameter.type
+            for service in services
+            for point in service.servicePoints
+            for parameter in point.parameters
+        ))
+
+        service_rows = await execute_values(
+            cursor,
+            'INSERT INTO services.service (uri, token, name, category_id, logo, description, api_source) VALUES %s RETURNING id',
+            [
+                (service.uri, service.token, service.name, service.categoryId, service.logo, service.description, service.api_source)
+                for service in services
+            ],
+            fetch=True
+        )
+        service_ids = [row['id'] for row in service_rows]
+
+        created_points = await insert_service_points(cursor, [
+            (service_id, point)
+            for service_id, service in zip(service_ids, services)
+            for point in service.servicePoints
+        ], type_ids)
+
+        await db.commit()
+        logger.info("Импортировано сервисов: %s, точек обслуживания: %s.", len(services), len(created_points))
+
+        created = []
+        position = 0
+        for service_id, service in zip(service_ids, services):
+            count = len(service.servicePoints)
+            created.append({
+                "id": service_id,
+                "name": service.name,
+                "servicePoints": created_points[position:position + count]
+            })
+            position += count
+        return created
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as error:
+        logger.error("Error importing services: %s", error)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail='Error importing services')
+    finally:
+        if cursor is not None:
+            await cursor.close()
+
+@collection_route.post('/api/services/batch-delete', tags=["Коллекция сервисов"])
+async def delete_services_batch(batch: ServiceNames, db=Depends(get_db)):
+    """
+    Удаляет несколько сервисов по именам вместе с точками обслуживания и параметрами одним запросом.
+    Возвращает удалённые сервисы с числом удалённых точек и параметров и имена, которых не нашлось.
+    """
+    if not batch.names:
+        raise HTTPException(status_code=400, detail="Список names пуст")
+
+    cursor = None
+    try:
+        cursor = db.cursor()
+        deleted = await delete_services(cursor, set(batch.names))
+
+        await db.commit()
+        await invalidate_service(*(row['name'] for row in deleted))
+        await release_deleted_logos(cursor, deleted)
+
+        deleted_names = {row['name'] for row in deleted}
+        return JSONResponse(content={
+            "deleted": [
+                {"name": row['name'], "servicePoints": row['service_points'], "parameters": row['parameters']}
+                for row in deleted
+            ],
+            "notFound": [name for name in dict.fromkeys(batch.names) if name not in deleted_names]
+        }, status_code=200)
+    except Exception as error:
+        logger.error("Error deleting services: %s", error)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail='Failed to delete services')
+    finally:
+        if cursor is not None:
+            await cursor.close()
+
+@collection_route.post('/api/services/batch', tags=["Коллекция сервисов"])
+async def get_services_batch(
+    batch: ServiceNames,
+    request: Request,
+    inline_logos: Optional[bool] = None,
+    logo_size: Optional[int] = Query(None, ge=1),
+    db=Depends(get_db)
+):
+    """
+    Получает информацию о нескольких сервисах по именам за один вызов. Сколько бы ни было имён,
+    данные читаются двумя запросами: сервисы и их точки обслуживания с параметрами.
+
+    Параметры:
+    - inline_logos, logo_size: Как у /api/services/{service_name}.
+
+    Возвращает сервисы в порядке присланных имён (поля как у /api/services/{service_name})
+    и имена, которых не нашлось.
+    """
+    if not batch.names:
+        raise HTTPException(status_code=400, detail="Список names пуст")
+    service_names = list(dict.fromkeys(batch.names))
+    if len(service_names) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_PAGE_SIZE} имён за запрос")
+    if inline_logos is None:
+        inline_logos = logo_config["inline"]
+
+    cursor = None
+    try:
+        cursor = db.cursor()
+        await type_registry.refresh_if_stale(cursor)
+
+        await cursor.execute(
+            'SELECT id, name, description, logo FROM services.service WHERE name = ANY(%s)',
+            (service_names,)
+        )
+        services = {row['name']: row for row in await cursor.fetchall()}
+        service_points = await fetch_service_points(cursor, [row['id'] for row in services.values()])
+        found = [name for name in service_names if name in services]
+        logos = await logo_references(request, [services[name]['logo'] for name in found], inline_logos, logo_size)
+
+        return JSONResponse(content={
+            "services": [
+                {
+                    'serviceName': name,
+                    'serviceDescription': services[name]['description'],
+                    'servicePoints': service_points.get(services[name]['id'], []),
+                    'serviceLogo': logo
+                }
+                for name, logo in zip(found, logos)
+            ],
+            "notFound": [name for name in service_names if name not in services]
+        })
+    except Exception as error:
+        logger.error("Error executing query: %s", error)
+        raise HTTPException(status_code=500, detail="Ошибка выполнения запроса к базе данных")
+    finally:
+        if cursor is not None:
+            await cursor.close()
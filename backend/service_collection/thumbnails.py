@@ -0,0 +1,149 @@
+"""
+Уменьшенные копии логотипов. Для каждого оригинала в папке логотипов заранее создаются
+копии фиксированных размеров (по длинной стороне) в WebP и JPEG: <оригинал>@<размер>.webp
+и <оригинал>@<размер>.jpg рядом с самим файлом. Копии создаются при загрузке логотипа,
+а для уже лежащих файлов - командой (из папки backend):
+    python -m service_collection.thumbnails [--force]
+
+Нужен пакет Pillow; без него копии не создаются и клиенты получают оригиналы.
+"""
+import argparse
+import logging
+import os
+import re
+import tempfile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+thumbnail_config = {
+    # Размеры по длинной стороне, в пикселях
+    "sizes": tuple(sorted(int(size) for size in os.getenv("LOGO_THUMBNAIL_SIZES", "128,256,512").split(","))),
+    "webp_quality": 80,
+    "jpeg_quality": 85
+}
+
+# MIME-тип копии -> (расширение, формат Pillow)
+THUMBNAIL_FORMATS = {
+    "image/webp": (".webp", "WEBP"),
+    "image/jpeg": (".jpg", "JPEG")
+}
+
+_THUMBNAIL_NAME = re.compile(r"@\d+\.(webp|jpg)$")
+
+def thumbnail_name(file_name, size, media_type):
+    """Имя копии логотипа file_name размера size в формате media_type."""
+    return f"{file_name}@{size}{THUMBNAIL_FORMATS[media_type][0]}"
+
+def is_thumbnail(file_name):
+    return _THUMBNAIL_NAME.search(file_name) is not None
+
+def pick_size(requested):
+    """Наименьший из заготовленных размеров не меньше requested (или наибольший, если таких нет)."""
+    for size in thumbnail_config["sizes"]:
+        if size >= requested:
+            return size
+    return thumbnail_config["sizes"][-1]
+
+def thumbnail_names(file_name):
+    """Имена всех копий логотипа file_name."""
+    return [
+        thumbnail_name(file_name, size, media_type)
+        for size in thumbnail_config["sizes"]
+        for media_type in THUMBNAIL_FORMATS
+    ]
+
+def _save_atomically(image, path, pillow_format, **options):
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".thumbnail-", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            image.save(file, pillow_format, **options)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def generate_thumbnails(path):
+    """
+    Создаёт копии логотипа path всех размеров и форматов. Блокирующая: из обработчиков
+    запросов вызывается в пуле потоков. Возвращает имена созданных файлов
+    (пустой список, если Pillow не установлен).
+    """
+    if Image is None:
+        return []
+    directory, file_name = os.path.split(path)
+    created = []
+    with Image.open(path) as original:
+        # Учитываем поворот из EXIF и берём первый кадр анимации
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA")
+        # Для JPEG прозрачность заменяется белым фоном
+        flattened = Image.new("RGB", image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel("A"))
+
+        for size in thumbnail_config["sizes"]:
+            webp = image.copy()
+            webp.thumbnail((size, size), Image.LANCZOS)
+            name = thumbnail_name(file_name, size, "image/webp")
+            _save_atomically(webp, os.path.join(directory, name), "WEBP", quality=thumbnail_config["webp_quality"], method=6)
+            created.append(name)
+
+            jpeg = flattened.copy()
+            jpeg.thumbnail((size, size), Image.LANCZOS)
+            name = thumbnail_name(file_name, size, "image/jpeg")
+            _save_atomically(jpeg, os.path.join(directory, name), "JPEG", quality=thumbnail_config["jpeg_quality"], optimize=True, progressive=True)
+            created.append(name)
+    return created
+
+def thumbnails_outdated(path):
+    """True, если какой-то копии нет или она старше оригинала."""
+    directory, file_name = os.path.split(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    for name in thumbnail_names(file_name):
+        try:
+            if os.stat(os.path.join(directory, name)).st_mtime_ns < mtime_ns:
+                return True
+        except FileNotFoundError:
+            return True
+    return False
+
+def backfill(directory, force=False):
+    """
+    Создаёт недостающие и устаревшие копии для всех логотипов в directory.
+    Возвращает число обработанных оригиналов и список файлов, которые не удалось прочитать.
+    """
+    processed = 0
+    failed = []
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        if file_name.startswith(".") or is_thumbnail(file_name) or not os.path.isfile(path):
+            continue
+        if not force and not thumbnails_outdated(path):
+            continue
+        try:
+            generate_thumbnails(path)
+            processed += 1
+        except Exception as error:
+            logger.warning("Не удалось создать копии логотипа %s: %s", file_name, error)
+            failed.append(file_name)
+    return processed, failed
+
+if __name__ == "__main__":
+    from .logging_config import setup_logging
+    from .logos import LOGOS_DIR
+
+    parser = argparse.ArgumentParser(description="Создание уменьшенных копий логотипов")
+    parser.add_argument("--force", action="store_true", help="Пересоздать копии, даже если они актуальны")
+    arguments = parser.parse_args()
+    setup_logging()
+    if Image is None:
+        raise SystemExit("Не установлен пакет Pillow")
+    processed, failed = backfill(LOGOS_DIR, arguments.force)
+    logger.info("Обработано логотипов: %s, с ошибками: %s.", processed, len(failed))
@@ -0,0 +1,108 @@
+from .database import db
+import asyncio
+import hashlib
+import os
+import time
+
+type_registry_config = {
+    # Через сколько секунд справочник типов перечитывается из базы
+    "ttl": float(os.getenv("TYPE_REGISTRY_TTL", 300))
+}
+
+class TypeRegistry:
+    """
+    Справочник components.type в памяти процесса: название -> id и id -> название.
+    Таблица маленькая и почти не меняется, поэтому вместо запроса на каждый параметр
+    она читается целиком раз в ttl секунд, а также при обращении к неизвестному типу
+    (тип могли добавить в обход приложения). Названия и id, которых не нашлось и после
+    перечитывания, запоминаются до следующего перечитывания по ttl, поэтому повторные
+    запросы с тем же неизвестным типом базу не трогают.
+
+    Методы принимают курсор текущего запроса; без него справочник читается через
+    отдельное соединение из пула.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.etag = None
+        self._ids = {}
+        self._names = {}
+        self._missing_names = set()
+        self._missing_ids = set()
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def _read(self, cursor):
+        await cursor.execute('SELECT id, "type" FROM components."type" ORDER BY id')
+        return [(row['id'], row['type']) for row in await cursor.fetchall()]
+
+    async def _load(self, cursor):
+        """Перечитывает справочник; вызывается под self._lock."""
+        if cursor is not None:
+            rows = await self._read(cursor)
+        else:
+            async with db.connection() as connection:
+                own_cursor = connection.cursor()
+                try:
+                    rows = await self._read(own_cursor)
+                finally:
+                    await own_cursor.close()
+        self._ids = {name: type_id for type_id, name in rows}
+        self._names = {type_id: name for type_id, name in rows}
+        self._missing_names = set()
+        self._missing_ids = set()
+        # ETag зависит только от содержимого, поэтому совпадает во всех воркерах
+        digest = hashlib.md5(repr(rows).encode("utf-8")).hexdigest()
+        self.etag = f'"types-{digest}"'
+        self._loaded_at = time.monotonic()
+
+    async def load(self, cursor=None):
+        async with self._lock:
+            await self._load(cursor)
+
+    async def refresh_if_stale(self, cursor=None):
+        if self._is_stale():
+            async with self._lock:
+                # Пока ждали блокировку, справочник мог перечитать другой запрос
+                if self._is_stale():
+                    await self._load(cursor)
+
+    def _unknown_names(self, names):
+        return names - self._ids.keys() - self._missing_names
+
+    def _unknown_ids(self, type_ids):
+        return type_ids - self._names.keys() - self._missing_ids
+
+    async def type_ids(self, names, cursor=None):
+        """Словарь название -> id для известных типов из names; неизвестные в него не попадают."""
+        await self.refresh_if_stale(cursor)
+        names = set(names)
+        if self._unknown_names(names):
+            async with self._lock:
+                if self._unknown_names(names):
+                    await self._load(cursor)
+                    self._missing_names |= names - self._ids.keys()
+        return {name: self._ids[name] for name in names if name in self._ids}
+
+    async def type_id(self, name, cursor=None):
+        return (await self.type_ids([name], cursor)).get(name)
+
+    async def type_names(self, type_ids, cursor=None):
+        """Словарь id -> название для известных id из type_ids."""
+        await self.refresh_if_stale(cursor)
+        type_ids = {type_id for type_id in type_ids if type_id is not None}
+        if self._unknown_ids(type_ids):
+            async with self._lock:
+                if self._unknown_ids(type_ids):
+                    await self._load(cursor)
+                    self._missing_ids |= type_ids - self._names.keys()
+        return {type_id: self._names[type_id] for type_id in type_ids if type_id in self._names}
+
+    async def all(self, cursor=None):
+        """Все типы в виде списка пар (id, название), упорядоченных по id."""
+        await self.refresh_if_stale(cursor)
+        return list(self._names.items())
+
+type_registry = TypeRegistry(type_registry_config["ttl"])
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from fastapi import Request
+from service_collection.etags import REVALIDATE, etag_matches, make_etag, not_modified, rows_etag
+
+ETAG = make_etag("1:100,2:101")
+OTHER = make_etag("1:100,2:102")
+
+def request_with(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode("latin-1"))]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.executed = None
+
+    async def execute(self, query, params=None):
+        self.executed = (query, params)
+
+    async def fetchone(self):
+        return self.row
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    f"W/{ETAG}",
+    f"{OTHER}, {ETAG}",
+    f"{OTHER},W/{ETAG}",
+    f"  {ETAG}  ",
+    "*",
+    f"{OTHER}, *",
+])
+def test_matching_if_none_match(header):
+    assert etag_matches(request_with(header), ETAG)
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    OTHER,
+    f"W/{OTHER}",
+    f"{OTHER}, W/{OTHER}",
+    # Без кавычек, с чужим регистром префикса или частью значения - другой тег
+    ETAG.strip('"'),
+    f"w/{ETAG}",
+    ETAG[:-2] + '"',
+    f'"x{ETAG[1:]}',
+])
+def test_not_matching_if_none_match(header):
+    assert not etag_matches(request_with(header), ETAG)
+
+@pytest.mark.parametrize("header", [ETAG, "*"])
+def test_missing_entity_never_matches(header):
+    # Сущности нет (ETag None): даже * не даёт 304
+    assert not etag_matches(request_with(header), None)
+
+def test_not_modified_returns_304_with_etag():
+    response = not_modified(request_with(f"W/{ETAG}"), ETAG)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == REVALIDATE
+    assert response.body == b""
+
+def test_not_modified_returns_none_for_stale_copy():
+    assert not_modified(request_with(OTHER), ETAG) is None
+
+def test_make_etag_is_quoted_and_depends_on_every_part():
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert make_etag("v", "types-1", False) != make_etag("v", "types-2", False)
+    assert make_etag("v", "types-1", False) != make_etag("v", "types-1", True)
+    assert make_etag("v", None) == make_etag("v", None)
+
+def test_rows_etag_uses_version_row_and_extras():
+    cursor = FakeCursor(("1:100,2:101",))
+    etag = asyncio.run(rows_etag(cursor, "SELECT version", (5,), "types-1"))
+
+    assert cursor.executed == ("SELECT version", (5,))
+    assert etag == make_etag("1:100,2:101", "types-1")
+    assert etag != asyncio.run(rows_etag(FakeCursor(("1:100,2:101",)), "SELECT version", (5,), "types-2"))
+
+@pytest.mark.parametrize("row", [None, (None,)])
+def test_rows_etag_is_none_without_entity(row):
+    assert asyncio.run(rows_etag(FakeCursor(row), "SELECT version")) is None
+
+def test_empty_version_still_has_etag():
+    # Пустой список (string_agg по нулю строк через coalesce) - тоже версия
+    assert asyncio.run(rows_etag(FakeCursor(("",)), "SELECT version")) == make_etag("")
@@ -0,0 +1,70 @@
+import base64
+import json
+import pytest
+from fastapi import HTTPException
+from service_collection.pagination import MAX_CURSOR_ID, decode_cursor, encode_cursor, like_prefix, parse_fields
+
+def token(payload):
+    """Курсор с произвольным содержимым, как если бы его отредактировали вручную."""
+    raw = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+@pytest.mark.parametrize("last_id", [0, 1, 42, 10 ** 12, MAX_CURSOR_ID])
+def test_cursor_round_trip(last_id):
+    assert decode_cursor(encode_cursor(last_id)) == last_id
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(123456789)
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+@pytest.mark.parametrize("empty", [None, ""])
+def test_missing_cursor_means_first_page(empty):
+    assert decode_cursor(empty) is None
+
+@pytest.mark.parametrize("bad", [
+    "!!!",
+    "a",
+    "абв",
+    token(b"not json"),
+    token(b"\xff\xfe"),
+    token([1, 2]),
+    token("after"),
+    token({}),
+    token({"before": 5}),
+    token({"after": "5"}),
+    token({"after": 5.0}),
+    token({"after": None}),
+    token({"after": True}),
+    token({"after": -1}),
+    token({"after": MAX_CURSOR_ID + 1}),
+    token(b"[" * 100000 + b"]" * 100000),
+])
+def test_malformed_cursor_is_400(bad):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(bad)
+    assert error.value.status_code == 400
+
+def test_parse_fields_without_parameter_returns_all():
+    assert parse_fields(None, ["id", "name"]) is None
+
+def test_parse_fields_keeps_order_and_strips_spaces():
+    assert parse_fields(" name , id,", ["id", "name", "description"]) == ["name", "id"]
+
+@pytest.mark.parametrize("fields", ["", ",", " , ", "id,secret", "secret"])
+def test_parse_fields_rejects_unknown_or_empty(fields):
+    with pytest.raises(HTTPException) as error:
+        parse_fields(fields, ["id", "name"])
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("prefix, pattern", [
+    ("abc", "abc%"),
+    ("", "%"),
+    ("50%", "50\\%%"),
+    ("a_b", "a\\_b%"),
+    ("c:\\dir", "c:\\\\dir%"),
+    ("\\%_", "\\\\\\%\\_%"),
+])
+def test_like_prefix_escapes_special_characters(prefix, pattern):
+    assert like_prefix(prefix) == pattern
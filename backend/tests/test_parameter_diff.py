@@ -0,0 +1,31 @@
+from service_collection.parameter_diff import plan_parameter_changes
+
+# Сохранённые параметры a, b, c: id -> (имя, описание)
+STORED = {1: ("a", "first"), 2: ("b", "second"), 3: ("c", "third")}
+
+def test_unsubmitted_parameters_are_kept():
+    # Как saveChanges во фронтенде: прислан только изменённый параметр
+    plan = plan_parameter_changes(STORED, [(1, ("a", "changed"))])
+
+    assert plan["changed"] == [(1, ("a", "changed"))]
+    assert plan["removed"] == []
+    assert plan["kept"] == [1, 2, 3]
+
+def test_parameters_are_removed_only_when_listed():
+    plan = plan_parameter_changes(STORED, [(1, ("a", "first"))], removed_ids=[3, 3])
+
+    assert plan["changed"] == []
+    assert plan["removed"] == [3]
+    assert plan["kept"] == [1, 2]
+
+def test_new_parameters_are_added():
+    plan = plan_parameter_changes(STORED, [(None, ("d", "fourth"))])
+
+    assert plan["added"] == [("d", "fourth")]
+    assert plan["kept"] == [1, 2, 3]
+
+def test_foreign_and_conflicting_ids_are_reported():
+    plan = plan_parameter_changes(STORED, [(7, ("x", "")), (2, ("b", "second"))], removed_ids=[2, 9])
+
+    assert plan["foreign"] == [7, 9]
+    assert plan["conflicting"] == [2]
@@ -0,0 +1,34 @@
+from service_collection import profiling
+from service_collection.profiling import describe_params, summarize
+
+AUTH_INSERT = 'INSERT INTO services.default_auth ("token", service_id, type_id, user_id, "param_name") VALUES (%s, %s, %s, %s, %s)'
+OAUTH_INSERT = "INSERT INTO services.oauth_auth (client_id, service_id, client_secret) VALUES (%s, %s, %s)"
+
+def test_values_are_redacted_by_default():
+    described = describe_params("SELECT * FROM services.service WHERE name = %s AND id = ANY(%s)", ("Weather", [1, 2, 3]))
+
+    assert described == "['str', 'list[3]']"
+
+def test_named_params_keep_keys_only():
+    assert describe_params("SELECT %(q)s", {"q": "secret text", "limit": 5}) == "{'q': 'str', 'limit': 'int'}"
+
+def test_missing_params():
+    assert describe_params("SELECT 1", None) is None
+
+def test_values_are_logged_only_when_enabled(monkeypatch):
+    monkeypatch.setitem(profiling.profiling_config, "log_param_values", True)
+
+    assert describe_params("SELECT %s", ("Weather",)) == "('Weather',)"
+
+def test_auth_tables_are_never_revealed(monkeypatch):
+    monkeypatch.setitem(profiling.profiling_config, "log_param_values", True)
+
+    for query, params in ((AUTH_INSERT, ("tok-123", 1, 2, 3, "key")), (OAUTH_INSERT, ("id", 1, "s3cr3t"))):
+        described = describe_params(query, params)
+        assert "tok-123" not in described and "s3cr3t" not in described
+
+def test_summary_does_not_contain_secrets():
+    summary = summarize([(AUTH_INSERT, ("tok-123", 1, 2, 3, "key"), 0.5)])
+
+    assert "tok-123" not in repr(summary)
+    assert summary["statements"][0]["params"] == "['str', 'int', 'int', 'int', 'str']"
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from service_collection import search_routes
+from service_collection.search_routes import _HEADLINE_START, _HEADLINE_STOP, _highlight, _snippet, search, search_config
+
+START = search_config["start_sel"]
+STOP = search_config["stop_sel"]
+
+class FakeCursor:
+    """Курсор, который запоминает запрос и возвращает заданные строки."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.query = None
+        self.params = None
+
+    async def execute(self, query, params=None):
+        self.query = query
+        self.params = params
+
+    async def fetchall(self):
+        return self.rows
+
+    async def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_instance = FakeCursor(rows)
+
+    def cursor(self):
+        return self.cursor_instance
+
+def search_row(title, snippet):
+    return {
+        "kind": "component", "id": 1, "title": title, "snippet": snippet,
+        "service_name": None, "component_id": 1, "parent_id": None, "rank": 1.0
+    }
+
+def run_search(rows, q="evil"):
+    connection = FakeConnection(rows)
+    response = asyncio.run(search(request=None, q=q, kind=None, limit=20, offset=0, db=connection))
+    return json.loads(response.body), connection.cursor_instance
+
+def test_title_markup_is_escaped():
+    title = _highlight('<script>alert("evil")</script> & evil', "evil")
+
+    assert "<script>" not in title
+    assert title == (
+        f'&lt;script&gt;alert(&quot;{START}evil{STOP}&quot;)&lt;/script&gt; &amp; {START}evil{STOP}'
+    )
+
+def test_title_without_matches_is_escaped():
+    assert _highlight("<b>bold</b>", "zzz") == "&lt;b&gt;bold&lt;/b&gt;"
+
+def test_only_highlight_tags_stay_in_title():
+    title = _highlight("<mark>fake</mark> real", "real")
+
+    assert title == f"&lt;mark&gt;fake&lt;/mark&gt; {START}real{STOP}"
+
+def test_snippet_markup_is_escaped_and_markers_become_tags():
+    headline = f"<img src=x onerror=alert(1)> the {_HEADLINE_START}evil{_HEADLINE_STOP} & co"
+
+    assert _snippet(headline) == f"&lt;img src=x onerror=alert(1)&gt; the {START}evil{STOP} &amp; co"
+
+def test_snippet_keeps_empty_value():
+    assert _snippet(None) is None
+
+def test_headline_uses_sentinels_and_strips_them_from_stored_text():
+    _, cursor = run_search([])
+
+    # Совпадения размечаются временными метками, а не тегами из search_config
+    assert f"StartSel={_HEADLINE_START}, StopSel={_HEADLINE_STOP}" in cursor.params["headline_options"]
+    assert START not in cursor.params["headline_options"]
+    # Метки, уже лежащие в тексте каталога, вырезаются до ts_headline
+    assert "ts_headline('simple', translate(context, %(markers)s, '')" in cursor.query
+    assert set(cursor.params["markers"]) == {_HEADLINE_START, _HEADLINE_STOP}
+
+def test_search_response_escapes_title_and_snippet():
+    results, _ = run_search([
+        search_row("<b>evil</b> corp", f"<i>very</i> {_HEADLINE_START}evil{_HEADLINE_STOP}")
+    ])
+
+    assert results[0]["title"] == f"&lt;b&gt;{START}evil{STOP}&lt;/b&gt; corp"
+    assert results[0]["snippet"] == f"&lt;i&gt;very&lt;/i&gt; {START}evil{STOP}"
+
+def test_headlines_are_computed_for_page_rows_only():
+    _, cursor = run_search([])
+
+    assert cursor.params["page_size"] == 21
+    assert "LIMIT %(page_size)s OFFSET %(offset)s" in cursor.query
+
+def test_configured_tags_are_used(monkeypatch):
+    monkeypatch.setitem(search_routes.search_config, "start_sel", "<em>")
+    monkeypatch.setitem(search_routes.search_config, "stop_sel", "</em>")
+
+    assert _snippet(f"<u>{_HEADLINE_START}x{_HEADLINE_STOP}</u>") == "&lt;u&gt;<em>x</em>&lt;/u&gt;"
@@ -0,0 +1,71 @@
+import asyncio
+from service_collection.type_registry import TypeRegistry
+
+class FakeCursor:
+    """Курсор над таблицей components.type, который считает чтения."""
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    async def execute(self, query, params=None):
+        self.reads += 1
+
+    async def fetchall(self):
+        return [{"id": type_id, "type": name} for type_id, name in self.rows]
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_known_types_are_served_from_memory():
+    registry = TypeRegistry(ttl=300)
+    cursor = FakeCursor([(1, "string"), (2, "number")])
+
+    assert run(registry.type_ids(["string", "number"], cursor)) == {"string": 1, "number": 2}
+    assert run(registry.type_names([1, 2, None], cursor)) == {1: "string", 2: "number"}
+    assert cursor.reads == 1
+
+def test_unknown_name_reloads_once_until_ttl():
+    registry = TypeRegistry(ttl=300)
+    cursor = FakeCursor([(1, "string")])
+
+    for _ in range(5):
+        assert run(registry.type_ids(["string", "bogus"], cursor)) == {"string": 1}
+    # Первое чтение - загрузка, второе - перечитывание из-за неизвестного типа, дальше промах запомнен
+    assert cursor.reads == 2
+
+def test_unknown_id_reloads_once_until_ttl():
+    registry = TypeRegistry(ttl=300)
+    cursor = FakeCursor([(1, "string")])
+
+    for _ in range(5):
+        assert run(registry.type_names([1, 99], cursor)) == {1: "string"}
+    assert cursor.reads == 2
+
+def test_type_added_outside_the_app_is_found():
+    registry = TypeRegistry(ttl=300)
+    cursor = FakeCursor([(1, "string")])
+    run(registry.load(cursor))
+
+    cursor.rows.append((2, "date"))
+    assert run(registry.type_id("date", cursor)) == 2
+    assert cursor.reads == 2
+
+def test_misses_are_forgotten_after_ttl_reload():
+    registry = TypeRegistry(ttl=0)
+    cursor = FakeCursor([(1, "string")])
+    assert run(registry.type_ids(["date"], cursor)) == {}
+
+    cursor.rows.append((2, "date"))
+    registry._loaded_at -= 1
+    assert run(registry.type_ids(["date"], cursor)) == {"date": 2}
+
+def test_concurrent_misses_share_one_reload():
+    registry = TypeRegistry(ttl=300)
+    cursor = FakeCursor([(1, "string")])
+    run(registry.load(cursor))
+
+    async def many():
+        await asyncio.gather(*(registry.type_ids(["bogus"], cursor) for _ in range(10)))
+
+    run(many())
+    assert cursor.reads == 2
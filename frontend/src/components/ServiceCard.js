@@ -2,6 +2,9 @@ import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { ReactComponent as BackIcon } from './back.svg';
 
+// Размер логотипа в карточке, пикселей (карточка ~250-400 px в ширину, 200 px в высоту)
+const CARD_LOGO_SIZE = 256;
+
 const styles = {
   container: {
     maxWidth: '1200px',
@@ -149,7 +152,8 @@ function ServiceCard() {
 
   const fetchData = async () => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/service`);
+      // Для карточек достаточно уменьшенной копии логотипа
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/api/service?logo_size=${CARD_LOGO_SIZE}`);
   
       // Логируем информацию о ответе
       console.log('Response Status:', response.status);